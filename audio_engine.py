@@ -0,0 +1,439 @@
+"""
+Callback-driven audio mixer.
+
+One SDL audio device is opened through pygame._sdl2.audio with a small
+buffer (ROVER_AUDIO_BUFFER frames, default 1024, i.e. 23 ms at 44.1 kHz).
+SDL calls back for every buffer, and the callback mixes all active voices
+(horn, reversing beep, speech...) straight into the device buffer with
+NumPy, using work arrays allocated once. A sound started with play() is
+heard within about one buffer, instead of after the ~93 ms of the
+4096-frame pygame.mixer buffer this replaces.
+
+The callback is Python, so it has to win the GIL from the request, camera
+and status threads for every buffer; the interpreter only switches threads
+every 5 ms or so. The default buffer leaves room for that on a Pi. Lower
+ROVER_AUDIO_BUFFER (512, then 256) for less latency only while /status
+shows no underruns under load.
+
+pygame._sdl2 is a private pygame API. If it can't be imported or its
+device can't be opened, the engine falls back to pygame.mixer: a feeder
+thread mixes the voices the same way and queues one buffer ahead on a
+mixer channel, which adds about one buffer of latency.
+
+Voices have a priority. While a voice with a duck gain below 1 plays,
+voices of lower priority are turned down by that gain (speech ducks the
+reversing beep). When every voice slot is taken, a new voice replaces the
+lowest-priority one, or is dropped if nothing has lower priority. Gain
+changes, including stops, are ramped over one buffer to avoid clicks.
+
+Output is mono on the right channel, like the rest of the rover's audio.
+
+The callback times itself. A callback that starts more than 1.5 buffer
+periods after the previous one means the device probably ran dry, and it
+is counted as an underrun.
+
+ROVER_AUDIO_DEVICE picks the output device by (part of) its name; the
+default is the Pi's headphone jack, or the first device if there is none.
+"""
+
+import io
+import os
+import subprocess
+import threading
+import time
+import wave
+
+SAMPLE_RATE = 44100
+DEFAULT_BUFFER = 1024
+MAX_VOICES = 8
+
+# Higher priorities duck and evict lower ones
+PRIORITY_BACKGROUND = 0  # Reversing beep
+PRIORITY_SPEECH = 10
+PRIORITY_ALERT = 20  # Horn
+
+
+class Voice:
+    """
+    One playing sound.
+
+    Args:
+        name (str): Voice name; playing a sound with the same name replaces it.
+        samples (numpy.ndarray): Mono float32 samples from -1 to 1.
+        loop (bool): Repeat until stopped.
+        gain (float): Volume from 0 to 1.
+        priority (int): See the PRIORITY_* constants.
+        duck (float): Gain applied to lower-priority voices while this plays.
+    """
+
+    def __init__(self, name, samples, loop=False, gain=1.0, priority=PRIORITY_SPEECH, duck=1.0):
+        self.name = name
+        self.samples = samples
+        self.loop = loop
+        self.gain = gain
+        self.priority = priority
+        self.duck = duck
+        self.position = 0
+        self.stopping = False
+        self.current_gain = None  # Gain used for the last buffer
+        self.done = threading.Event()  # Set when the voice has finished or been stopped
+
+    def read(self, out, frames):
+        """Copy the next frames samples into out. Returns the number copied."""
+        total = len(self.samples)
+        written = 0
+        while written < frames and total:
+            take = min(frames - written, total - self.position)
+            out[written:written + take] = self.samples[self.position:self.position + take]
+            written += take
+            self.position += take
+            if self.position >= total:
+                if not self.loop:
+                    break
+                self.position = 0
+        return written
+
+    @property
+    def finished(self):
+        return not self.loop and self.position >= len(self.samples)
+
+
+class AudioEngine:
+    """
+    Mixes voices into one low-latency output device.
+
+    Args:
+        buffer (int): Device buffer size in frames. Smaller is lower latency
+            but more callbacks (and underrun risk).
+        device (str, optional): Output device name, or part of it (the
+            exact name with the pygame.mixer fallback).
+        max_voices (int): Voices mixed at once.
+    """
+
+    def __init__(self, buffer=DEFAULT_BUFFER, device=None, max_voices=MAX_VOICES):
+        import numpy as np
+
+        self.max_voices = max_voices
+        self._lock = threading.Lock()
+        self._voices = []
+        self._allocate(buffer)
+
+        self.callbacks = 0
+        self.underruns = 0
+        self.evicted = 0
+        self.rejected = 0
+        self._busy_total = 0.0
+        self._busy_max = 0.0
+        self._last_callback = None
+        self._np = np
+        self._closed = threading.Event()
+
+        try:
+            self._open_sdl(buffer, device)
+        except (ImportError, AttributeError, TypeError) as e:
+            # Private API missing or changed: use the public mixer instead
+            print(f"pygame._sdl2 audio unavailable ({e!r}); falling back to pygame.mixer")
+            self._open_mixer(buffer, device)
+
+    def _open_sdl(self, buffer, device):
+        from pygame._sdl2 import sdl2
+        from pygame._sdl2 import audio as sdl_audio
+
+        sdl2.init_subsystem(sdl2.INIT_AUDIO)
+        names = sdl_audio.get_audio_device_names(False)
+        if not names:
+            raise RuntimeError('No audio output devices')
+        wanted = device or 'Headphones'
+        self.device_name = next((name for name in names if wanted in name), None)
+        if self.device_name is None:
+            if device:
+                raise RuntimeError(f"No audio device matching {device!r} (have: {', '.join(names)})")
+            self.device_name = names[0]
+
+        self.device = sdl_audio.AudioDevice(
+            devicename=self.device_name,
+            iscapture=False,
+            frequency=SAMPLE_RATE,
+            audioformat=sdl_audio.AUDIO_S16,
+            numchannels=2,
+            chunksize=buffer,
+            allowed_changes=0,
+            callback=self._callback,
+        )
+        self.backend = 'sdl2'
+        self.device.pause(0)
+
+    def _open_mixer(self, buffer, device):
+        import pygame
+
+        self._pygame = pygame
+        # The mixer needs the exact device name; None is SDL's default device
+        pygame.mixer.init(frequency=SAMPLE_RATE, size=-16, channels=2, buffer=buffer, devicename=device)
+        self.device = None
+        self.device_name = device or 'default'
+        self.backend = 'mixer'
+        self._channel = pygame.mixer.Channel(0)
+        self._out = self._np.zeros((buffer, 2), dtype=self._np.int16)
+        self._feeder = threading.Thread(target=self._feed, name='audio-feed', daemon=True)
+        self._feeder.start()
+
+    def _feed(self):
+        """Keep one mixed buffer queued behind the one the mixer channel is playing."""
+        channel = self._channel
+        started = False
+        while not self._closed.is_set():
+            if channel.get_queue() is not None:
+                time.sleep(self.period / 4)
+                continue
+            if started and not channel.get_busy():
+                self.underruns += 1
+            started_at = time.perf_counter()
+            self._mix_into(self._out)
+            self._record_busy(started_at)
+            # Queued sounds start at once on an idle channel
+            channel.queue(self._pygame.mixer.Sound(buffer=self._out.tobytes()))
+            started = True
+
+    @classmethod
+    def from_environment(cls):
+        """Open the device named by ROVER_AUDIO_DEVICE with ROVER_AUDIO_BUFFER frames."""
+        # Talk to ALSA directly
+        os.environ.setdefault('SDL_AUDIODRIVER', 'alsa')
+        return cls(
+            buffer=int(os.environ.get('ROVER_AUDIO_BUFFER', DEFAULT_BUFFER)),
+            device=os.environ.get('ROVER_AUDIO_DEVICE'),
+        )
+
+    def _allocate(self, frames):
+        import numpy as np
+
+        self.frames = frames
+        self.period = frames / SAMPLE_RATE
+        self._mix = np.zeros(frames, dtype=np.float32)
+        self._chunk = np.zeros(frames, dtype=np.float32)
+        self._gain = np.zeros(frames, dtype=np.float32)
+        self._ramp = np.arange(frames, dtype=np.float32) / frames
+
+    def play(self, name, samples, loop=False, gain=1.0, priority=PRIORITY_SPEECH, duck=1.0):
+        """
+        Start playing a sound, replacing any voice with the same name.
+
+        Args:
+            samples (numpy.ndarray): Mono float32 samples from -1 to 1.
+            See Voice for the other arguments.
+
+        Returns:
+            Voice: The new voice; voice.done is set when it ends. If it was
+            dropped for lack of a free slot, done is already set.
+        """
+        voice = Voice(name, samples, loop, gain, priority, duck)
+        with self._lock:
+            for other in self._voices:
+                if other.name == name:
+                    other.stopping = True
+            active = [v for v in self._voices if not v.stopping]
+            if len(active) >= self.max_voices:
+                lowest = min(active, key=lambda v: v.priority)
+                if lowest.priority >= priority:
+                    self.rejected += 1
+                    voice.done.set()
+                    return voice
+                lowest.stopping = True
+                self.evicted += 1
+            self._voices.append(voice)
+        return voice
+
+    def stop(self, name):
+        """Fade out and remove the voice with this name, if playing."""
+        with self._lock:
+            for voice in self._voices:
+                if voice.name == name:
+                    voice.stopping = True
+
+    def is_playing(self, name):
+        with self._lock:
+            return any(v.name == name and not v.stopping for v in self._voices)
+
+    def _callback(self, device, stream):
+        started = time.perf_counter()
+        if self._last_callback is not None and started - self._last_callback > 1.5 * self.period:
+            self.underruns += 1
+        self._last_callback = started
+        self._mix_into(self._np.frombuffer(stream, dtype=self._np.int16).reshape(-1, 2))
+        self._record_busy(started)
+
+    def _mix_into(self, out):
+        """Mix the next len(out) frames of every voice into out (int16, stereo)."""
+        np = self._np
+        frames = len(out)
+        if frames != self.frames:
+            self._allocate(frames)
+        mix, chunk, gain = self._mix, self._chunk, self._gain
+        mix.fill(0)
+
+        with self._lock:
+            voices = list(self._voices)
+
+        finished = []
+        for voice in voices:
+            if voice.stopping:
+                target = 0.0
+            else:
+                target = voice.gain
+                for other in voices:
+                    if other.priority > voice.priority and not other.stopping:
+                        target *= other.duck
+            start = target if voice.current_gain is None else voice.current_gain
+            voice.current_gain = target
+
+            n = voice.read(chunk, frames)
+            if start == target:
+                if target != 1.0:
+                    np.multiply(chunk[:n], target, out=chunk[:n])
+            else:
+                # Ramp from the previous gain to avoid a click
+                np.multiply(self._ramp[:n], target - start, out=gain[:n])
+                gain[:n] += start
+                chunk[:n] *= gain[:n]
+            mix[:n] += chunk[:n]
+            if voice.stopping or voice.finished:
+                finished.append(voice)
+
+        if finished:
+            with self._lock:
+                self._voices = [v for v in self._voices if v not in finished]
+            for voice in finished:
+                voice.done.set()
+
+        np.clip(mix, -1.0, 1.0, out=mix)
+        mix *= 32767
+        out[:, 0] = 0
+        out[:, 1] = mix
+
+    def _record_busy(self, started):
+        busy = time.perf_counter() - started
+        self.callbacks += 1
+        self._busy_total += busy
+        self._busy_max = max(self._busy_max, busy)
+
+    def status(self):
+        with self._lock:
+            voices = [v.name for v in self._voices if not v.stopping]
+        return {
+            'backend': self.backend,
+            'device': self.device_name,
+            'buffer_frames': self.frames,
+            'latency_ms': round(self.period * 1000, 2),
+            'voices': voices,
+            'callbacks': self.callbacks,
+            'underruns': self.underruns,
+            'callback_avg_ms': round(self._busy_total / max(self.callbacks, 1) * 1000, 3),
+            'callback_max_ms': round(self._busy_max * 1000, 3),
+            'evicted': self.evicted,
+            'rejected': self.rejected,
+        }
+
+    def close(self):
+        self._closed.set()
+        if self.device is not None:
+            self.device.pause(1)
+            self.device.close()
+        else:
+            self._feeder.join()
+            self._pygame.mixer.quit()
+
+
+def beep_waveform():
+    """One cycle of the classic reversing beep (beep then silence), for looping."""
+    import numpy as np
+
+    sample_rate = SAMPLE_RATE
+    beep_freq = 1000  # 1kHz tone
+    beep_duration = 0.3  # 300ms beep
+    silence_duration = 0.3  # 300ms silence
+
+    # Generate one beep cycle (beep + silence)
+    beep_samples = int(sample_rate * beep_duration)
+    silence_samples = int(sample_rate * silence_duration)
+
+    # Create time array for the beep portion
+    t = np.linspace(0, beep_duration, beep_samples, dtype=np.float32)
+
+    # Generate sine wave for beep
+    beep = np.sin(2 * np.pi * beep_freq * t)
+
+    # Apply fade in/out to avoid clicks (20ms fade)
+    fade_samples = int(sample_rate * 0.02)
+    fade_in = np.linspace(0, 1, fade_samples, dtype=np.float32)
+    fade_out = np.linspace(1, 0, fade_samples, dtype=np.float32)
+    beep[:fade_samples] *= fade_in
+    beep[-fade_samples:] *= fade_out
+
+    # Create silence
+    silence = np.zeros(silence_samples, dtype=np.float32)
+
+    # Combine beep and silence (the engine plays it on the right channel)
+    return np.concatenate([beep, silence])
+
+
+def horn_waveform():
+    """A dual-tone car horn sound, for looping."""
+    import numpy as np
+
+    sample_rate = SAMPLE_RATE
+    duration = 0.5  # 500ms loop segment
+    samples = int(sample_rate * duration)
+
+    t = np.linspace(0, duration, samples, dtype=np.float32)
+
+    # Dual-tone horn (like a car horn) - F and A notes
+    freq1 = 349  # F4
+    freq2 = 440  # A4
+
+    tone1 = np.sin(2 * np.pi * freq1 * t)
+    tone2 = np.sin(2 * np.pi * freq2 * t)
+    return (tone1 + tone2) / 2  # Mix the two tones
+
+
+def resample(samples, rate):
+    """Convert mono float32 samples at rate to SAMPLE_RATE."""
+    import numpy as np
+
+    if rate == SAMPLE_RATE or not len(samples):
+        return samples
+    # Linear interpolation is plenty for speech
+    positions = np.arange(int(len(samples) * SAMPLE_RATE / rate)) * (rate / SAMPLE_RATE)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def decode_audio(data):
+    """
+    Decode an audio file held in memory to mono float32 samples at SAMPLE_RATE.
+
+    WAV is decoded directly; anything else (e.g. gTTS's MP3) is piped
+    through ffmpeg, so no temporary files are needed.
+
+    Args:
+        data (bytes): The encoded audio.
+
+    Returns:
+        numpy.ndarray: Mono float32 samples from -1 to 1.
+    """
+    import numpy as np
+
+    if data[:4] == b'RIFF':
+        with wave.open(io.BytesIO(data)) as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError('Only 16-bit WAV is supported')
+            rate = wav.getframerate()
+            pcm = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+            samples = pcm.reshape(-1, wav.getnchannels()).mean(axis=1, dtype=np.float32) / 32768
+        return resample(samples, rate)
+
+    result = subprocess.run(
+        ['ffmpeg', '-loglevel', 'error', '-i', 'pipe:0', '-f', 'f32le', '-ac', '1', '-ar', str(SAMPLE_RATE), 'pipe:1'],
+        input=data, capture_output=True, check=False,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"ffmpeg failed: {result.stderr.decode(errors='replace').strip()}")
+    return np.frombuffer(result.stdout, dtype=np.float32)
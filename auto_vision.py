@@ -0,0 +1,117 @@
+"""
+Automatic scene descriptions triggered by motion.
+
+When the motion detector reports that the scene has started changing,
+AutoVision describes the latest camera frame (the frame already held by
+StreamingOutput, no extra capture) and publishes the result to VisionResults,
+which passes it on to connected clients. A token bucket limits how often the model
+is called, and triggers that arrive while a description is in progress are
+dropped rather than queued.
+
+Enable with ROVER_AUTO_VISION=1 (requires ROVER_MOTION=1 and GEMINI_API_KEY).
+ROVER_AUTO_VISION_PER_MINUTE sets the sustained rate (default 2) and
+ROVER_AUTO_VISION_BURST the burst size (default 1).
+"""
+
+import threading
+import time
+
+from ratelimit import TokenBucket
+
+
+class VisionResults:
+    """
+    Latest scene description, with a sequence number.
+
+    Listeners registered with subscribe() are called with each new result.
+    """
+
+    def __init__(self):
+        self.seq = 0
+        self.latest = None
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def subscribe(self, callback):
+        """Call callback(result) with each new description."""
+        self._listeners.append(callback)
+
+    def publish(self, description, source):
+        """Store a new description and pass it to the listeners."""
+        with self._lock:
+            self.seq += 1
+            self.latest = {'seq': self.seq, 'time': time.time(), 'source': source, 'description': description}
+            latest = self.latest
+        for callback in self._listeners:
+            try:
+                callback(latest)
+            except Exception as e:
+                print(f"Vision listener error: {e}")
+
+
+class AutoVision:
+    """
+    Describes the scene when motion starts, rate-limited by a token bucket.
+
+    Args:
+        describe (callable): describe(frame) -> str, e.g. a Gemini call.
+        get_frame (callable): Returns the latest JPEG frame, or None.
+        results (VisionResults): Where descriptions are published.
+        speak (callable, optional): speak(text) for spoken output.
+        per_minute (float): Sustained descriptions per minute.
+        burst (int): Descriptions allowed back to back.
+    """
+
+    def __init__(self, describe, get_frame, results, speak=None, per_minute=2.0, burst=1):
+        self.describe = describe
+        self.get_frame = get_frame
+        self.results = results
+        self.speak = speak
+        self.bucket = TokenBucket(per_minute / 60.0, burst)
+        self.triggered = 0
+        self.described = 0
+        self.skipped_busy = 0
+        self.skipped_rate = 0
+        self._busy = threading.Lock()
+
+    def on_motion(self, event):
+        """Motion detector listener: describe the scene when motion starts."""
+        if event['type'] == 'start':
+            self.trigger(f"motion (score {event['score']:.2f})")
+
+    def trigger(self, reason):
+        """Start a description in the background unless busy or rate limited."""
+        self.triggered += 1
+        if not self._busy.acquire(blocking=False):
+            self.skipped_busy += 1
+            return False
+        if not self.bucket.try_acquire():
+            self._busy.release()
+            self.skipped_rate += 1
+            return False
+        threading.Thread(target=self._describe_thread, args=(reason,), name='auto-vision', daemon=True).start()
+        return True
+
+    def _describe_thread(self, reason):
+        try:
+            frame = self.get_frame()
+            if not frame:
+                return
+            description = self.describe(frame)
+            self.described += 1
+            print(f"Auto vision ({reason}): {description}")
+            self.results.publish(description, 'auto')
+            if self.speak:
+                self.speak(description)
+        except Exception as e:
+            print(f"Auto vision error: {e}")
+        finally:
+            self._busy.release()
+
+    def status(self):
+        return {
+            'triggered': self.triggered,
+            'described': self.described,
+            'skipped_busy': self.skipped_busy,
+            'skipped_rate': self.skipped_rate,
+        }
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Hardware-free end-to-end control latency benchmark for rover_web.py.
+
+Starts the web server in a child process with stub PCA9685, camera and
+audio modules (see hardware_stubs.py), fires drive commands at it from many
+concurrent clients and reports how long each command took from the client
+sending it to the PCA9685 register write completing, plus throughput.
+
+Each command's left motor speed is unique among the commands that can be in
+flight at once (speeds cycle through 1-100), so its register write can be
+found in the stub bus log by its channel 0 duty. Client and server both use
+time.monotonic(), which is the same clock across processes on Linux. Stops
+all set the same duty, so a stop is matched to the first stop write after
+it was sent. Commands that a stop cancels in the queue (409) or drops at
+the bus (no write) are counted as superseded and unmatched respectively.
+
+Patterns:
+    drive    POST /api/drive {"left": s, "right": -s}
+    control  POST /api/control forward/left/right/backward at speed s
+    mixed    control, with every --stop-every'th command a stop
+
+Usage:
+    python bench_control.py --clients 16 --requests 4000
+    python bench_control.py --pattern mixed --rate 20 --i2c-byte-delay 0.00009
+"""
+
+import argparse
+import http.client
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+LED0_ON_L = 0x06
+ADDRESS = 0x40
+DIRECTIONS = ('forward', 'left', 'right', 'backward')
+
+
+def run_child(byte_delay):
+    """Serve in this process, then print the bus log once stdin is closed."""
+    out = sys.stdout
+    sys.stdout = open(os.devnull, 'w')  # Request logging
+
+    import hardware_stubs
+    hardware_stubs.install(i2c_byte_delay=byte_delay)
+
+    import rover_web
+
+    server = rover_web.start(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    rover_web.RoverHandler.subsystems.wait()
+    hardware_stubs.bus.log.clear()
+    cpu_start = time.process_time()
+    out.write(json.dumps({'port': server.server_address[1]}) + '\n')
+    out.flush()
+
+    sys.stdin.read()
+    cpu = time.process_time() - cpu_start
+    log = [(t, address, register, data.hex()) for t, address, register, data in hardware_stubs.bus.log]
+    out.write(json.dumps({'log': log, 'cpu': cpu, 'threads': threading.active_count()}) + '\n')
+    out.flush()
+
+
+def command_for(pattern, seq, stop_every):
+    """Return (path, body, kind, left duty) for command number seq."""
+    speed = seq % 100 + 1
+    duty = min(4095, int(speed * (4096 / 100)))
+    if pattern == 'drive':
+        return '/api/drive', {'left': speed, 'right': -speed}, 'drive', duty
+    if pattern == 'mixed' and seq % stop_every == stop_every - 1:
+        return '/api/control', {'command': 'stop'}, 'stop', 0
+    return '/api/control', {'command': DIRECTIONS[seq % 4], 'speed': speed}, 'control', duty
+
+
+def run_clients(port, args):
+    """Send the commands. Returns [(kind, duty, sent, received, HTTP status)]."""
+    results = []
+    lock = threading.Lock()
+    counter = iter(range(args.requests))
+    interval = 1 / args.rate if args.rate else 0
+
+    def client():
+        next_send = time.monotonic()
+        while True:
+            with lock:
+                seq = next(counter, None)
+            if seq is None:
+                return
+            path, body, kind, duty = command_for(args.pattern, seq, args.stop_every)
+            if interval:
+                time.sleep(max(0.0, next_send - time.monotonic()))
+                next_send += interval
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+            sent = time.monotonic()
+            try:
+                connection.request('POST', path, json.dumps(body), {'Content-Type': 'application/json'})
+                status = connection.getresponse().status
+            except OSError:
+                status = 0
+            received = time.monotonic()
+            connection.close()
+            with lock:
+                results.append((kind, duty, sent, received, status))
+
+    threads = [threading.Thread(target=client) for _ in range(args.clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def match_writes(results, log):
+    """Return {kind: [command-to-write latency]} by finding each command's write."""
+    writes = {}  # Left duty -> write times, in order
+    for t, address, register, data in log:
+        data = bytes.fromhex(data)
+        if address == ADDRESS and register == LED0_ON_L and len(data) >= 4:
+            writes.setdefault(data[2] | data[3] << 8, []).append(t)
+
+    latencies = {}
+    unmatched = 0
+    for kind, duty, sent, received, status in sorted(results, key=lambda r: r[2]):
+        if status != 200:
+            continue
+        # A write for a command can't start before it was sent
+        times = writes.get(duty, [])
+        match = next((i for i, t in enumerate(times) if t >= sent), None)
+        if match is None or times[match] > received:
+            unmatched += 1
+            continue
+        latencies.setdefault(kind, []).append(times.pop(match) - sent)
+    return latencies, unmatched
+
+
+def percentiles(values):
+    values = sorted(values)
+    pick = lambda p: values[min(len(values) - 1, int(p * len(values)))] * 1000
+    return f"{pick(0.5):>8.2f} {pick(0.95):>8.2f} {pick(0.99):>8.2f} {values[-1] * 1000:>8.2f}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent clients')
+    parser.add_argument('--requests', type=int, default=2000, help='Total commands to send')
+    parser.add_argument('--pattern', choices=('drive', 'control', 'mixed'), default='drive')
+    parser.add_argument('--stop-every', type=int, default=10, help='Stop frequency for the mixed pattern')
+    parser.add_argument('--rate', type=float, default=0,
+                        help='Commands per second per client (0 = back to back)')
+    parser.add_argument('--i2c-byte-delay', type=float, default=0.00009,
+                        help='Simulated I2C time per byte in seconds (0.00009 is about 100 kHz)')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.i2c_byte_delay)
+        return
+    if args.clients > 50:
+        parser.error('at most 50 clients: commands are matched by a speed that repeats every 100')
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    # Many clients from one address would otherwise be rate limited
+    env = dict(os.environ, PYTHONPATH=here, ROVER_ADMISSION='0')
+    env.pop('GEMINI_API_KEY', None)
+    child = subprocess.Popen(
+        [sys.executable, os.path.join(here, 'bench_control.py'), '--child',
+         '--i2c-byte-delay', str(args.i2c_byte_delay)],
+        env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+    )
+    port = json.loads(child.stdout.readline())['port']
+
+    started = time.monotonic()
+    results = run_clients(port, args)
+    elapsed = time.monotonic() - started
+
+    child.stdin.close()
+    server = json.loads(child.stdout.readline())
+    child.wait()
+
+    latencies, unmatched = match_writes(results, server['log'])
+    superseded = sum(1 for r in results if r[4] == 409)  # Cancelled by a stop before running
+    errors = sum(1 for r in results if r[4] not in (200, 409))
+    round_trips = [r[3] - r[2] for r in results if r[4] == 200]
+
+    print(f"{len(results)} commands from {args.clients} clients ({args.pattern}) in {elapsed:.2f}s: "
+          f"{len(results) / elapsed:.0f} commands/s, {errors} errors, {superseded} superseded by stops, "
+          f"{unmatched} unmatched")
+    print(f"server CPU {server['cpu']:.2f}s ({server['cpu'] / max(len(results), 1) * 1e6:.0f} us/command), "
+          f"{server['threads']} threads at the end")
+    print(f"{'latency (ms)':<22} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for kind, values in sorted(latencies.items()):
+        print(f"{kind + ' to write':<22} {percentiles(values)}")
+    if round_trips:
+        print(f"{'round trip':<22} {percentiles(round_trips)}")
+
+
+if __name__ == '__main__':
+    main()
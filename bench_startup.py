@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Hardware-free startup benchmark for rover_web.py.
+
+Starts the web server in fresh interpreters with stub camera, audio and
+PCA9685 modules (see hardware_stubs.py), sends the first drive command as
+soon as the server is listening and reports how long each startup milestone
+took. Exits with status 1 if the median time to the first drivable command
+exceeds --max-drivable, so a regression fails CI.
+
+Usage:
+    python bench_startup.py --runs 5 --max-drivable 1.0
+    python bench_startup.py --camera-delay 1.5 --profile
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+def run_child(camera_delay):
+    """Run one startup in this process and print its timings as JSON."""
+    t0 = time.monotonic()
+
+    import hardware_stubs
+    hardware_stubs.install()
+    hardware_stubs.configure_camera(open_delay=camera_delay)
+
+    import threading
+    import urllib.request
+
+    import rover_web
+
+    server = rover_web.start(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    request = urllib.request.Request(
+        f'http://127.0.0.1:{port}/api/control',
+        data=json.dumps({'command': 'stop'}).encode(),
+        headers={'Content-Type': 'application/json'},
+        method='POST',
+    )
+    urllib.request.urlopen(request).read()
+
+    rover_web.RoverHandler.subsystems.wait()
+    rover_web.profiler.write_report()
+    status = rover_web.RoverHandler.subsystems.status()
+    offset = rover_web.BOOT_TIME - t0
+    timings = {event: round(value + offset, 4) for event, value in status['startup'].items()}
+    timings['all_subsystems'] = round(time.monotonic() - t0, 4)
+    timings['import_rover_web'] = round(offset, 4)
+    rover_web.shutdown_subsystems()
+    server.server_close()
+    print(json.dumps({'timings': timings, 'subsystems': status['subsystems']}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5, help='Number of fresh-process startups')
+    parser.add_argument('--camera-delay', type=float, default=0.5,
+                        help='Simulated camera open time in seconds')
+    parser.add_argument('--max-drivable', type=float, default=None,
+                        help='Fail if the median time to first command exceeds this (seconds)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Also write a startup profile for each run to the working directory')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.camera_delay)
+        return
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for run in range(args.runs):
+        env = dict(os.environ)
+        env.pop('GEMINI_API_KEY', None)
+        if args.profile:
+            env['ROVER_PROFILE_STARTUP'] = f'startup_profile_{run}.txt'
+        output = subprocess.run(
+            [sys.executable, os.path.join(here, 'bench_startup.py'), '--child',
+             '--camera-delay', str(args.camera_delay)],
+            env=dict(env, PYTHONPATH=here), capture_output=True, text=True, check=True,
+        ).stdout
+        # The background profile writer may print after the result line
+        results.append(json.loads(next(line for line in reversed(output.splitlines()) if line.startswith('{'))))
+
+    print(f"Startup over {args.runs} runs (seconds from interpreter start):")
+    print(f"{'milestone':<20} {'median':>8} {'min':>8} {'max':>8}")
+    for milestone in ('import_rover_web', 'rover_ready', 'server_listening', 'first_command', 'all_subsystems'):
+        values = [r['timings'][milestone] for r in results if milestone in r['timings']]
+        if values:
+            print(f"{milestone:<20} {statistics.median(values):>8.4f} {min(values):>8.4f} {max(values):>8.4f}")
+    for name, info in results[-1]['subsystems'].items():
+        print(f"  {name}: {info['state']}" + (f" ({info['error']})" if info.get('error') else ''))
+
+    drivable = statistics.median(r['timings']['first_command'] for r in results)
+    if args.max_drivable is not None and drivable > args.max_drivable:
+        print(f"FAIL: median time to first command {drivable:.4f}s exceeds {args.max_drivable}s")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
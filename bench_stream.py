@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Hardware-free MJPEG multi-viewer load test for rover_web.py.
+
+Starts the web server in a child process with the stub camera from
+hardware_stubs.py, which feeds synthetic JPEG-framed buffers to
+StreamingOutput at a chosen frame rate and size. It then opens N viewers
+on /video_feed that read as fast as they can, plus optional slow viewers
+whose reading is throttled to a fixed rate (with a small receive buffer, as
+on a weak Wi-Fi link). Reports the frames per second each viewer actually
+received and the server's CPU use, resident memory and thread count, read
+from /proc (so Linux only).
+
+Usage:
+    python bench_stream.py --viewers 20 --duration 10
+    python bench_stream.py --viewers 5 --slow-viewers 5 --slow-rate 150 --tiers 2
+    python bench_stream.py --fps 30 --frame-kb 80 --viewers 40
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+
+
+def run_child(fps, frame_bytes):
+    """Serve in this process until stdin is closed."""
+    out = sys.stdout
+    sys.stdout = open(os.devnull, 'w')  # Request logging
+
+    import hardware_stubs
+    hardware_stubs.install()
+    hardware_stubs.configure_camera(fps=fps, frame_bytes=frame_bytes)
+
+    import rover_web
+
+    server = rover_web.start(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    rover_web.RoverHandler.subsystems.wait()
+    out.write(json.dumps({'port': server.server_address[1]}) + '\n')
+    out.flush()
+    sys.stdin.read()
+
+
+def read_proc(pid):
+    """Return (CPU seconds, RSS in MiB, thread count) for a process."""
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    cpu = (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    rss = threads = 0
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                rss = int(line.split()[1]) / 1024
+            elif line.startswith('Threads:'):
+                threads = int(line.split()[1])
+    return cpu, rss, threads
+
+
+class Viewer(threading.Thread):
+    """
+    One /video_feed client.
+
+    Args:
+        port (int): Server port.
+        rate (float): Bytes per second to read at, or 0 for as fast as possible.
+    """
+
+    def __init__(self, port, rate):
+        super().__init__(daemon=True)
+        self.port = port
+        self.rate = rate
+        self.frames = []  # (receive time, frame bytes)
+        self.error = None
+        self.sock = None
+
+    def run(self):
+        try:
+            self.sock = socket.create_connection(('127.0.0.1', self.port))
+            if self.rate:
+                self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 16384)
+            self.sock.sendall(b'GET /video_feed HTTP/1.1\r\nHost: bench\r\n\r\n')
+            stream = self.sock.makefile('rb')
+            while stream.readline() not in (b'\r\n', b''):
+                pass  # Response headers
+
+            started = time.monotonic()
+            received = 0
+            while True:
+                if not stream.readline():  # Boundary
+                    return
+                length = 0
+                while True:
+                    line = stream.readline()
+                    if line in (b'\r\n', b''):
+                        break
+                    if line.lower().startswith(b'content-length:'):
+                        length = int(line.split(b':')[1])
+                stream.read(length + 2)
+                now = time.monotonic()
+                self.frames.append((now, length))
+                received += length
+                if self.rate:
+                    delay = started + received / self.rate - now
+                    if delay > 0:
+                        time.sleep(delay)
+        except OSError as e:
+            self.error = e
+
+    def close(self):
+        if self.sock:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def summary(self, start, end):
+        """(fps, mean frame KiB, max gap in ms) for frames received in [start, end)."""
+        frames = [(t, n) for t, n in self.frames if start <= t < end]
+        if not frames:
+            return 0.0, 0.0, (end - start) * 1000
+        times = [start] + [t for t, _ in frames] + [end]
+        gap = max(b - a for a, b in zip(times, times[1:]))
+        return len(frames) / (end - start), statistics.mean(n for _, n in frames) / 1024, gap * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--viewers', type=int, default=10, help='Viewers reading as fast as they can')
+    parser.add_argument('--slow-viewers', type=int, default=0, help='Viewers reading at --slow-rate')
+    parser.add_argument('--slow-rate', type=float, default=150, help='Slow viewer read rate in KiB/s')
+    parser.add_argument('--fps', type=float, default=30, help='Synthetic camera frame rate')
+    parser.add_argument('--frame-kb', type=float, default=40, help='Synthetic frame size in KiB')
+    parser.add_argument('--tiers', type=int, default=1, help='ROVER_STREAM_TIERS for the server')
+    parser.add_argument('--duration', type=float, default=10, help='Measurement time in seconds')
+    parser.add_argument('--warmup', type=float, default=2, help='Seconds before measuring')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    frame_bytes = int(args.frame_kb * 1024)
+    if args.child:
+        run_child(args.fps, frame_bytes)
+        return
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    # All viewers connect from one address, which would otherwise hit the stream caps
+    env = dict(os.environ, PYTHONPATH=here, ROVER_STREAM_TIERS=str(args.tiers), ROVER_ADMISSION='0')
+    env.pop('GEMINI_API_KEY', None)
+    child = subprocess.Popen(
+        [sys.executable, os.path.join(here, 'bench_stream.py'), '--child',
+         '--fps', str(args.fps), '--frame-kb', str(args.frame_kb)],
+        env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        port = json.loads(child.stdout.readline())['port']
+        idle_cpu, idle_rss, idle_threads = read_proc(child.pid)
+
+        viewers = [Viewer(port, 0) for _ in range(args.viewers)]
+        viewers += [Viewer(port, args.slow_rate * 1024) for _ in range(args.slow_viewers)]
+        for viewer in viewers:
+            viewer.start()
+        time.sleep(args.warmup)
+
+        start = time.monotonic()
+        cpu_start = read_proc(child.pid)[0]
+        rss_max = threads_max = 0
+        while time.monotonic() < start + args.duration:
+            time.sleep(0.25)
+            _, rss, threads = read_proc(child.pid)
+            rss_max = max(rss_max, rss)
+            threads_max = max(threads_max, threads)
+        end = time.monotonic()
+        cpu = read_proc(child.pid)[0] - cpu_start
+
+        for viewer in viewers:
+            viewer.close()
+    finally:
+        child.stdin.close()
+        child.wait()
+
+    print(f"{len(viewers)} viewers ({args.viewers} fast, {args.slow_viewers} at {args.slow_rate:g} KiB/s), "
+          f"camera {args.fps:g} fps x {args.frame_kb:g} KiB, {args.tiers} tier(s), {args.duration:g}s")
+    print(f"{'viewer':<8} {'read rate':>10} {'fps':>7} {'KiB/frame':>10} {'max gap ms':>11}")
+    groups = {}
+    for i, viewer in enumerate(viewers):
+        fps, size, gap = viewer.summary(start, end)
+        groups.setdefault(viewer.rate, []).append(fps)
+        rate = f"{viewer.rate / 1024:g} KiB/s" if viewer.rate else 'max'
+        error = f"  ({viewer.error})" if viewer.error else ''
+        print(f"{i:<8} {rate:>10} {fps:>7.1f} {size:>10.1f} {gap:>11.0f}{error}")
+    for rate, values in groups.items():
+        label = f"{rate / 1024:g} KiB/s" if rate else 'fast'
+        print(f"{label} viewers: median {statistics.median(values):.1f} fps, min {min(values):.1f} fps")
+    print(f"server: CPU {cpu / (end - start) * 100:.0f}% of one core, RSS {rss_max:.1f} MiB "
+          f"(idle {idle_rss:.1f}), threads {threads_max} (idle {idle_threads})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,215 @@
+"""
+On-demand profiling and memory inspection for a running server.
+
+Enabled by setting ROVER_DEBUG_TOKEN; requests must then carry the token in
+an X-Debug-Token header. It isn't accepted as a query parameter, since
+request lines are logged. Without the variable the /debug/ routes don't
+exist.
+
+Nothing runs until it is asked for. The profiler only samples while a
+/debug/profile request is being answered, and tracemalloc is only started
+by /debug/memory/start (and stopped again by /debug/memory/stop), so the
+server pays nothing for these tools the rest of the time.
+
+    curl -H "X-Debug-Token: $TOKEN" 'http://rover:8080/debug/profile?seconds=10' > stacks.txt
+    flamegraph.pl stacks.txt > flame.svg
+
+    curl -X POST -H "X-Debug-Token: $TOKEN" http://rover:8080/debug/memory/start
+    curl -H "X-Debug-Token: $TOKEN" http://rover:8080/debug/memory   # repeat to see growth
+"""
+
+import gc
+import hmac
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+MAX_PROFILE_SECONDS = 60.0
+MIN_INTERVAL = 0.001
+
+
+def format_stack(frame, thread_name):
+    """Return a collapsed stack, root first: thread;func (file:line);..."""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})')
+        frame = frame.f_back
+    stack.append(thread_name)
+    return ';'.join(reversed(stack))
+
+
+def sample_stacks(seconds, interval=0.005, thread_filter=None):
+    """
+    Sample the stacks of all other threads for a while.
+
+    Args:
+        seconds (float): How long to sample for.
+        interval (float): Seconds between samples.
+        thread_filter (str, optional): Only sample threads whose name contains this.
+
+    Returns:
+        tuple: (Counter of collapsed stack -> samples, number of sampling rounds).
+    """
+    me = threading.get_ident()
+    stacks = Counter()
+    rounds = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for ident, frame in sys._current_frames().items():
+            name = names.get(ident, f'thread-{ident}')
+            if ident == me or (thread_filter and thread_filter not in name):
+                continue
+            stacks[format_stack(frame, name)] += 1
+        rounds += 1
+        time.sleep(interval)
+    return stacks, rounds
+
+
+def open_files():
+    """Count this process's open file descriptors by kind, and list the regular files."""
+    kinds = Counter()
+    files = []
+    try:
+        fds = os.listdir('/proc/self/fd')
+    except OSError:
+        return None
+    for fd in fds:
+        try:
+            target = os.readlink(f'/proc/self/fd/{fd}')
+        except OSError:
+            continue
+        if target.startswith('/'):
+            kinds['file'] += 1
+            files.append(target)
+        else:
+            kinds[target.split(':', 1)[0]] += 1
+    return {'total': sum(kinds.values()), 'kinds': dict(kinds), 'files': sorted(files)[:50]}
+
+
+def _statistics(stats, limit):
+    return [{
+        'where': str(stat.traceback),
+        'size_kb': round(stat.size / 1024, 1),
+        'count': stat.count,
+    } for stat in stats[:limit]]
+
+
+def _differences(stats, limit):
+    return [{
+        'where': str(stat.traceback),
+        'size_kb': round(stat.size / 1024, 1),
+        'size_diff_kb': round(stat.size_diff / 1024, 1),
+        'count': stat.count,
+        'count_diff': stat.count_diff,
+    } for stat in stats[:limit]]
+
+
+class MemoryTracker:
+    """
+    tracemalloc snapshots, diffed against the start of tracing and the last report.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._first = None
+        self._last = None
+
+    def _snapshot(self):
+        # Leave out tracemalloc's own bookkeeping
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+
+    def start(self, frames=1):
+        """Start tracing allocations, with this many frames of traceback."""
+        with self._lock:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(frames)
+            self._first = self._last = self._snapshot()
+
+    def stop(self):
+        """Stop tracing and free the trace memory."""
+        with self._lock:
+            tracemalloc.stop()
+            self._first = self._last = None
+
+    def report(self, limit=20, group='lineno'):
+        """
+        Summarize memory use.
+
+        Always includes GC counts, the most common live object types and open
+        file descriptors. While tracing, also the top allocation sites and how
+        they changed since tracing started and since the previous report.
+        """
+        objects = gc.get_objects()
+        types = Counter(type(obj).__qualname__ for obj in objects)
+        result = {
+            'tracing': tracemalloc.is_tracing(),
+            'gc': {'counts': gc.get_count(), 'objects': len(objects), 'garbage': len(gc.garbage)},
+            'types': dict(types.most_common(limit)),
+            'fds': open_files(),
+        }
+        del objects
+
+        with self._lock:
+            if not tracemalloc.is_tracing() or self._first is None:
+                return result
+            snapshot = self._snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+            result.update({
+                'traced_kb': round(current / 1024, 1),
+                'peak_kb': round(peak / 1024, 1),
+                'overhead_kb': round(tracemalloc.get_tracemalloc_memory() / 1024, 1),
+                'top': _statistics(snapshot.statistics(group), limit),
+                'since_start': _differences(snapshot.compare_to(self._first, group), limit),
+                'since_last': _differences(snapshot.compare_to(self._last, group), limit),
+            })
+            self._last = snapshot
+        return result
+
+
+class DebugTools:
+    """
+    Token check plus one profiler run at a time and the memory tracker.
+
+    Args:
+        token (str): Secret that requests must present.
+    """
+
+    def __init__(self, token):
+        self.token = token
+        self.memory = MemoryTracker()
+        self._profiling = threading.Lock()
+
+    @classmethod
+    def from_environment(cls):
+        """Return DebugTools if ROVER_DEBUG_TOKEN is set, else None."""
+        token = os.environ.get('ROVER_DEBUG_TOKEN')
+        return cls(token) if token else None
+
+    def authorized(self, token):
+        return bool(token) and hmac.compare_digest(token.encode(), self.token.encode())
+
+    def profile(self, seconds, interval=0.005, thread_filter=None):
+        """
+        Sample all threads and return collapsed stacks, one "stack count" per line.
+
+        Raises:
+            RuntimeError: If another profile is already running.
+        """
+        seconds = min(max(seconds, 0.0), MAX_PROFILE_SECONDS)
+        interval = max(interval, MIN_INTERVAL)
+        if not self._profiling.acquire(blocking=False):
+            raise RuntimeError('A profile is already running')
+        try:
+            stacks, rounds = sample_stacks(seconds, interval, thread_filter)
+        finally:
+            self._profiling.release()
+        lines = [f'{stack} {count}' for stack, count in stacks.most_common()]
+        return '\n'.join(lines) + '\n', rounds
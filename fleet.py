@@ -0,0 +1,244 @@
+"""
+Several rovers served from one process.
+
+ROVER_FLEET lists the Motor HATs to drive as id=address pairs:
+
+    ROVER_FLEET=front=0x40,rear=0x41
+
+Without it, a single HAT at 0x40 is driven under the id "rover". All HATs
+share the scheduler for I2C bus 1, so their transfers never interleave.
+
+Each rover has its own CommandWorker thread that runs its commands in
+order. Request threads hand commands to the worker instead of driving the
+hardware themselves, so a slow or failing HAT only holds up its own
+commands. Stops skip the worker: they discard its queued commands and go
+straight to the bus at stop priority.
+"""
+
+import os
+import threading
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from startup_profiler import profiler
+from rover import Rover
+from mission import MissionRunner
+from odometry import Odometry
+
+DEFAULT_ID = 'rover'
+DEFAULT_ADDRESS = 0x40
+
+
+def parse_fleet(spec):
+    """
+    Parse a ROVER_FLEET value.
+
+    Args:
+        spec (str): Comma-separated id=address pairs, e.g. "front=0x40,rear=0x41".
+
+    Returns:
+        list: (id, address) tuples in the order given.
+
+    Raises:
+        ValueError: If an entry is malformed or an id or address is repeated.
+    """
+    members = []
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        rover_id, sep, address = item.partition('=')
+        rover_id = rover_id.strip()
+        if not sep or not rover_id.replace('_', '').replace('-', '').isalnum():
+            raise ValueError(f"Invalid fleet entry {item!r}, expected id=address")
+        members.append((rover_id, int(address.strip(), 0)))
+
+    ids = [rover_id for rover_id, _ in members]
+    addresses = [address for _, address in members]
+    if not members or len(set(ids)) != len(ids) or len(set(addresses)) != len(addresses):
+        raise ValueError(f"Invalid fleet {spec!r}: ids and addresses must be unique")
+    return members
+
+
+class CommandTimeout(TimeoutError):
+    """
+    Raised when a command doesn't finish within FleetMember.COMMAND_TIMEOUT.
+
+    Attributes:
+        dropped (bool): True if the command never started and was cancelled,
+            False if it was already running (and will still finish).
+    """
+
+    def __init__(self, message, dropped):
+        super().__init__(message)
+        self.dropped = dropped
+
+
+class CommandWorker:
+    """
+    Runs submitted calls one at a time, in order, on a dedicated thread.
+
+    Args:
+        name (str): Thread name suffix.
+    """
+
+    def __init__(self, name):
+        self.executed = 0
+        self.superseded = 0  # Queued calls discarded by cancel_pending()
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=f'commands-{name}', daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args):
+        """
+        Queue fn(*args).
+
+        Returns:
+            Future: Resolves to the call's result or exception.
+        """
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise RuntimeError('Command worker is closed')
+            self._queue.append((future, fn, args))
+            self._condition.notify()
+        return future
+
+    def cancel_pending(self):
+        """Cancel the calls still waiting in the queue."""
+        with self._condition:
+            while self._queue:
+                self._queue.popleft()[0].cancel()
+                self.superseded += 1
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queue or self._closed)
+                if not self._queue:
+                    return
+                future, fn, args = self._queue.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+            self.executed += 1
+
+    def close(self):
+        """Finish the queued calls and stop the thread."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def status(self):
+        with self._condition:
+            pending = len(self._queue)
+        return {'pending': pending, 'executed': self.executed, 'superseded': self.superseded}
+
+
+class FleetMember:
+    """
+    One rover with its command worker, pose estimate and mission runner.
+
+    Args:
+        rover_id (str): Id used in URLs (/api/<rover_id>/...).
+        rover (Rover): The rover.
+        recorder (FlightRecorder, optional): Records mission commands.
+    """
+
+    # Seconds a request waits for its command to run
+    COMMAND_TIMEOUT = 2.0
+
+    def __init__(self, rover_id, rover, recorder=None):
+        self.id = rover_id
+        self.rover = rover
+        self.worker = CommandWorker(rover_id)
+        self.odometry = Odometry.from_environment()
+        rover.subscribe(self.odometry.on_command)
+        self.odometry.start()
+        self.mission_runner = MissionRunner(rover, recorder)
+
+    def command(self, fn, *args):
+        """
+        Run fn(*args) on the rover's worker and return its result.
+
+        Raises:
+            CommandTimeout: If it didn't finish within COMMAND_TIMEOUT. A
+                command still in the queue is cancelled then, so the rover
+                never starts moving after the caller has given up on it.
+        """
+        future = self.worker.submit(fn, *args)
+        try:
+            return future.result(self.COMMAND_TIMEOUT)
+        except FutureTimeout:
+            if future.cancel():
+                raise CommandTimeout('Rover busy: command dropped', dropped=True) from None
+            raise CommandTimeout('Command timed out', dropped=False) from None
+
+    def stop(self):
+        """
+        Stop the rover from the calling thread.
+
+        Queued commands are cancelled, and one the worker is already running
+        is dropped by Rover.stop() if it hasn't reached the bus yet.
+        """
+        self.worker.cancel_pending()
+        self.rover.stop()
+
+    def status(self):
+        return {
+            'address': hex(self.rover.address),
+            'left': self.rover.left_speed,
+            'right': self.rover.right_speed,
+            'speed': self.rover.speed,
+            'pose': self.odometry.pose(),
+            'mission': self.mission_runner.state,
+            'commands': self.worker.status(),
+            'superseded_writes': self.rover.superseded,
+        }
+
+    def close(self):
+        self.mission_runner.cancel()
+        self.worker.close()
+        self.rover.stop()
+        self.odometry.stop()
+
+
+class Fleet:
+    """
+    The rovers served by this process, keyed by id, in configuration order.
+
+    Args:
+        members (list): FleetMember instances. The first is the default rover,
+            driven by the unprefixed /api/... routes.
+    """
+
+    def __init__(self, members):
+        self.members = {member.id: member for member in members}
+        self.default = members[0]
+
+    @classmethod
+    def from_environment(cls, recorder=None):
+        """Create the rovers listed in ROVER_FLEET (or the single default rover)."""
+        spec = os.environ.get('ROVER_FLEET')
+        config = parse_fleet(spec) if spec else [(DEFAULT_ID, DEFAULT_ADDRESS)]
+        members = []
+        for rover_id, address in config:
+            with profiler.phase(f'rover: init {rover_id}'):
+                members.append(FleetMember(rover_id, Rover(address), recorder))
+        return cls(members)
+
+    def get(self, rover_id):
+        """Return the member with this id, or None."""
+        return self.members.get(rover_id)
+
+    def status(self):
+        return {rover_id: member.status() for rover_id, member in self.members.items()}
+
+    def close(self):
+        for member in self.members.values():
+            member.close()
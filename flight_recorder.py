@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Flight recorder for rover commands.
+
+Keeps the most recent drive commands in a fixed-size ring of compact binary
+records inside a memory-mapped file. Writes are a single struct.pack_into()
+into shared memory, so recording is cheap enough for the control path, the
+file never grows past its initial size, and records written before a crash
+are still on disk because the kernel owns the mapped pages.
+
+Enable recording by setting ROVER_FLIGHT_RECORDER to the recorder file path.
+ROVER_FLIGHT_RECORDER_SIZE sets the number of records kept (default 65536,
+i.e. 2 MiB).
+
+Dump or filter a recording:
+    python flight_recorder.py flight.rec
+    python flight_recorder.py flight.rec --source web --command stop --last 20
+    python flight_recorder.py flight.rec --errors --since 600 --json
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+MAGIC = b'ROVERFR1'
+VERSION = 1
+
+# magic, version, record size, capacity, records written
+HEADER = struct.Struct('<8sIIIQ')
+HEADER_SIZE = 64
+
+# seq, wall time, latency (us), source, command, left speed, right speed, result
+RECORD = struct.Struct('<QdIBBbbB7x')
+
+DEFAULT_CAPACITY = 65536
+
+# Codes stored in the records. Append only: existing codes must not change.
+SOURCES = ('unknown', 'web', 'keyboard', 'script', 'mission')
+COMMANDS = ('unknown', 'stop', 'forward', 'backward', 'left', 'right', 'speed', 'drive', 'tank')
+RESULTS = ('ok', 'error')
+
+
+class FlightRecorder:
+    """
+    Fixed-size ring buffer of command records in a memory-mapped file.
+
+    Args:
+        path (str): Recorder file. Created if missing; reused (and appended
+            to) if it already holds a recording with the same capacity.
+        capacity (int): Number of records kept before the oldest is overwritten.
+    """
+
+    def __init__(self, path, capacity=DEFAULT_CAPACITY):
+        self.path = path
+        self._lock = threading.Lock()
+
+        size = HEADER_SIZE + capacity * RECORD.size
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            existing = os.fstat(fd).st_size
+            if existing != size:
+                os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        magic, version, record_size, old_capacity, count = HEADER.unpack_from(self._map, 0)
+        if (existing != size or magic != MAGIC or version != VERSION
+                or record_size != RECORD.size or old_capacity != capacity):
+            count = 0
+            self._map[:HEADER_SIZE] = bytes(HEADER_SIZE)
+            HEADER.pack_into(self._map, 0, MAGIC, VERSION, RECORD.size, capacity, 0)
+        self.capacity = capacity
+        self._count = count
+
+    @classmethod
+    def from_environment(cls):
+        """Return a recorder configured by ROVER_FLIGHT_RECORDER, or None."""
+        path = os.environ.get('ROVER_FLIGHT_RECORDER')
+        if not path:
+            return None
+        capacity = int(os.environ.get('ROVER_FLIGHT_RECORDER_SIZE', DEFAULT_CAPACITY))
+        return cls(path, capacity)
+
+    def record(self, source, command, left=0, right=0, ok=True, latency=0.0):
+        """
+        Append one record, overwriting the oldest when the ring is full.
+
+        Args:
+            source (str): Where the command came from (see SOURCES).
+            command (str): Command name (see COMMANDS).
+            left (int): Signed left motor speed after the command (-100 to 100).
+            right (int): Signed right motor speed after the command (-100 to 100).
+            ok (bool): Whether the I2C writes succeeded.
+            latency (float): Time taken to execute the command, in seconds.
+        """
+        source_code = SOURCES.index(source) if source in SOURCES else 0
+        command_code = COMMANDS.index(command) if command in COMMANDS else 0
+        latency_us = min(int(latency * 1e6), 0xFFFFFFFF)
+        with self._lock:
+            seq = self._count + 1
+            offset = HEADER_SIZE + (self._count % self.capacity) * RECORD.size
+            RECORD.pack_into(self._map, offset, seq, time.time(), latency_us,
+                             source_code, command_code, int(left), int(right), 0 if ok else 1)
+            self._count = seq
+            struct.pack_into('<Q', self._map, HEADER.size - 8, seq)
+
+    def flush(self):
+        """Force the records to disk (protects against power loss, not just crashes)."""
+        self._map.flush()
+
+    def close(self):
+        self.flush()
+        self._map.close()
+
+
+def read_records(path):
+    """
+    Read all records from a recorder file, oldest first.
+
+    Returns:
+        list: One dict per record.
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    magic, version, record_size, capacity, count = HEADER.unpack_from(data, 0)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path} is not a flight recorder file")
+
+    records = []
+    for i in range(min(count, capacity)):
+        seq, timestamp, latency_us, source, command, left, right, result = \
+            RECORD.unpack_from(data, HEADER_SIZE + i * RECORD.size)
+        if seq == 0:
+            continue
+        records.append({
+            'seq': seq,
+            'time': timestamp,
+            'source': SOURCES[source] if source < len(SOURCES) else str(source),
+            'command': COMMANDS[command] if command < len(COMMANDS) else str(command),
+            'left': left,
+            'right': right,
+            'result': RESULTS[result] if result < len(RESULTS) else str(result),
+            'latency_ms': latency_us / 1000,
+        })
+    records.sort(key=lambda r: r['seq'])
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dump and filter a rover flight recording.')
+    parser.add_argument('path', help='Recorder file (ROVER_FLIGHT_RECORDER)')
+    parser.add_argument('--source', help='Only records from this source')
+    parser.add_argument('--command', help='Only records for this command')
+    parser.add_argument('--errors', action='store_true', help='Only failed commands')
+    parser.add_argument('--since', type=float, help='Only records from the last N seconds')
+    parser.add_argument('--last', type=int, help='Only the last N matching records')
+    parser.add_argument('--json', action='store_true', help='Output JSON lines')
+    args = parser.parse_args()
+
+    records = read_records(args.path)
+    if args.source:
+        records = [r for r in records if r['source'] == args.source]
+    if args.command:
+        records = [r for r in records if r['command'] == args.command]
+    if args.errors:
+        records = [r for r in records if r['result'] != 'ok']
+    if args.since is not None:
+        cutoff = time.time() - args.since
+        records = [r for r in records if r['time'] >= cutoff]
+    if args.last:
+        records = records[-args.last:]
+
+    for r in records:
+        if args.json:
+            print(json.dumps(r))
+        else:
+            stamp = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(r['time']))
+            print(f"{r['seq']:>8} {stamp}.{int(r['time'] % 1 * 1000):03d} {r['source']:<8} "
+                  f"{r['command']:<8} L{r['left']:>+4} R{r['right']:>+4} {r['result']:<5} "
+                  f"{r['latency_ms']:.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,389 @@
+"""
+Shared-memory bus that gives local processes the camera's JPEG frames.
+
+The server copies each frame into a ring of slots in a
+multiprocessing.shared_memory block. Other processes on the rover (logging,
+ML) attach to the block and read frames in place, with no HTTP or multipart
+parsing, and no copy unless they want one.
+
+Layout (little-endian):
+
+    header   magic "RVFB", version, slot count, slot size, latest sequence
+    slot i   begin sequence, end sequence, timestamp, length, JPEG data
+
+Frame number n (starting at 1) goes in slot n % slots. The writer stores n
+as the slot's begin sequence before touching the data and as its end
+sequence after, so a reader knows a slot holds frame n only while both equal
+n. A reader checks begin again after using the data (Frame.valid()); with
+the default 8 slots it has about 7 frame periods before a frame is
+overwritten.
+
+Readers are woken by an 8-byte datagram carrying the new sequence number,
+sent over a Unix datagram socket in the abstract namespace. Readers
+subscribe by sending a datagram to the server's socket; a reader that falls
+behind just has notifications dropped, and never slows the camera.
+
+Enable with ROVER_FRAME_BUS=<name> (e.g. rover_frames). ROVER_FRAME_BUS_SLOTS
+(default 8) and ROVER_FRAME_BUS_SLOT_KB (default 256) set the ring size;
+frames larger than a slot are skipped and counted.
+
+Reading frames:
+
+    from frame_bus import FrameBusReader
+
+    with FrameBusReader('rover_frames') as bus:
+        for frame in bus.frames():
+            jpeg = frame.data  # memoryview into shared memory
+            ...
+            if not frame.valid():
+                continue  # Overwritten while in use: discard the result
+
+Or from the command line, to check the bus: python3 frame_bus.py rover_frames
+"""
+
+import os
+import socket
+import struct
+import time
+from multiprocessing import shared_memory
+
+MAGIC = b'RVFB'
+VERSION = 1
+# Magic, version, slot count, slot size, latest sequence
+HEADER = struct.Struct('<4sIIIQ')
+HEADER_SIZE = 64
+# Begin sequence, end sequence, timestamp (unix seconds), length
+SLOT = struct.Struct('<QQdI')
+SLOT_HEADER_SIZE = 32
+SEQUENCE = struct.Struct('<Q')
+
+DEFAULT_SLOTS = 8
+DEFAULT_SLOT_BYTES = 256 * 1024
+
+
+def socket_address(name):
+    """Abstract-namespace address of the server's notification socket."""
+    return f'\0{name}.frames'
+
+
+def attach(name):
+    """
+    Attach to an existing shared memory block without tracking it.
+
+    A process that attaches would otherwise register the block with its
+    resource tracker, which unlinks it when that process exits, taking the
+    bus away from the server and every other reader.
+    """
+    try:
+        return shared_memory.SharedMemory(name, track=False)  # Python 3.13+
+    except TypeError:
+        from multiprocessing import resource_tracker
+
+        shm = shared_memory.SharedMemory(name)
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm
+
+
+class FrameBus:
+    """
+    Writer side: owns the shared memory ring and the notification socket.
+
+    Args:
+        name (str): Shared memory name; readers attach with the same name.
+        slots (int): Frames kept in the ring.
+        slot_bytes (int): Largest frame that fits.
+    """
+
+    def __init__(self, name, slots=DEFAULT_SLOTS, slot_bytes=DEFAULT_SLOT_BYTES):
+        self.name = name
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+        self.sequence = 0
+        self.published = 0
+        self.oversized = 0
+        self.dropped_notifications = 0
+        self._stride = SLOT_HEADER_SIZE + slot_bytes
+        size = HEADER_SIZE + slots * self._stride
+        try:
+            self._shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a server that didn't shut down cleanly
+            stale = shared_memory.SharedMemory(name)
+            stale.close()
+            stale.unlink()
+            self._shm = shared_memory.SharedMemory(name, create=True, size=size)
+        self._buf = self._shm.buf
+        HEADER.pack_into(self._buf, 0, MAGIC, VERSION, slots, slot_bytes, 0)
+
+        self._subscribers = set()
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(socket_address(name))
+        self._sock.setblocking(False)
+
+    @classmethod
+    def from_environment(cls):
+        """Create the bus named by ROVER_FRAME_BUS, or return None if it isn't set."""
+        name = os.environ.get('ROVER_FRAME_BUS')
+        if not name:
+            return None
+        return cls(
+            name,
+            slots=int(os.environ.get('ROVER_FRAME_BUS_SLOTS', DEFAULT_SLOTS)),
+            slot_bytes=int(float(os.environ.get('ROVER_FRAME_BUS_SLOT_KB', DEFAULT_SLOT_BYTES / 1024)) * 1024),
+        )
+
+    def publish(self, frame, timestamp):
+        """
+        Copy a frame into the next slot and wake the readers.
+
+        Args:
+            frame (bytes-like): JPEG data.
+            timestamp (float): Capture time (unix seconds).
+        """
+        length = len(frame)
+        if length > self.slot_bytes:
+            self.oversized += 1
+            return
+        self.sequence += 1
+        sequence = self.sequence
+        buf = self._buf
+        offset = HEADER_SIZE + (sequence % self.slots) * self._stride
+        data = offset + SLOT_HEADER_SIZE
+        # Begin first: readers of the frame being replaced now see it as gone
+        SLOT.pack_into(buf, offset, sequence, 0, timestamp, length)
+        buf[data:data + length] = memoryview(frame).cast('B')
+        SEQUENCE.pack_into(buf, offset + 8, sequence)
+        SEQUENCE.pack_into(buf, HEADER.size - SEQUENCE.size, sequence)
+        self.published += 1
+        self._notify(sequence)
+
+    def _notify(self, sequence):
+        sock = self._sock
+        while True:
+            try:
+                message, address = sock.recvfrom(64)
+            except (BlockingIOError, InterruptedError):
+                break
+            if not address:
+                continue  # Unbound sender; nowhere to notify
+            if message == b'subscribe':
+                self._subscribers.add(address)
+            elif message == b'unsubscribe':
+                self._subscribers.discard(address)
+
+        payload = SEQUENCE.pack(sequence)
+        for address in list(self._subscribers):
+            try:
+                sock.sendto(payload, address)
+            except BlockingIOError:
+                self.dropped_notifications += 1  # Reader's queue is full
+            except OSError:
+                self._subscribers.discard(address)  # Reader has gone
+
+    def status(self):
+        return {
+            'name': self.name,
+            'slots': self.slots,
+            'slot_kb': self.slot_bytes // 1024,
+            'published': self.published,
+            'oversized': self.oversized,
+            'readers': len(self._subscribers),
+            'dropped_notifications': self.dropped_notifications,
+        }
+
+    def close(self):
+        """Remove the bus. Safe to call more than once."""
+        if self._buf is None:
+            return
+        self._sock.close()
+        self._buf = None
+        self._shm.close()
+        try:
+            self._shm.unlink()
+        except FileNotFoundError:
+            pass  # Already removed (e.g. by a server that replaced this one)
+
+
+class Frame:
+    """
+    One frame read from the bus, pointing into shared memory.
+
+    Attributes:
+        sequence (int): Frame number.
+        timestamp (float): Capture time (unix seconds).
+        data (memoryview): The JPEG data, in place.
+    """
+
+    def __init__(self, reader, sequence, timestamp, data):
+        self._reader = reader
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.data = data
+
+    def valid(self):
+        """Return True if the slot still holds this frame (check after using data)."""
+        return self._reader._begin(self.sequence) == self.sequence
+
+    def copy(self):
+        """Return the data as bytes, or None if the frame was overwritten while copying."""
+        data = bytes(self.data)
+        return data if self.valid() else None
+
+    def release(self):
+        """Release the view of shared memory (needed before the reader is closed)."""
+        self.data.release()
+
+
+class FrameBusReader:
+    """
+    Reader side: attaches to a FrameBus and waits for its notifications.
+
+    Args:
+        name (str): The bus name (ROVER_FRAME_BUS of the server).
+
+    Raises:
+        FileNotFoundError: If no server is publishing under that name.
+        ValueError: If the block isn't a frame bus of this version.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self._shm = attach(name)
+        self._buf = self._shm.buf
+        magic, version, self.slots, self.slot_bytes, _ = HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{name!r} is not a version {VERSION} frame bus")
+        self._stride = SLOT_HEADER_SIZE + self.slot_bytes
+        self.missed = 0  # Frames published that this reader never read
+        self.last_sequence = None
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind('')  # Autobind to a unique abstract address
+        self._subscribe()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _subscribe(self, message=b'subscribe'):
+        try:
+            self._sock.sendto(message, socket_address(self.name))
+        except OSError:
+            pass  # Server not running (yet); retried on the next timeout
+
+    def _begin(self, sequence):
+        offset = HEADER_SIZE + (sequence % self.slots) * self._stride
+        return SEQUENCE.unpack_from(self._buf, offset)[0]
+
+    @property
+    def latest(self):
+        """Sequence number of the newest frame (0 if none yet)."""
+        return SEQUENCE.unpack_from(self._buf, HEADER.size - SEQUENCE.size)[0]
+
+    def wait(self, timeout=None):
+        """
+        Wait for a frame newer than the last one read.
+
+        Notifications only wake the reader; the sequence number comes from
+        the header, so frames published while the reader was busy are
+        skipped and the newest is returned.
+
+        Returns:
+            int: Sequence number, or None on timeout.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.latest not in (0, self.last_sequence):
+                # Discard the wake-ups for frames we're skipping
+                self._sock.setblocking(False)
+                try:
+                    while True:
+                        self._sock.recv(SEQUENCE.size)
+                except (BlockingIOError, InterruptedError):
+                    pass
+                return self.latest
+            self._sock.settimeout(None if deadline is None else max(0.0, deadline - time.monotonic()))
+            try:
+                self._sock.recv(SEQUENCE.size)
+            except socket.timeout:
+                self._subscribe()  # In case the server restarted
+                return None
+
+    def read(self, sequence=None):
+        """
+        Return frame number sequence (default: the newest) as a Frame.
+
+        Returns:
+            Frame: Or None if the slot no longer (or doesn't yet) hold that frame.
+        """
+        sequence = sequence or self.latest
+        if not sequence:
+            return None
+        offset = HEADER_SIZE + (sequence % self.slots) * self._stride
+        begin, end, timestamp, length = SLOT.unpack_from(self._buf, offset)
+        if begin != sequence or end != sequence:
+            return None
+        if self.last_sequence is not None and sequence > self.last_sequence + 1:
+            self.missed += sequence - self.last_sequence - 1
+        self.last_sequence = sequence
+        data = offset + SLOT_HEADER_SIZE
+        return Frame(self, sequence, timestamp, self._buf[data:data + length])
+
+    def frames(self, timeout=1.0):
+        """
+        Yield new frames as they are published, newest first when behind.
+
+        Each frame's data is released when the next one is requested; copy
+        it to keep it.
+        """
+        while True:
+            sequence = self.wait(timeout)
+            if sequence is None:
+                continue
+            frame = self.read(sequence)
+            if frame is None:
+                continue
+            try:
+                yield frame
+            finally:
+                frame.release()
+
+    def close(self):
+        if getattr(self, '_sock', None):
+            self._subscribe(b'unsubscribe')
+            self._sock.close()
+            self._sock = None
+        self._buf = None
+        self._shm.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Read frames from a rover frame bus and report the rate.')
+    parser.add_argument('name', help='Bus name (ROVER_FRAME_BUS of the server)')
+    parser.add_argument('--interval', type=float, default=2.0, help='Seconds between reports')
+    args = parser.parse_args()
+
+    with FrameBusReader(args.name) as bus:
+        count = torn = 0
+        latency = 0.0
+        started = time.monotonic()
+        for frame in bus.frames():
+            latency += time.time() - frame.timestamp
+            if frame.data[:2] != b'\xff\xd8' or not frame.valid():
+                torn += 1
+            count += 1
+            elapsed = time.monotonic() - started
+            if elapsed >= args.interval:
+                print(f"{count / elapsed:.1f} fps, {len(frame.data) / 1024:.0f} KiB frames, "
+                      f"{latency / count * 1000:.2f} ms after capture, {bus.missed} missed, {torn} torn")
+                count = torn = 0
+                latency = 0.0
+                started = time.monotonic()
+
+
+if __name__ == '__main__':
+    main()
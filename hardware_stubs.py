@@ -0,0 +1,338 @@
+"""
+Stand-ins for the rover hardware libraries, for benchmarks on a dev machine.
+
+install() registers fake PCA9685, picamera2, libcamera, pygame and gtts modules in
+sys.modules so rover.py and rover_web.py run without a Pi, Motor Driver HAT,
+camera or sound card. It must be called before importing rover or rover_web.
+
+The fakes model just enough behaviour to exercise the real code paths:
+
+- StubSMBus keeps a register file per I2C address, logs every write with a
+  timestamp and can sleep to simulate bus transfer time.
+- Picamera2 produces synthetic JPEG-framed buffers at a fixed frame rate on
+  a background thread, like the real encoder callback.
+- pygame's SDL audio device calls the mixer callback at the real buffer
+  rate and keeps the last buffer, and gTTS produces a short silent WAV
+  without touching the network.
+"""
+
+import sys
+import threading
+import time
+import types
+
+
+class StubSMBus:
+    """
+    Fake I2C bus holding a 256-byte register file per device address.
+
+    Args:
+        byte_delay (float): Seconds to sleep per byte transferred, to simulate
+            bus time (a 100 kHz bus moves a byte in about 90 us).
+    """
+
+    def __init__(self, byte_delay=0.0):
+        self.byte_delay = byte_delay
+        self.registers = {}
+        self.log = []  # (monotonic time, address, register, bytes written)
+        self.lock = threading.Lock()
+
+    def _device(self, address):
+        return self.registers.setdefault(address, bytearray(256))
+
+    def _transfer(self, nbytes):
+        if self.byte_delay:
+            time.sleep(self.byte_delay * nbytes)
+
+    def write_byte_data(self, address, register, value):
+        with self.lock:
+            self._transfer(3)
+            self._device(address)[register] = value & 0xFF
+            self.log.append((time.monotonic(), address, register, bytes([value & 0xFF])))
+
+    def read_byte_data(self, address, register):
+        with self.lock:
+            self._transfer(3)
+            return self._device(address)[register]
+
+    def write_i2c_block_data(self, address, register, data):
+        with self.lock:
+            self._transfer(2 + len(data))
+            self._device(address)[register:register + len(data)] = bytes(data)
+            self.log.append((time.monotonic(), address, register, bytes(data)))
+
+    def channel(self, address, channel):
+        """Return the (on, off) counts currently programmed for a PWM channel."""
+        regs = self._device(address)
+        base = 0x06 + 4 * channel
+        return (regs[base] | regs[base + 1] << 8, regs[base + 2] | regs[base + 3] << 8)
+
+
+# Shared by every StubPCA9685, like the real driver's SMBus(1)
+bus = StubSMBus()
+
+
+class StubPCA9685:
+    """Fake of the Waveshare PCA9685 driver class, backed by StubSMBus."""
+
+    __MODE1 = 0x00
+    __PRESCALE = 0xFE
+    __LED0_ON_L = 0x06
+
+    def __init__(self, address=0x40, debug=False):
+        self.bus = bus
+        self.address = address
+        self.debug = debug
+        self.write(self.__MODE1, 0x00)
+
+    def write(self, reg, value):
+        self.bus.write_byte_data(self.address, reg, value)
+
+    def read(self, reg):
+        return self.bus.read_byte_data(self.address, reg)
+
+    def setPWMFreq(self, freq):
+        prescale = int(25000000.0 / 4096.0 / float(freq) - 0.5)
+        self.write(self.__PRESCALE, prescale)
+
+    def setPWM(self, channel, on, off):
+        self.write(self.__LED0_ON_L + 4 * channel, on & 0xFF)
+        self.write(self.__LED0_ON_L + 4 * channel + 1, on >> 8)
+        self.write(self.__LED0_ON_L + 4 * channel + 2, off & 0xFF)
+        self.write(self.__LED0_ON_L + 4 * channel + 3, off >> 8)
+
+    def setDutycycle(self, channel, pulse):
+        self.setPWM(channel, 0, int(pulse * (4096 / 100)))
+
+    def setLevel(self, channel, value):
+        if value == 1:
+            self.setPWM(channel, 0, 4095)
+        else:
+            self.setPWM(channel, 0, 0)
+
+
+# Frame source settings for StubPicamera2 (see configure_camera)
+camera_config = {'fps': 30.0, 'frame_bytes': 40000, 'open_delay': 0.0}
+
+
+def configure_camera(fps=None, frame_bytes=None, open_delay=None):
+    """Change the synthetic frame rate, frame size or camera open delay."""
+    for key, value in (('fps', fps), ('frame_bytes', frame_bytes), ('open_delay', open_delay)):
+        if value is not None:
+            camera_config[key] = value
+
+
+def synthetic_frame(index, size):
+    """Return a JPEG-framed buffer of the given size that differs per frame."""
+    payload = bytes([index & 0xFF]) * max(0, size - 4)
+    return b'\xff\xd8' + payload + b'\xff\xd9'
+
+
+class StubPicamera2:
+    """
+    Fake Picamera2 that feeds synthetic frames to the encoder outputs.
+
+    Frames are generated at camera_config['fps'] frames per second with
+    camera_config['frame_bytes'] bytes each (a quarter of that for the
+    lores stream).
+    """
+
+    def __init__(self):
+        time.sleep(camera_config['open_delay'])
+        self._running = False
+        self._thread = None
+        self._outputs = []  # (output, frame size)
+
+    def create_video_configuration(self, main=None, lores=None, **kwargs):
+        return {'main': main, 'lores': lores, **kwargs}
+
+    def configure(self, config):
+        self.config = config
+
+    def stream_configuration(self, name):
+        width, height = self.config[name]['size']
+        return {'size': (width, height), 'stride': width + 64 - width % 64}
+
+    def capture_buffer(self, name='main'):
+        """Return a synthetic YUV420 buffer with a bright square that moves every 2 s."""
+        import numpy as np
+
+        time.sleep(1.0 / camera_config['fps'])
+        config = self.stream_configuration(name)
+        (width, height), stride = config['size'], config['stride']
+        buf = np.full(stride * height * 3 // 2, 64, dtype=np.uint8)
+        y = buf[:stride * height].reshape(height, stride)
+        position = int(time.monotonic() / 2) % 4
+        y[:height // 4, position * width // 4:(position + 1) * width // 4] = 220
+        return buf
+
+    def start_encoder(self, encoder, output, name='main', **kwargs):
+        size = camera_config['frame_bytes']
+        self._outputs.append((output, size if name == 'main' else size // 4))
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='stub-camera', daemon=True)
+        self._thread.start()
+
+    def start_recording(self, encoder, output, **kwargs):
+        self.start_encoder(encoder, output)
+        self.start()
+
+    def stop_recording(self):
+        self._running = False
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._outputs = []
+
+    def _run(self):
+        interval = 1.0 / camera_config['fps']
+        streams = [(output, [synthetic_frame(i, size) for i in range(8)]) for output, size in self._outputs]
+        deadline = time.monotonic()
+        index = 0
+        while self._running:
+            for output, frames in streams:
+                output.outputframe(frames[index % len(frames)])
+            index += 1
+            deadline += interval
+            time.sleep(max(0, deadline - time.monotonic()))
+
+
+class StubMJPEGEncoder:
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+class StubFileOutput:
+    def __init__(self, file=None):
+        self._fileoutput = file
+
+    def outputframe(self, frame, keyframe=True, timestamp=None):
+        self._fileoutput.write(frame)
+
+
+class StubTransform:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+
+class StubAudioDevice:
+    """Fake of pygame._sdl2.audio.AudioDevice: calls the callback at the buffer rate."""
+
+    def __init__(self, devicename, iscapture, frequency, audioformat, numchannels, chunksize,
+                 allowed_changes, callback):
+        self.frequency = frequency
+        self.chunksize = chunksize
+        self.callback = callback
+        self.buffer = bytearray(chunksize * numchannels * 2)
+        self._running = threading.Event()
+        self._closed = False
+        threading.Thread(target=self._run, name='stub-audio', daemon=True).start()
+
+    def _run(self):
+        period = self.chunksize / self.frequency
+        next_time = time.monotonic()
+        while not self._closed:
+            self._running.wait()
+            self.callback(self, memoryview(self.buffer))
+            next_time = max(next_time + period, time.monotonic() - period)
+            time.sleep(max(0.0, next_time - time.monotonic()))
+
+    def pause(self, pause_on):
+        if pause_on:
+            self._running.clear()
+        else:
+            self._running.set()
+
+    def close(self):
+        self._closed = True
+        self._running.set()
+
+
+class StubSound:
+    """Fake of pygame.mixer.Sound built from raw 16-bit stereo samples."""
+
+    def __init__(self, buffer):
+        self.length = len(buffer) / 4 / 44100
+
+
+class StubChannel:
+    """Fake of pygame.mixer.Channel: plays one sound with one queued behind it, in real time."""
+
+    def __init__(self, index):
+        self._lock = threading.Lock()
+        self._ends = 0.0
+        self._queued = None
+
+    def _advance(self):
+        now = time.monotonic()
+        if self._queued is not None and now >= self._ends:
+            self._ends = max(self._ends, now) + self._queued.length
+            self._queued = None
+
+    def queue(self, sound):
+        with self._lock:
+            self._advance()
+            if time.monotonic() >= self._ends:
+                self._ends = time.monotonic() + sound.length
+            else:
+                self._queued = sound
+
+    def get_queue(self):
+        with self._lock:
+            self._advance()
+            return self._queued
+
+    def get_busy(self):
+        with self._lock:
+            self._advance()
+            return time.monotonic() < self._ends
+
+
+class StubGTTS:
+    def __init__(self, text, lang='en'):
+        self.text = text
+
+    def write_to_fp(self, fp):
+        import wave
+
+        with wave.open(fp, 'wb') as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(22050)
+            wav.writeframes(bytes(2205 * 2))  # 100 ms of silence
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    sys.modules[name] = module
+    return module
+
+
+def install(i2c_byte_delay=0.0, audio=True):
+    """
+    Register the stub hardware modules in sys.modules.
+
+    Args:
+        i2c_byte_delay (float): Simulated I2C transfer time per byte, in seconds.
+        audio (bool): Also stub pygame and gtts. When False, audio
+            initialization uses the real libraries if they are installed.
+    """
+    bus.byte_delay = i2c_byte_delay
+
+    _module('PCA9685', PCA9685=StubPCA9685)
+    _module('libcamera', Transform=StubTransform)
+    picamera2 = _module('picamera2', Picamera2=StubPicamera2)
+    picamera2.encoders = _module('picamera2.encoders', MJPEGEncoder=StubMJPEGEncoder)
+    picamera2.outputs = _module('picamera2.outputs', FileOutput=StubFileOutput)
+
+    if audio:
+        pygame = _module('pygame')
+        pygame._sdl2 = _module('pygame._sdl2')
+        pygame._sdl2.sdl2 = _module('pygame._sdl2.sdl2', INIT_AUDIO=0x10, init_subsystem=lambda flags: None)
+        pygame._sdl2.audio = _module('pygame._sdl2.audio', AUDIO_S16=0x8010, AudioDevice=StubAudioDevice,
+                                     get_audio_device_names=lambda iscapture: ['Stub Headphones'])
+        pygame.mixer = _module('pygame.mixer', init=lambda **kwargs: None, quit=lambda: None,
+                               Channel=StubChannel, Sound=StubSound)
+        _module('gtts', gTTS=StubGTTS)
@@ -0,0 +1,136 @@
+"""
+Serialized, prioritized access to shared I2C buses.
+
+Every device on a bus (e.g. several Motor HATs at different addresses)
+shares one BusScheduler, and each multi-register update runs as one
+transaction so updates from different threads or devices never interleave.
+
+Transactions run on the caller's thread; the scheduler is a lock that,
+when released, is handed to the waiting transaction with the best
+priority (then the longest waiting). A stop therefore waits for at most
+the transaction in progress (plus any other stops ahead of it) however many
+normal writes are queued. Rover additionally drops its own normal writes
+that were queued before a stop (see Rover.stop), so a stop is never undone
+by a stale command.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Lower runs first
+PRIORITY_STOP = 0
+PRIORITY_NORMAL = 10
+
+PRIORITY_NAMES = {PRIORITY_STOP: 'stop', PRIORITY_NORMAL: 'normal'}
+
+
+class WaitStats:
+    """Queue wait times for one priority level."""
+
+    def __init__(self, window=1000):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)  # For percentiles
+
+    def add(self, wait):
+        self.count += 1
+        self.total += wait
+        self.max = max(self.max, wait)
+        self.recent.append(wait)
+
+    def status(self):
+        recent = sorted(self.recent)
+
+        def percentile(p):
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))] * 1000, 3) if recent else 0.0
+
+        return {
+            'count': self.count,
+            'avg_ms': round(self.total / max(self.count, 1) * 1000, 3),
+            'p50_ms': percentile(0.5),
+            'p99_ms': percentile(0.99),
+            'max_ms': round(self.max * 1000, 3),
+        }
+
+
+class BusScheduler:
+    """
+    Runs transactions on one I2C bus one at a time, best priority first.
+
+    Args:
+        number (int): Bus number, e.g. 1 for /dev/i2c-1.
+    """
+
+    def __init__(self, number=1):
+        self.number = number
+        self.hold_max = 0.0  # Longest transaction, which bounds a stop's wait
+        self._mutex = threading.Lock()
+        self._busy = False
+        self._waiters = []  # Heap of (priority, arrival, event)
+        self._arrival = itertools.count()
+        self._stats = {}
+
+    def _acquire(self, priority):
+        with self._mutex:
+            if not self._busy:
+                self._busy = True
+                return
+            granted = threading.Event()
+            heapq.heappush(self._waiters, (priority, next(self._arrival), granted))
+        granted.wait()
+
+    def _release(self):
+        with self._mutex:
+            if self._waiters:
+                # Hand the bus straight to the next transaction; it stays busy
+                heapq.heappop(self._waiters)[2].set()
+            else:
+                self._busy = False
+
+    @contextmanager
+    def transaction(self, priority=PRIORITY_NORMAL):
+        """
+        Hold the bus for the duration of the with block.
+
+        Args:
+            priority (int): PRIORITY_STOP or PRIORITY_NORMAL.
+        """
+        requested = time.monotonic()
+        self._acquire(priority)
+        started = time.monotonic()
+        try:
+            stats = self._stats.get(priority)
+            if stats is None:
+                stats = self._stats[priority] = WaitStats()
+            stats.add(started - requested)
+            yield
+        finally:
+            self.hold_max = max(self.hold_max, time.monotonic() - started)
+            self._release()
+
+    def status(self):
+        with self._mutex:
+            queued = len(self._waiters)
+        return {
+            'bus': self.number,
+            'queued': queued,
+            'hold_max_ms': round(self.hold_max * 1000, 3),
+            'wait': {PRIORITY_NAMES.get(p, str(p)): stats.status() for p, stats in sorted(self._stats.items())},
+        }
+
+
+_buses = {}
+_buses_lock = threading.Lock()
+
+
+def get_bus(number=1):
+    """Return the process-wide scheduler for an I2C bus number."""
+    with _buses_lock:
+        if number not in _buses:
+            _buses[number] = BusScheduler(number)
+        return _buses[number]
@@ -0,0 +1,187 @@
+"""
+Timed mission execution for the rover.
+
+A mission is a list of steps, each a rover command held for a duration:
+
+    [
+        {"command": "forward", "speed": 50, "duration": 1.0},
+        {"command": "drive", "throttle": 60, "turn": 20, "duration": 2.0},
+        {"command": "tank", "left": 40, "right": -40, "duration": 0.5},
+        {"command": "stop", "duration": 0.2}
+    ]
+
+Step deadlines are computed up front from a single time.monotonic() start,
+so timing errors don't accumulate from step to step the way chained
+time.sleep() calls do. Each command is issued early by the recent average
+I2C write time, so the write completes on its deadline. The rover is
+stopped when the mission ends or is cancelled.
+"""
+
+import math
+import threading
+import time
+
+COMMANDS = ('forward', 'backward', 'left', 'right', 'stop', 'drive', 'tank')
+MAX_STEPS = 1000
+
+
+class MissionError(ValueError):
+    """Raised for an invalid mission definition, or when one is already running."""
+
+
+def parse_steps(steps):
+    """
+    Validate a mission definition.
+
+    Args:
+        steps (list): Step dicts as described in the module docstring.
+
+    Returns:
+        list: Normalized step dicts.
+
+    Raises:
+        MissionError: If the mission is malformed.
+    """
+    if not isinstance(steps, list) or not steps:
+        raise MissionError('Mission must be a non-empty list of steps')
+    if len(steps) > MAX_STEPS:
+        raise MissionError(f'Mission has more than {MAX_STEPS} steps')
+
+    parsed = []
+    for i, step in enumerate(steps):
+        if not isinstance(step, dict):
+            raise MissionError(f'Step {i}: must be an object')
+        command = step.get('command')
+        if command not in COMMANDS:
+            raise MissionError(f'Step {i}: invalid command {command!r}')
+        try:
+            duration = float(step.get('duration', 0))
+            if command == 'drive':
+                args = (float(step.get('throttle', 0)), float(step.get('turn', 0)))
+            elif command == 'tank':
+                args = (float(step.get('left', 0)), float(step.get('right', 0)))
+            elif command == 'stop':
+                args = ()
+            else:
+                args = (float(step['speed']),) if step.get('speed') is not None else ()
+            if not all(math.isfinite(value) for value in (duration, *args)):
+                raise ValueError('not finite')
+            if command in ('forward', 'backward', 'left', 'right'):
+                args = tuple(int(value) for value in args)
+        except (TypeError, ValueError, OverflowError):
+            raise MissionError(f'Step {i}: invalid number')
+        if not 0 <= duration <= 3600:
+            raise MissionError(f'Step {i}: duration must be between 0 and 3600 seconds')
+        parsed.append({'command': command, 'args': args, 'duration': duration})
+    return parsed
+
+
+class MissionRunner:
+    """
+    Runs missions against a Rover, one at a time.
+
+    Args:
+        rover (Rover): The rover to drive.
+        recorder (FlightRecorder, optional): Records each step's command.
+    """
+
+    def __init__(self, rover, recorder=None):
+        self.rover = rover
+        self.recorder = recorder
+        self.state = 'idle'  # idle, running, completed, cancelled, failed
+        self.report = []
+        self.error = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._write_estimate = 0.0  # Average seconds a command takes to write
+
+    def start(self, steps):
+        """
+        Run a mission in a background thread.
+
+        Raises:
+            MissionError: If the steps are invalid or a mission is already running.
+        """
+        parsed = parse_steps(steps)
+        with self._lock:
+            if self.state == 'running':
+                raise MissionError('A mission is already running')
+            self._begin()
+            self._thread = threading.Thread(target=self._run, args=(parsed,), name='mission', daemon=True)
+            self._thread.start()
+
+    def run(self, steps):
+        """
+        Run a mission in the calling thread.
+
+        Returns:
+            list: The per-step timing report.
+        """
+        parsed = parse_steps(steps)
+        with self._lock:
+            if self.state == 'running':
+                raise MissionError('A mission is already running')
+            self._begin()
+        self._run(parsed)
+        return self.report
+
+    def _begin(self):
+        self.state = 'running'
+        self.report = []
+        self.error = None
+        self._cancel.clear()
+
+    def cancel(self):
+        """Stop the running mission (if any) as soon as possible."""
+        self._cancel.set()
+        thread = self._thread
+        if thread and thread is not threading.current_thread():
+            thread.join()
+
+    @property
+    def running(self):
+        return self.state == 'running'
+
+    def status(self):
+        """Return the mission state and per-step timing report."""
+        return {'state': self.state, 'error': self.error, 'steps': list(self.report)}
+
+    def _execute(self, step):
+        command = step['command']
+        getattr(self.rover, command)(*step['args'])
+        if self.recorder:
+            self.recorder.record('mission', command, self.rover.left_speed, self.rover.right_speed)
+
+    def _run(self, steps):
+        start = time.monotonic()
+        deadline = start
+        try:
+            for index, step in enumerate(steps):
+                # Issue early by the expected write time so the write lands on the deadline
+                if self._cancel.wait(max(0.0, deadline - self._write_estimate - time.monotonic())):
+                    break
+                issued = time.monotonic()
+                self._execute(step)
+                written = time.monotonic()
+
+                write_time = written - issued
+                self._write_estimate += 0.3 * (write_time - self._write_estimate)
+                self.report.append({
+                    'step': index,
+                    'command': step['command'],
+                    'scheduled': round(deadline - start, 4),
+                    'started': round(issued - start, 4),
+                    'write_time': round(write_time, 6),
+                    'error': round(written - deadline, 6),  # Positive = late
+                })
+                deadline += step['duration']
+            else:
+                self._cancel.wait(max(0.0, deadline - time.monotonic()))
+        except Exception as e:
+            self.error = str(e)
+            self.state = 'failed'
+        finally:
+            self.rover.stop()
+            if self.state == 'running':
+                self.state = 'cancelled' if self._cancel.is_set() else 'completed'
@@ -0,0 +1,185 @@
+"""
+Motion detection on the camera's low-resolution YUV stream.
+
+Reads the luma (Y) plane of Picamera2's lores stream directly as a NumPy
+array, so no JPEG decoding is needed. Each sample is reduced to a grid of
+per-block brightness sums and compared with the previous grid; the motion
+score is the fraction of blocks whose average brightness changed by more
+than a threshold. All work arrays are allocated once, so memory use stays
+constant.
+
+Enable with ROVER_MOTION=1. ROVER_MOTION_RATE sets samples per second
+(default 5) and ROVER_MOTION_SCORE the score that counts as motion
+(default 0.02, i.e. 2% of blocks).
+"""
+
+import threading
+import time
+
+
+class BlockDiff:
+    """
+    Block-wise frame differencing for a fixed frame size.
+
+    Args:
+        width (int): Frame width in pixels.
+        height (int): Frame height in pixels.
+        block (int): Block size in pixels. Edge pixels that don't fill a
+            whole block are ignored.
+        threshold (int): Change in average block brightness (0-255) that
+            counts as a changed block.
+    """
+
+    def __init__(self, width, height, block=16, threshold=12):
+        import numpy as np
+
+        self.block = block
+        self.rows = height // block
+        self.cols = width // block
+        self.threshold = threshold * block * block  # Compare sums, not means
+        self._current = np.zeros((self.rows, self.cols), dtype=np.int32)
+        self._previous = np.zeros_like(self._current)
+        self._diff = np.zeros_like(self._current)
+        self._changed = np.zeros((self.rows, self.cols), dtype=bool)
+        self._primed = False
+
+    def update(self, y):
+        """
+        Compare a luma plane with the previous one.
+
+        Args:
+            y (numpy.ndarray): 2D uint8 array of at least height x width.
+                May be a strided view (e.g. with row padding).
+
+        Returns:
+            float: Fraction of blocks that changed (0.0 for the first frame).
+        """
+        import numpy as np
+
+        b = self.block
+        blocks = y[:self.rows * b, :self.cols * b].reshape(self.rows, b, self.cols, b)
+        blocks.sum(axis=(1, 3), dtype=np.int32, out=self._current)
+
+        score = 0.0
+        if self._primed:
+            np.subtract(self._current, self._previous, out=self._diff)
+            np.abs(self._diff, out=self._diff)
+            np.greater(self._diff, self.threshold, out=self._changed)
+            score = float(np.count_nonzero(self._changed)) / self._changed.size
+        self._primed = True
+        self._current, self._previous = self._previous, self._current
+        return score
+
+
+class MotionDetector:
+    """
+    Samples the lores stream on a background thread and publishes motion events.
+
+    Listeners registered with subscribe() are called (on the detector thread)
+    with an event dict when motion starts and when it ends:
+
+        {'type': 'start' or 'end', 'time': unix time, 'score': float}
+
+    Args:
+        picam2 (Picamera2): Camera configured with a YUV420 lores stream.
+        rate (float): Samples per second.
+        score_threshold (float): Score at or above which the scene is moving.
+        quiet_time (float): Seconds below the threshold before motion ends.
+    """
+
+    def __init__(self, picam2, rate=5.0, score_threshold=0.02, quiet_time=2.0):
+        self.picam2 = picam2
+        self.interval = 1.0 / rate
+        self.score_threshold = score_threshold
+        self.quiet_time = quiet_time
+
+        self.score = 0.0
+        self.motion = False
+        self.events = 0
+        self.last_event = None
+        self.samples = 0
+        self.busy_time = 0.0  # Seconds spent analysing, to check CPU cost
+
+        config = picam2.stream_configuration('lores')
+        self._width, self._height = config['size']
+        self._stride = config['stride']
+        self._diff = BlockDiff(self._width, self._height)
+        self._listeners = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='motion', daemon=True)
+
+    @classmethod
+    def from_environment(cls, picam2):
+        """Return a started detector if ROVER_MOTION is set, else None."""
+        import os
+
+        if not os.environ.get('ROVER_MOTION'):
+            return None
+        detector = cls(
+            picam2,
+            rate=float(os.environ.get('ROVER_MOTION_RATE', 5)),
+            score_threshold=float(os.environ.get('ROVER_MOTION_SCORE', 0.02)),
+        )
+        detector.start()
+        return detector
+
+    def subscribe(self, callback):
+        """Call callback(event) on motion start and end events."""
+        self._listeners.append(callback)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def status(self):
+        """Return the current motion state for the status endpoint."""
+        return {
+            'motion': self.motion,
+            'score': round(self.score, 4),
+            'events': self.events,
+            'last_event': self.last_event,
+            'cpu_fraction': round(self.busy_time / max(self.samples * self.interval, 1e-6), 4),
+        }
+
+    def _publish(self, event_type, now):
+        event = {'type': event_type, 'time': now, 'score': self.score}
+        self.events += 1
+        self.last_event = event
+        for callback in self._listeners:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Motion listener error: {e}")
+
+    def _run(self):
+        last_motion = 0.0
+        next_sample = time.monotonic()
+        while not self._stop.wait(max(0.0, next_sample - time.monotonic())):
+            next_sample += self.interval
+            try:
+                buf = self.picam2.capture_buffer('lores')
+            except Exception as e:
+                print(f"Motion capture error: {e}")
+                continue
+
+            start = time.monotonic()
+            # The Y plane comes first in YUV420, one row per stride
+            y = buf[:self._stride * self._height].reshape(self._height, self._stride)
+            self.score = self._diff.update(y)
+            self.busy_time += time.monotonic() - start
+            self.samples += 1
+
+            now = time.time()
+            if self.score >= self.score_threshold:
+                last_motion = now
+                if not self.motion:
+                    self.motion = True
+                    self._publish('start', now)
+            elif self.motion and now - last_motion >= self.quiet_time:
+                self.motion = False
+                self._publish('end', now)
+            # Don't try to catch up after a slow capture
+            next_sample = max(next_sample, time.monotonic())
@@ -0,0 +1,190 @@
+"""
+Dead-reckoning pose estimate from commanded motor speeds.
+
+The rover has no wheel encoders, so the pose is integrated from what the
+motors were told to do. Calibration tables map a motor speed (0-100) to the
+wheel's ground speed in metres per second; the tables are expanded once
+into a lookup list for every integer speed, so handling a command is a
+couple of list lookups and one arc integration step.
+
+Between commands both motor speeds are constant, so the rover moves along
+an exact circular arc (or straight line) and the pose can be advanced in
+one step however long the interval. A background tick advances the pose
+at a fixed rate so readers see it move between commands.
+
+ROVER_ODOMETRY_CALIBRATION names a JSON calibration file:
+
+    {
+        "track_width": 0.14,
+        "left": [[0, 0.0], [20, 0.0], [50, 0.21], [100, 0.45]],
+        "right": [[0, 0.0], [20, 0.0], [50, 0.20], [100, 0.44]]
+    }
+
+Tables are (speed, m/s) points, linearly interpolated; a single "table"
+entry can be given for both motors. ROVER_ODOMETRY_TICK sets the tick
+interval in seconds (default 0.1).
+"""
+
+import json
+import math
+import os
+import threading
+import time
+
+# Rough figures for the stock rover: the motors stall below about 20%
+DEFAULT_TABLE = [[0, 0.0], [20, 0.0], [100, 0.45]]
+DEFAULT_TRACK_WIDTH = 0.14  # Metres between the wheel centres
+
+
+def expand_table(points):
+    """
+    Expand (speed, m/s) calibration points into a lookup list.
+
+    Args:
+        points (list): (speed, velocity) pairs for speeds 0-100, in any order.
+
+    Returns:
+        list: 201 signed velocities, indexed by speed + 100.
+    """
+    points = sorted((float(s), float(v)) for s, v in points)
+    if not points:
+        raise ValueError('Calibration table is empty')
+
+    def interpolate(speed):
+        if speed <= points[0][0]:
+            return points[0][1]
+        for (s0, v0), (s1, v1) in zip(points, points[1:]):
+            if speed <= s1:
+                return v0 + (v1 - v0) * (speed - s0) / (s1 - s0) if s1 > s0 else v1
+        return points[-1][1]
+
+    forward = [interpolate(speed) for speed in range(101)]
+    return [-v for v in reversed(forward[1:])] + forward
+
+
+class Odometry:
+    """
+    Integrates commanded motor speeds into an estimated pose.
+
+    The pose starts at x = y = 0 facing along +x; heading is counter-clockwise.
+
+    Args:
+        left_table (list): Left motor (speed, m/s) calibration points.
+        right_table (list): Right motor (speed, m/s) calibration points.
+        track_width (float): Distance between the wheels, in metres.
+    """
+
+    def __init__(self, left_table=DEFAULT_TABLE, right_table=DEFAULT_TABLE, track_width=DEFAULT_TRACK_WIDTH):
+        self.track_width = track_width
+        self._left = expand_table(left_table)
+        self._right = expand_table(right_table)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.x = 0.0
+        self.y = 0.0
+        self.theta = 0.0
+        self.distance = 0.0  # Total path length, in metres
+        self.commands = 0
+        self._v = 0.0  # Current linear velocity, m/s
+        self._w = 0.0  # Current angular velocity, rad/s
+        self._updated = time.monotonic()
+
+    @classmethod
+    def from_environment(cls):
+        """Return an estimator calibrated from ROVER_ODOMETRY_CALIBRATION (or the defaults)."""
+        path = os.environ.get('ROVER_ODOMETRY_CALIBRATION')
+        if not path:
+            return cls()
+        with open(path) as f:
+            calibration = json.load(f)
+        table = calibration.get('table', DEFAULT_TABLE)
+        return cls(
+            left_table=calibration.get('left', table),
+            right_table=calibration.get('right', table),
+            track_width=float(calibration.get('track_width', DEFAULT_TRACK_WIDTH)),
+        )
+
+    def _advance(self, now):
+        """Move the pose along the current arc up to now. Call with the lock held."""
+        dt = now - self._updated
+        self._updated = now
+        if dt <= 0 or (not self._v and not self._w):
+            return
+        v, w, theta = self._v, self._w, self.theta
+        if abs(w) < 1e-9:
+            self.x += v * dt * math.cos(theta)
+            self.y += v * dt * math.sin(theta)
+        else:
+            radius = v / w
+            self.theta = math.remainder(theta + w * dt, math.tau)
+            self.x += radius * (math.sin(theta + w * dt) - math.sin(theta))
+            self.y -= radius * (math.cos(theta + w * dt) - math.cos(theta))
+        self.distance += abs(v) * dt
+
+    def on_command(self, left, right):
+        """
+        Rover listener: the motors now run at these signed speeds (-100 to 100).
+
+        Finishes the previous arc at the old speeds, then starts a new one.
+        """
+        vl = self._left[int(round(left)) + 100]
+        vr = self._right[int(round(right)) + 100]
+        with self._lock:
+            self._advance(time.monotonic())
+            self._v = (vl + vr) / 2
+            # Rover.left() (left motor forward, right backward) turns counter-clockwise
+            self._w = (vl - vr) / self.track_width
+            self.commands += 1
+
+    def update(self):
+        """Advance the pose to the current time."""
+        with self._lock:
+            self._advance(time.monotonic())
+
+    def reset(self, x=0.0, y=0.0, heading=0.0):
+        """
+        Set the pose, e.g. after placing the rover at a known spot.
+
+        Args:
+            x (float): X position in metres.
+            y (float): Y position in metres.
+            heading (float): Heading in degrees, counter-clockwise from +x.
+        """
+        with self._lock:
+            self._advance(time.monotonic())
+            self.x, self.y = float(x), float(y)
+            self.theta = math.remainder(math.radians(heading), math.tau)
+            self.distance = 0.0
+
+    def pose(self):
+        """Return the current pose estimate."""
+        with self._lock:
+            self._advance(time.monotonic())
+            return {
+                'x': round(self.x, 4),
+                'y': round(self.y, 4),
+                'heading': round(math.degrees(self.theta), 2),
+                'distance': round(self.distance, 4),
+                'velocity': round(self._v, 4),
+                'angular_velocity': round(math.degrees(self._w), 2),
+                'commands': self.commands,
+            }
+
+    def start(self, interval=None):
+        """Advance the pose every interval seconds on a background thread."""
+        if interval is None:
+            interval = float(os.environ.get('ROVER_ODOMETRY_TICK', 0.1))
+
+        def _tick():
+            while not self._stop.wait(interval):
+                self.update()
+
+        self._thread = threading.Thread(target=_tick, name='odometry', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
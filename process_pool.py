@@ -0,0 +1,243 @@
+"""
+Worker processes for CPU-heavy NumPy work.
+
+NumPy and audio work run under the GIL in the server process, where they
+compete with the request threads that drive the motors. ProcessPool runs
+such work in separate worker processes instead, on the Pi's other cores.
+The workers are started with the spawn method (forking a process that
+already runs threads can deadlock) and run at a lower priority than the
+server, so they never take CPU time from the control path.
+
+At most max_pending tasks are in flight; submitting more raises PoolBusy
+instead of queueing without limit. Each task has a name, and the pool keeps
+per-name counts and times: queue wait (submit to start in a worker) and run
+time.
+
+Task functions and their arguments must be picklable, so they have to be
+module-level functions (or methods of picklable objects) in modules that are
+cheap to import, since each worker imports them.
+
+Only work that costs clearly more than the round trip belongs here. The
+pool is used for decoding local TTS output (3-4 ms of NumPy for a 3 s
+phrase). Motion detection stays in the server process: BlockDiff.update()
+takes about 150 us per 320x240 sample, while sending the luma plane to a
+worker and back takes about 600 us, most of it pickling in the server, and
+at 5 samples/s it uses under 0.1% of a core either way. Vision sends the
+encoder's JPEG to Gemini as is, with no frame processing to move, and
+gTTS's MP3 is decoded by ffmpeg, already a separate process.
+
+ROVER_WORKERS sets the number of workers (default: one less than the number
+of cores, at most 2; 0 runs all work in the server process).
+ROVER_WORKER_QUEUE sets max_pending (default 8).
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+WORKER_NICE = 5
+
+
+class PoolBusy(RuntimeError):
+    """Raised when a pool already has max_pending tasks in flight."""
+
+
+def _init_worker(nice):
+    os.nice(nice)
+    import numpy  # noqa: F401  # Imported once per worker, not per task
+
+
+def _call(fn, args):
+    """Run a task in a worker and return its result with its start and end times."""
+    started = time.monotonic()
+    result = fn(*args)
+    return result, started, time.monotonic()
+
+
+def _noop():
+    return None
+
+
+class TaskStats:
+    """Counts and times for the tasks of one name."""
+
+    def __init__(self):
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_run = 0.0
+        self.max_run = 0.0
+
+    def status(self):
+        done = max(self.completed, 1)
+        return {
+            'completed': self.completed,
+            'failed': self.failed,
+            'rejected': self.rejected,
+            'wait_avg_ms': round(self.total_wait / done * 1000, 2),
+            'wait_max_ms': round(self.max_wait * 1000, 2),
+            'run_avg_ms': round(self.total_run / done * 1000, 2),
+            'run_max_ms': round(self.max_run * 1000, 2),
+        }
+
+
+class ProcessPool:
+    """
+    A bounded pool of worker processes with per-task timing.
+
+    Args:
+        workers (int): Worker processes.
+        max_pending (int): Tasks that may be submitted but not yet finished.
+    """
+
+    def __init__(self, workers=1, max_pending=8):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.restarts = 0
+        self.stats = {}
+        self._lock = threading.Lock()
+        # Created on first use: even an idle executor starts multiprocessing's
+        # resource tracker process, which would slow down server startup
+        self._executor = None
+        self._closed = False
+
+    @classmethod
+    def from_environment(cls):
+        """Create the pool configured by ROVER_WORKERS, or return None if it is 0."""
+        default = max(1, min(2, (os.cpu_count() or 1) - 1))
+        workers = int(os.environ.get('ROVER_WORKERS', default))
+        if workers <= 0:
+            return None
+        return cls(workers, int(os.environ.get('ROVER_WORKER_QUEUE', 8)))
+
+    def _get_executor(self):
+        """Return the executor, creating it if needed. Call with the lock held."""
+        if self._closed:
+            raise RuntimeError('Process pool is closed')
+        if self._executor is None:
+            self._executor = self._new_executor()
+        return self._executor
+
+    def _new_executor(self):
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(WORKER_NICE,),
+        )
+
+    def _stats(self, name):
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = TaskStats()
+        return stats
+
+    def warm(self):
+        """Start every worker now, in the background, rather than on the first task."""
+        with self._lock:
+            if self._closed:
+                return
+            executor = self._get_executor()
+        for _ in range(self.workers):
+            executor.submit(_noop)
+
+    def submit(self, name, fn, *args):
+        """
+        Run fn(*args) in a worker.
+
+        Args:
+            name (str): Task name for the statistics.
+
+        Returns:
+            Future: Resolves to fn's result or exception.
+
+        Raises:
+            PoolBusy: If max_pending tasks are already in flight.
+            RuntimeError: If the pool has been closed.
+        """
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self._stats(name).rejected += 1
+                raise PoolBusy(f'{self.pending} tasks already in flight')
+            executor = self._get_executor()
+            self.pending += 1
+
+        submitted = time.monotonic()
+        future = Future()
+
+        def _done(inner):
+            with self._lock:
+                self.pending -= 1
+                stats = self._stats(name)
+                try:
+                    result, started, finished = inner.result()
+                except BaseException as e:
+                    stats.failed += 1
+                    if isinstance(e, BrokenProcessPool) and self._executor is executor:
+                        # A worker died (e.g. killed for memory); start a fresh pool
+                        self._executor = self._new_executor()
+                        self.restarts += 1
+                        executor.shutdown(wait=False)
+                    error = e
+                else:
+                    error = None
+                    stats.completed += 1
+                    wait, run = started - submitted, finished - started
+                    stats.total_wait += wait
+                    stats.max_wait = max(stats.max_wait, wait)
+                    stats.total_run += run
+                    stats.max_run = max(stats.max_run, run)
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+        try:
+            inner = executor.submit(_call, fn, args)
+        except BaseException as e:
+            inner = Future()
+            inner.set_exception(e)
+        inner.add_done_callback(_done)
+        return future
+
+    def run(self, name, fn, *args, timeout=None):
+        """Like submit(), but wait for and return the result."""
+        return self.submit(name, fn, *args).result(timeout)
+
+    def status(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'pending': self.pending,
+                'max_pending': self.max_pending,
+                'restarts': self.restarts,
+                'tasks': {name: stats.status() for name, stats in self.stats.items()},
+            }
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def offload(pool, name, fn, *args):
+    """
+    Run fn(*args) in the pool and return its result.
+
+    Runs it in this process instead if there is no pool or the pool is busy,
+    so callers get their result either way.
+    """
+    if pool is not None:
+        try:
+            return pool.run(name, fn, *args)
+        except PoolBusy:
+            pass
+    return fn(*args)
@@ -0,0 +1,244 @@
+"""
+Rate limiting primitives and per-client admission control for the web server.
+
+AdmissionControl keeps a token bucket per client and route class, so one
+client flooding the API only uses up its own allowance, and caps how many
+connections and long-lived streams each client (and, for video, everyone
+together) may hold open. Clients are identified by IP address.
+
+ROVER_RATE_LIMITS overrides the per-class limits as class=rate/burst pairs,
+in requests per second, e.g. "control=50/25,vision=0.2/2,api=20/40".
+ROVER_MAX_CONNECTIONS_PER_CLIENT (default 16), ROVER_MAX_STREAMS_PER_CLIENT
+(default 4) and ROVER_MAX_VIDEO_VIEWERS (default 20) set the caps.
+ROVER_ADMISSION=0 turns admission control off (for benchmarks).
+"""
+
+import math
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+# Route class -> (requests per second, burst)
+DEFAULT_LIMITS = {
+    'control': (50.0, 25),  # Drive commands: a joystick sends 10-30 per second
+    'vision': (0.2, 2),  # Gemini requests are slow and cost money
+    'api': (20.0, 40),  # Everything else
+}
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Tokens are added continuously at rate per second up to capacity; each
+    allowed action takes one (or more) tokens.
+
+    Args:
+        rate (float): Tokens added per second.
+        capacity (float): Maximum tokens, i.e. the largest allowed burst.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available. Returns True if the action is allowed."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire_or_delay(self, tokens=1):
+        """Take tokens if available. Returns 0.0 if taken, else the seconds until they would be."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate if self.rate > 0 else float('inf')
+
+    def wait_time(self, tokens=1):
+        """Seconds until the given number of tokens will be available."""
+        with self._lock:
+            self._refill(time.monotonic())
+            missing = tokens - self._tokens
+            return max(0.0, missing / self.rate) if self.rate > 0 else float('inf')
+
+
+def parse_limits(spec):
+    """
+    Parse a ROVER_RATE_LIMITS value.
+
+    Args:
+        spec (str): Comma-separated class=rate/burst pairs, e.g. "control=50/25".
+
+    Returns:
+        dict: Route class -> (rate, burst).
+
+    Raises:
+        ValueError: If an entry is malformed, or its rate isn't positive or
+            its burst is below 1 (such a class could never be served).
+    """
+    limits = {}
+    for item in spec.split(','):
+        if not item.strip():
+            continue
+        name, sep, value = item.partition('=')
+        rate, slash, burst = value.partition('/')
+        try:
+            if not sep or not name.strip():
+                raise ValueError
+            rate = float(rate)
+            burst = float(burst) if slash else max(1.0, rate)
+            if not (0 < rate < math.inf and 1 <= burst < math.inf):
+                raise ValueError
+            limits[name.strip()] = (rate, burst)
+        except ValueError:
+            raise ValueError(f"Invalid rate limit {item!r}, expected class=rate/burst with rate > 0 and burst >= 1") from None
+    return limits
+
+
+class AdmissionControl:
+    """
+    Per-client rate limits and connection and stream caps.
+
+    Args:
+        limits (dict): Route class -> (requests per second, burst). Classes
+            not listed are not limited.
+        max_connections (int): Open connections per client.
+        max_streams (int): Open streams (video, events, replay) per client.
+        stream_limits (dict): Stream kind -> open streams allowed in total.
+    """
+
+    MAX_BUCKETS = 4096  # Least recently used buckets are dropped beyond this
+    MAX_REPORTED_CLIENTS = 10
+
+    def __init__(self, limits=None, max_connections=16, max_streams=4, stream_limits=None):
+        self.limits = dict(DEFAULT_LIMITS if limits is None else limits)
+        self.max_connections = max_connections
+        self.max_streams = max_streams
+        self.stream_limits = {'video': 20} if stream_limits is None else stream_limits
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # (client, route class) -> TokenBucket
+        self._connections = Counter()  # client -> open connections
+        self._streams = Counter()  # client -> open streams
+        self._stream_totals = Counter()  # stream kind -> open streams
+        self.admitted = Counter()  # route class -> requests
+        self.limited = Counter()  # route class -> requests rejected
+        self.limited_clients = Counter()  # client -> requests rejected
+        self.rejected_connections = 0
+        self.rejected_streams = Counter()  # stream kind -> streams rejected
+
+    @classmethod
+    def from_environment(cls):
+        """Create the admission control configured by the environment, or None if disabled."""
+        if os.environ.get('ROVER_ADMISSION', '1') == '0':
+            return None
+        limits = dict(DEFAULT_LIMITS)
+        limits.update(parse_limits(os.environ.get('ROVER_RATE_LIMITS', '')))
+        return cls(
+            limits,
+            max_connections=int(os.environ.get('ROVER_MAX_CONNECTIONS_PER_CLIENT', 16)),
+            max_streams=int(os.environ.get('ROVER_MAX_STREAMS_PER_CLIENT', 4)),
+            stream_limits={'video': int(os.environ.get('ROVER_MAX_VIDEO_VIEWERS', 20))},
+        )
+
+    def connect(self, client):
+        """Count a new connection. Returns False if the client already has too many."""
+        with self._lock:
+            if self._connections[client] >= self.max_connections:
+                self.rejected_connections += 1
+                return False
+            self._connections[client] += 1
+            return True
+
+    def disconnect(self, client):
+        with self._lock:
+            self._connections[client] -= 1
+            if self._connections[client] <= 0:
+                del self._connections[client]
+
+    def check(self, client, route):
+        """
+        Take one request from the client's allowance for a route class.
+
+        Returns:
+            float: 0.0 if the request is admitted, else the seconds until it would be.
+        """
+        limit = self.limits.get(route)
+        if limit is None:
+            return 0.0
+        key = (client, route)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = TokenBucket(*limit)
+                if len(self._buckets) > self.MAX_BUCKETS:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+        delay = bucket.acquire_or_delay()
+        with self._lock:
+            if delay:
+                self.limited[route] += 1
+                self.limited_clients[client] += 1
+            else:
+                self.admitted[route] += 1
+        return delay
+
+    def exempt(self, client, route):
+        """Count a request that was over its limit but let through (a stop) as admitted."""
+        with self._lock:
+            self.limited[route] -= 1
+            self.limited_clients[client] -= 1
+            self.admitted[route] += 1
+
+    def open_stream(self, client, kind):
+        """Count a new stream. Returns False if the client or the stream kind is at its cap."""
+        with self._lock:
+            total = self.stream_limits.get(kind)
+            if self._streams[client] >= self.max_streams or (total is not None and self._stream_totals[kind] >= total):
+                self.rejected_streams[kind] += 1
+                return False
+            self._streams[client] += 1
+            self._stream_totals[kind] += 1
+            return True
+
+    def close_stream(self, client, kind):
+        with self._lock:
+            self._streams[client] -= 1
+            if self._streams[client] <= 0:
+                del self._streams[client]
+            self._stream_totals[kind] -= 1
+
+    def status(self):
+        with self._lock:
+            return {
+                'limits': {route: {'rate': rate, 'burst': burst} for route, (rate, burst) in self.limits.items()},
+                'admitted': dict(self.admitted),
+                'limited': dict(self.limited),
+                'top_limited_clients': dict(self.limited_clients.most_common(self.MAX_REPORTED_CLIENTS)),
+                'connections': sum(self._connections.values()),
+                'rejected_connections': self.rejected_connections,
+                'streams': dict(self._stream_totals),
+                'rejected_streams': dict(self.rejected_streams),
+            }
+
+
+MAX_RETRY_AFTER = 3600
+
+
+def retry_after(delay):
+    """Value for a Retry-After header: whole seconds, at least 1 and at most MAX_RETRY_AFTER."""
+    return str(max(1, math.ceil(min(delay, MAX_RETRY_AFTER))))
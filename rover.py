@@ -6,9 +6,15 @@ Rover control script for Raspberry Pi with Motor Driver HAT
 import sys
 sys.path.insert(0, '/home/edith/bcm2835-1.70/Motor_Driver_HAT_Code/Motor_Driver_HAT_Code/Raspberry Pi/python')
 
-from PCA9685 import PCA9685
+from startup_profiler import profiler
+
+with profiler.phase('import PCA9685'):
+    from PCA9685 import PCA9685
+import itertools
 import time
 
+import i2c_bus
+
 class Rover:
     """
     A class to control a two-wheeled rover using the Waveshare Motor Driver HAT.
@@ -19,11 +25,19 @@ class Rover:
 
     Attributes:
         speed (int): Default speed for movements (0-100). Defaults to 50.
+        left_speed (int): Last commanded left motor speed, signed (-100 to 100).
+        right_speed (int): Last commanded right motor speed, signed (-100 to 100).
+
+    Args:
+        address (int): I2C address of the HAT's PCA9685. Defaults to 0x40.
+        bus (BusScheduler, optional): Scheduler for the I2C bus the HAT is on.
+            Defaults to the shared scheduler for bus 1, so several rovers on
+            one bus take turns.
 
     Hardware Setup:
         - Motor A (left):  PWM on channel 0, direction on channels 1 & 2
         - Motor B (right): PWM on channel 5, direction on channels 3 & 4
-        - I2C address: 0x40
+        - I2C address: 0x40 by default
 
     Example:
         >>> from rover import Rover
@@ -34,12 +48,28 @@ class Rover:
         >>> time.sleep(2)
         >>> rover.left(50)         # Pivot turn left
         >>> time.sleep(0.5)
+        >>> rover.drive(60, 20)    # Forward while curving right
+        >>> time.sleep(1)
         >>> rover.stop()           # Always stop when done
     """
 
-    def __init__(self):
-        self.pwm = PCA9685(0x40, debug=False)
-        self.pwm.setPWMFreq(50)
+    # PCA9685 registers
+    MODE1 = 0x00
+    MODE1_AI = 0x20  # Register auto-increment
+    MODE1_RESTART = 0x80
+    LED0_ON_L = 0x06
+
+    # Channel levels, as (on, off) counts
+    LOW = (0, 0)
+    HIGH = (0, 4095)
+
+    def __init__(self, address=0x40, bus=None):
+        self.address = address
+        self.bus = bus or i2c_bus.get_bus()
+        with profiler.phase('rover: PCA9685 init'), self.bus.transaction():
+            self.pwm = PCA9685(address, debug=False)
+        with profiler.phase('rover: set PWM frequency'), self.bus.transaction():
+            self.pwm.setPWMFreq(50)
 
         # Motor A (left) channels
         self.PWMA = 0
@@ -53,26 +83,132 @@ class Rover:
 
         self.speed = 50  # Default speed (0-100)
 
-    def _motor(self, motor, direction, speed):
-        """Control individual motor. motor: 'left' or 'right', direction: 'forward' or 'backward'"""
-        speed = max(0, min(100, speed))
+        # Last commanded motor speeds, negative for backward
+        self.left_speed = 0
+        self.right_speed = 0
 
-        if motor == 'left':
-            self.pwm.setDutycycle(self.PWMA, speed)
-            if direction == 'forward':
-                self.pwm.setLevel(self.AIN1, 0)
-                self.pwm.setLevel(self.AIN2, 1)
-            else:
-                self.pwm.setLevel(self.AIN1, 1)
-                self.pwm.setLevel(self.AIN2, 0)
-        else:  # right
-            self.pwm.setDutycycle(self.PWMB, speed)
-            if direction == 'forward':
-                self.pwm.setLevel(self.BIN1, 1)
-                self.pwm.setLevel(self.BIN2, 0)
+        # (on, off) counts last written to channels 0-5; None when unknown
+        self._channels = [None] * 6
+
+        # Called with (left, right) after every motor update
+        self._listeners = []
+
+        # Bumped by every stop, so writes queued before it can be dropped
+        self._stop_counter = itertools.count(1)
+        self._stops = 0
+        self.superseded = 0  # Writes dropped because a stop came after them
+
+        # With register auto-increment on, the six motor channels (24 contiguous
+        # registers) can be written in one I2C block transfer
+        self._block_writes = hasattr(getattr(self.pwm, 'bus', None), 'write_i2c_block_data')
+        if self._block_writes:
+            with self.bus.transaction():
+                mode = self.pwm.read(self.MODE1)
+                self.pwm.write(self.MODE1, (mode & ~self.MODE1_RESTART) | self.MODE1_AI)
+
+    def subscribe(self, callback):
+        """
+        Call callback(left, right) with the signed motor speeds after every command.
+
+        Listeners run on the commanding thread while it holds the bus, so they
+        must be quick.
+        """
+        self._listeners.append(callback)
+
+    def _notify(self):
+        for callback in self._listeners:
+            try:
+                callback(self.left_speed, self.right_speed)
+            except Exception as e:
+                print(f"Rover listener error: {e}")
+
+    def _duty(self, speed):
+        """(on, off) counts for a speed of 0-100 (100 is capped below the full-off bit)."""
+        return (0, min(4095, int(abs(speed) * (4096 / 100))))
+
+    def _apply(self, left, right, priority=i2c_bus.PRIORITY_NORMAL):
+        """
+        Set both motors in a single update.
+
+        Works out the (on, off) counts for all six channels and writes only the
+        span of channels that changed, as one block transfer when supported.
+        A motor at speed 0 keeps its direction pins as they are. The whole
+        update is one bus transaction, so concurrent commands can't interleave.
+
+        A normal update that was still waiting for the bus when stop() was
+        called is dropped, since running it would undo the stop.
+        """
+        stops = self._stops
+        with self.bus.transaction(priority):
+            if priority != i2c_bus.PRIORITY_STOP and self._stops != stops:
+                self.superseded += 1
+                return
+            self._update(left, right)
+
+    def _update(self, left, right):
+        channels = list(self._channels)
+        channels[self.PWMA] = self._duty(left)
+        channels[self.PWMB] = self._duty(right)
+        if left:
+            # Left forward: AIN1 low, AIN2 high
+            channels[self.AIN1], channels[self.AIN2] = (self.LOW, self.HIGH) if left > 0 else (self.HIGH, self.LOW)
+        if right:
+            # Right forward: BIN1 high, BIN2 low
+            channels[self.BIN1], channels[self.BIN2] = (self.HIGH, self.LOW) if right > 0 else (self.LOW, self.HIGH)
+
+        changed = [i for i in range(6) if channels[i] is not None and channels[i] != self._channels[i]]
+        self.left_speed = left
+        self.right_speed = right
+        if not changed:
+            self._notify()
+            return
+
+        try:
+            if self._block_writes:
+                first, last = changed[0], changed[-1]
+                data = []
+                for i in range(first, last + 1):
+                    if channels[i] is None:
+                        channels[i] = self.LOW  # Unknown channel inside the span
+                    on, off = channels[i]
+                    data += [on & 0xFF, on >> 8, off & 0xFF, off >> 8]
+                self.pwm.bus.write_i2c_block_data(self.pwm.address, self.LED0_ON_L + 4 * first, data)
             else:
-                self.pwm.setLevel(self.BIN1, 0)
-                self.pwm.setLevel(self.BIN2, 1)
+                for i in changed:
+                    self.pwm.setPWM(i, *channels[i])
+        except Exception:
+            # The chip's state is unknown after a failed write: rewrite everything next time
+            self._channels = [None] * 6
+            raise
+        self._channels = channels
+        self._notify()
+
+    def tank(self, left, right):
+        """
+        Set each motor's speed independently.
+
+        Args:
+            left (int): Left motor speed from -100 (full backward) to 100 (full forward).
+            right (int): Right motor speed from -100 to 100.
+        """
+        self._apply(max(-100, min(100, int(left))), max(-100, min(100, int(right))))
+
+    def drive(self, throttle, turn):
+        """
+        Arcade-style drive: a forward speed plus a turn rate.
+
+        The two are mixed into per-motor speeds, scaled down together if either
+        motor would exceed 100 so the turn radius is preserved. drive(0, s)
+        pivots the same way as right(s), and drive(0, -s) like left(s).
+
+        Args:
+            throttle (int): Forward speed from -100 (backward) to 100 (forward).
+            turn (int): Turn rate from -100 to 100.
+        """
+        left = throttle - turn
+        right = throttle + turn
+        scale = max(abs(left), abs(right), 100) / 100
+        self.tank(round(left / scale), round(right / scale))
 
     def forward(self, speed=None):
         """
@@ -81,9 +217,8 @@ class Rover:
         Args:
             speed (int, optional): Motor speed from 0-100. Uses default speed if not specified.
         """
-        speed = speed or self.speed
-        self._motor('left', 'forward', speed)
-        self._motor('right', 'forward', speed)
+        speed = max(0, min(100, speed or self.speed))
+        self._apply(speed, speed)
 
     def backward(self, speed=None):
         """
@@ -92,9 +227,8 @@ class Rover:
         Args:
             speed (int, optional): Motor speed from 0-100. Uses default speed if not specified.
         """
-        speed = speed or self.speed
-        self._motor('left', 'backward', speed)
-        self._motor('right', 'backward', speed)
+        speed = max(0, min(100, speed or self.speed))
+        self._apply(-speed, -speed)
 
     def left(self, speed=None):
         """
@@ -106,9 +240,8 @@ class Rover:
         Args:
             speed (int, optional): Motor speed from 0-100. Uses default speed if not specified.
         """
-        speed = speed or self.speed
-        self._motor('left', 'forward', speed)
-        self._motor('right', 'backward', speed)
+        speed = max(0, min(100, speed or self.speed))
+        self._apply(speed, -speed)
 
     def right(self, speed=None):
         """
@@ -120,9 +253,8 @@ class Rover:
         Args:
             speed (int, optional): Motor speed from 0-100. Uses default speed if not specified.
         """
-        speed = speed or self.speed
-        self._motor('left', 'backward', speed)
-        self._motor('right', 'forward', speed)
+        speed = max(0, min(100, speed or self.speed))
+        self._apply(-speed, speed)
 
     def stop(self):
         """
@@ -130,9 +262,12 @@ class Rover:
 
         Sets PWM duty cycle to 0 for both motors. Should always be called
         when done controlling the rover to prevent runaway movement.
+
+        The stop goes ahead of every queued normal write on the I2C bus, and
+        this rover's commands that are still waiting for the bus are dropped.
         """
-        self.pwm.setDutycycle(self.PWMA, 0)
-        self.pwm.setDutycycle(self.PWMB, 0)
+        self._stops = next(self._stop_counter)
+        self._apply(0, 0, i2c_bus.PRIORITY_STOP)
 
     def set_speed(self, speed):
         """
@@ -146,25 +281,22 @@ class Rover:
 
 
 if __name__ == '__main__':
-    rover = Rover()
+    from mission import MissionRunner
 
+    rover = Rover()
+    profiler.write_report()
+
+    # Deadlines come from one monotonic start time, so timing doesn't drift
+    demo = [
+        {'command': 'forward', 'speed': 50, 'duration': 1},
+        {'command': 'backward', 'speed': 50, 'duration': 1},
+        {'command': 'left', 'speed': 50, 'duration': 0.5},
+        {'command': 'right', 'speed': 50, 'duration': 0.5},
+    ]
     try:
-        print("Forward...")
-        rover.forward(50)
-        time.sleep(1)
-
-        print("Backward...")
-        rover.backward(50)
-        time.sleep(1)
-
-        print("Left...")
-        rover.left(50)
-        time.sleep(0.5)
-
-        print("Right...")
-        rover.right(50)
-        time.sleep(0.5)
-
+        for step in MissionRunner(rover).run(demo):
+            print(f"{step['command'].capitalize()}... (started at {step['started']:.3f}s, "
+                  f"{step['error'] * 1000:+.2f} ms from schedule)")
     finally:
         print("Stopping")
         rover.stop()
@@ -11,68 +11,265 @@ Controls:
     - / _           - Decrease speed
     Space           - Stop
     Q               - Quit
+
+With --hold the rover only drives while a movement key is held down, and
+stops automatically shortly after it is released.
 """
 
+import argparse
+import os
+import selectors
 import sys
+import time
 import tty
 import termios
-from rover import Rover
+from startup_profiler import profiler
 
+with profiler.phase('import rover'):
+    from rover import Rover
+from flight_recorder import FlightRecorder
 
-def getch():
-    """Read a single character from stdin without echo."""
-    fd = sys.stdin.fileno()
-    old_settings = termios.tcgetattr(fd)
-    try:
-        tty.setraw(fd)
-        ch = sys.stdin.read(1)
-        # Handle arrow keys (escape sequences)
-        if ch == '\x1b':
-            ch += sys.stdin.read(2)
-    finally:
-        termios.tcsetattr(fd, termios.TCSADRAIN, old_settings)
-    return ch
+# How long to wait for the rest of an escape sequence before treating
+# a lone ESC byte as a key press in its own right
+ESCAPE_TIMEOUT = 0.05
+
+# Hold-to-drive timing. The terminal only sees key repeats, not key releases:
+# the first repeat arrives after the autorepeat delay (typically 250-600 ms),
+# then repeats follow every ~30-50 ms. A key counts as released when the next
+# repeat is overdue.
+REPEAT_DELAY = 0.6
+RELEASE_TIMEOUT = 0.15
+
+# Key -> action. Movement and stop keys coalesce (only the latest is acted on),
+# speed and quit keys are handled in order.
+KEY_ACTIONS = {
+    'w': 'forward', 'W': 'forward', '\x1b[A': 'forward',
+    's': 'backward', 'S': 'backward', '\x1b[B': 'backward',
+    'a': 'left', 'A': 'left', '\x1b[D': 'left',
+    'd': 'right', 'D': 'right', '\x1b[C': 'right',
+    ' ': 'stop',
+    '+': 'faster', '=': 'faster',
+    '-': 'slower', '_': 'slower',
+    'q': 'quit', 'Q': 'quit', '\x03': 'quit', '\x04': 'quit',  # Ctrl+C / Ctrl+D in raw mode
+}
+
+
+class RawTerminal:
+    """
+    Context manager that keeps the terminal in raw mode for the whole session.
+
+    Output post-processing is left on so print() still moves to the start of
+    the next line. The original settings are restored on exit.
+    """
+
+    def __init__(self, fd):
+        self.fd = fd
+        self._old_settings = None
+
+    def __enter__(self):
+        self._old_settings = termios.tcgetattr(self.fd)
+        tty.setraw(self.fd)
+        attrs = termios.tcgetattr(self.fd)
+        attrs[1] |= termios.OPOST
+        termios.tcsetattr(self.fd, termios.TCSANOW, attrs)
+        return self
+
+    def __exit__(self, *exc):
+        termios.tcsetattr(self.fd, termios.TCSADRAIN, self._old_settings)
+
+
+class KeyReader:
+    """
+    Non-blocking key reader for a raw-mode terminal.
+
+    Waits for input with a selector, then drains everything already queued
+    (e.g. a burst of key repeats that arrived together over SSH) and parses
+    it into keys. Escape sequences split across reads are completed within
+    escape_timeout seconds.
+
+    Args:
+        fd (int): File descriptor to read from.
+        escape_timeout (float): Seconds to wait for the rest of an escape sequence.
+    """
+
+    def __init__(self, fd, escape_timeout=ESCAPE_TIMEOUT):
+        self.fd = fd
+        self.escape_timeout = escape_timeout
+        self._buffer = b''
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(fd, selectors.EVENT_READ)
+
+    def _fill(self, timeout):
+        """Read available input into the buffer. Returns False on timeout."""
+        if not self._selector.select(timeout):
+            return False
+        data = os.read(self.fd, 1024)
+        if not data:
+            raise EOFError
+        self._buffer += data
+        return True
+
+    def _parse(self):
+        """Split one key off the buffer. Returns None if a sequence is incomplete."""
+        buf = self._buffer
+        if buf[0] != 0x1b:
+            # Skip over multi-byte UTF-8 characters; no key bindings use them
+            length = 1 if buf[0] < 0x80 else 2 if buf[0] < 0xe0 else 3 if buf[0] < 0xf0 else 4
+            if len(buf) < length:
+                return None
+            self._buffer = buf[length:]
+            return buf[:length].decode(errors='replace')
+
+        if len(buf) == 1:
+            return None
+        if buf[1:2] not in (b'[', b'O'):
+            self._buffer = buf[1:]
+            return '\x1b'
+        # CSI/SS3 sequence: parameters then a final byte in 0x40-0x7e
+        for i in range(2, len(buf)):
+            if 0x40 <= buf[i] <= 0x7e:
+                self._buffer = buf[i + 1:]
+                # Normalize application-mode arrows (ESC O A) to ESC [ A
+                return '\x1b[' + buf[2:i + 1].decode(errors='replace')
+        return None
+
+    def read_keys(self, timeout=None):
+        """
+        Wait up to timeout seconds for input and return all queued keys.
+
+        Returns:
+            list: Keys in the order they were typed (empty on timeout).
+        """
+        if not self._buffer and not self._fill(timeout):
+            return []
+        while self._fill(0):
+            pass
+
+        keys = []
+        while self._buffer:
+            key = self._parse()
+            if key is None:
+                if self._fill(self.escape_timeout):
+                    continue
+                # The rest never arrived: a lone ESC (or truncated sequence)
+                key, self._buffer = '\x1b', self._buffer[1:]
+            keys.append(key)
+        return keys
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Interactive keyboard control for the rover over SSH.')
+    parser.add_argument('--hold', action='store_true',
+                        help='Hold-to-drive: stop automatically when the movement key is released')
+    parser.add_argument('--repeat-delay', type=float, default=REPEAT_DELAY,
+                        help='Seconds to wait for the first key repeat before stopping (default %(default)s)')
+    parser.add_argument('--release-timeout', type=float, default=RELEASE_TIMEOUT,
+                        help='Seconds without a key repeat before stopping (default %(default)s)')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='Write a startup profile report (see startup_profiler.py)')
+    return parser.parse_args()
 
 
 def main():
-    rover = Rover()
+    args = parse_args()
+
+    with profiler.phase('rover: init'):
+        rover = Rover()
     speed = 50
+    recorder = FlightRecorder.from_environment()
+    profiler.write_report()
 
     print(__doc__)
+    if args.hold:
+        print(f"Hold-to-drive on: stopping {args.release_timeout}s after a key is released")
     print(f"Current speed: {speed}%")
     print("Ready for input...\n")
 
+    fd = sys.stdin.fileno()
+    moves = {
+        'forward': rover.forward,
+        'backward': rover.backward,
+        'left': rover.left,
+        'right': rover.right,
+    }
+    current = None  # (action, speed) last sent to the rover
+    release_deadline = None  # Hold-to-drive: stop when this passes without a repeat
+
     try:
-        while True:
-            key = getch()
-
-            if key in ('q', 'Q'):
-                print("\nQuitting...")
-                break
-            elif key in ('w', 'W', '\x1b[A'):  # W or Up arrow
-                print(f"Forward ({speed}%)")
-                rover.forward(speed)
-            elif key in ('s', 'S', '\x1b[B'):  # S or Down arrow
-                print(f"Backward ({speed}%)")
-                rover.backward(speed)
-            elif key in ('a', 'A', '\x1b[D'):  # A or Left arrow
-                print(f"Left ({speed}%)")
-                rover.left(speed)
-            elif key in ('d', 'D', '\x1b[C'):  # D or Right arrow
-                print(f"Right ({speed}%)")
-                rover.right(speed)
-            elif key == ' ':
-                print("Stop")
-                rover.stop()
-            elif key in ('+', '='):
-                speed = min(100, speed + 10)
-                print(f"Speed: {speed}%")
-            elif key in ('-', '_'):
-                speed = max(10, speed - 10)
-                print(f"Speed: {speed}%")
+        with RawTerminal(fd):
+            reader = KeyReader(fd)
+            while True:
+                # The select timeout doubles as the release timer
+                timeout = None
+                if release_deadline is not None:
+                    timeout = max(0, release_deadline - time.monotonic())
+                try:
+                    keys = reader.read_keys(timeout)
+                except EOFError:
+                    break
+                now = time.monotonic()
+
+                # Apply speed changes in order; only the latest move counts
+                intent = None
+                quitting = False
+                for key in keys:
+                    action = KEY_ACTIONS.get(key)
+                    if action == 'quit':
+                        quitting = True
+                        break
+                    elif action == 'faster':
+                        speed = min(100, speed + 10)
+                        print(f"Speed: {speed}%")
+                    elif action == 'slower':
+                        speed = max(10, speed - 10)
+                        print(f"Speed: {speed}%")
+                    elif action is not None:
+                        intent = action
+
+                if quitting:
+                    print("\nQuitting...")
+                    break
+
+                if args.hold:
+                    if intent in moves:
+                        # A repeat of the active move keeps it alive; a new press
+                        # has to wait out the autorepeat delay first
+                        repeating = release_deadline is not None and current and current[0] == intent
+                        release_deadline = now + (args.release_timeout if repeating else args.repeat_delay)
+                    elif intent == 'stop':
+                        release_deadline = None
+                    elif release_deadline is not None and now >= release_deadline:
+                        print("Released - stop")
+                        rover.stop()
+                        if recorder:
+                            recorder.record('keyboard', 'stop', latency=time.monotonic() - now)
+                        current = ('stop', speed)
+                        release_deadline = None
+                        continue
+
+                # Held keys repeat; don't resend a command that is already active
+                if intent is None or (intent, speed) == current:
+                    continue
+                start = time.monotonic()
+                ok = False
+                try:
+                    if intent == 'stop':
+                        print("Stop")
+                        rover.stop()
+                    else:
+                        print(f"{intent.capitalize()} ({speed}%)")
+                        moves[intent](speed)
+                    ok = True
+                finally:
+                    if recorder:
+                        recorder.record('keyboard', intent, rover.left_speed, rover.right_speed,
+                                        ok, time.monotonic() - start)
+                current = (intent, speed)
 
     finally:
         rover.stop()
+        if recorder:
+            recorder.close()
         print("Motors stopped.")
 
 
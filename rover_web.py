@@ -9,217 +9,603 @@ Access the control page at http://<raspberry-pi-ip>:8080
 import sys
 sys.path.insert(0, '/home/edith/bcm2835-1.70/Motor_Driver_HAT_Code/Motor_Driver_HAT_Code/Raspberry Pi/python')
 
+import time
+BOOT_TIME = time.monotonic()  # Reference point for startup timings
+
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from socketserver import ThreadingMixIn
-from threading import Condition
+import threading
+from threading import Condition, Lock, Thread
+from collections import deque
 import json
+import math
 import signal
+import socket
 import io
 import os
-from rover import Rover
-
-from google import genai
-from google.genai import types
-from dotenv import load_dotenv
-
-
-from picamera2 import Picamera2
-from picamera2.encoders import MJPEGEncoder
-from picamera2.outputs import FileOutput
-import libcamera
-
-import pygame
-import numpy as np
-from gtts import gTTS
-import tempfile
-from threading import Thread
+from concurrent.futures import CancelledError
+from urllib.parse import urlsplit, parse_qs
+from startup_profiler import profiler
+
+with profiler.phase('import rover'):
+    from fleet import CommandTimeout, Fleet
+import i2c_bus
+from flight_recorder import FlightRecorder
+from video_recorder import VideoRecorder
+from frame_bus import FrameBus
+from motion import MotionDetector
+from auto_vision import AutoVision, VisionResults
+from mission import MissionError
+from debug_tools import DebugTools
+from ratelimit import AdmissionControl, retry_after
+from audio_engine import (AudioEngine, PRIORITY_ALERT, PRIORITY_BACKGROUND, PRIORITY_SPEECH,
+                          beep_waveform, horn_waveform)
+from process_pool import ProcessPool
+from tts import SpeechSynthesizer
+with profiler.phase('import dotenv'):
+    from dotenv import load_dotenv
+
+# Routes that can be addressed to one rover of a fleet as /api/<rover_id>/...
+ROVER_ROUTES = ('/api/control', '/api/drive', '/api/speed', '/api/pose', '/api/mission')
+
+# Camera, audio and vision libraries (picamera2, pygame, numpy, gtts,
+# google.genai) are slow to import, so they are imported inside the code
+# that uses them. This lets the server start listening before they load.
+
+
+def route_class(path):
+    """Admission control class (see ratelimit.py) of a request path."""
+    path = urlsplit(path).path
+    parts = path.split('/', 3)
+    if len(parts) == 4 and parts[1] == 'api' and f'/api/{parts[3]}' in ROVER_ROUTES:
+        path = f'/api/{parts[3]}'  # /api/<rover_id>/control
+    if path in ('/api/control', '/api/drive'):
+        return 'control'
+    if path == '/api/vision':
+        return 'vision'
+    return 'api'
+
+
+def mjpeg_part_header(length):
+    """Multipart boundary and part headers for one JPEG frame of an MJPEG stream."""
+    return b'--FRAME\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n\r\n' % length
+
+
+def send_buffers(sock, buffers):
+    """
+    Send several buffers with one vectored write (sendmsg) per attempt.
+
+    Buffers are sent without being joined or copied. If the socket takes
+    only part of the data, sending resumes from where it stopped.
+
+    Args:
+        sock (socket.socket): A blocking, connected socket.
+        buffers (list): Bytes-like objects, sent in order.
+    """
+    views = [memoryview(buf) for buf in buffers]
+    while views:
+        sent = sock.sendmsg(views)
+        while views and sent >= views[0].nbytes:
+            sent -= views[0].nbytes
+            views.pop(0)
+        if sent:
+            views[0] = views[0][sent:]
 
 
 class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
     """HTTP server that handles each request in a separate thread."""
     daemon_threads = True
+    # The default backlog of 5 overflows with a few busy clients, and each
+    # dropped connection then waits a full second for the SYN retry
+    request_queue_size = 128
+    admission = None  # Optional AdmissionControl that caps connections per client
+
+    def __init__(self, *args, **kwargs):
+        self._clients = {}  # Accepted socket -> client address, for admission control
+        super().__init__(*args, **kwargs)
+
+    def verify_request(self, request, client_address):
+        """Refuse a client that already has too many connections, before a thread is started."""
+        if self.admission is None:
+            return True
+        if not self.admission.connect(client_address[0]):
+            return False
+        self._clients[request] = client_address[0]
+        return True
+
+    def shutdown_request(self, request):
+        client = self._clients.pop(request, None)
+        if client is not None:
+            self.admission.disconnect(client)
+        super().shutdown_request(request)
 
 
 class StreamingOutput(io.BufferedIOBase):
-    """Thread-safe output buffer for MJPEG streaming."""
+    """
+    Thread-safe output buffer for MJPEG streaming.
 
-    def __init__(self):
+    Besides the latest frame, keeps the frames from the last preroll_seconds
+    so that a clip leading up to an event can be saved. The history holds
+    references to the encoder's frame buffers, not copies.
+
+    Clips are written to clip_dir, which is kept within clip_quota_bytes and
+    clip_max_count by deleting the oldest clips. Event clips (such as the
+    horn's) are saved at most once per clip_min_interval seconds.
+    """
+
+    def __init__(self, recorder=None, preroll_seconds=5.0, frame_bus=None, clip_dir='clips',
+                 clip_quota_bytes=256 * 1024 * 1024, clip_max_count=100, clip_min_interval=10.0):
         self.frame = None
+        # Part header for the current frame, built once and sent to every viewer
+        self.part_header = None
         self.condition = Condition()
+        self.recorder = recorder  # Optional VideoRecorder
+        self.frame_bus = frame_bus  # Optional FrameBus for local consumer processes
+        self.preroll_seconds = preroll_seconds
+        # (timestamp, frame) pairs; the maxlen bounds memory even at high frame rates
+        self.history = deque(maxlen=max(1, int(preroll_seconds * 60)))
+        # Running averages used by ViewerRateController
+        self.frame_size = 0.0
+        self.frame_period = 1 / 30
+        self._last_write = None
+        self.clip_dir = clip_dir
+        self.clip_quota_bytes = clip_quota_bytes
+        self.clip_max_count = clip_max_count
+        self.clip_min_interval = clip_min_interval
+        self._clip_lock = Lock()  # Guards the three fields below
+        self._last_clip_stamp = None
+        self._clip_suffix = 0  # Clips already named with _last_clip_stamp
+        self._last_event_clip = None
+        self._clip_write_lock = Lock()  # One clip written (and evicted for) at a time
 
     def write(self, buf):
+        now = time.time()
+        part_header = mjpeg_part_header(len(buf))
         with self.condition:
             self.frame = buf
+            self.part_header = part_header
+            if self._last_write is None:
+                self.frame_size = float(len(buf))
+            else:
+                self.frame_size += 0.1 * (len(buf) - self.frame_size)
+                self.frame_period += 0.1 * (now - self._last_write - self.frame_period)
+            self._last_write = now
+            if self.preroll_seconds > 0:
+                history = self.history
+                history.append((now, buf))
+                cutoff = now - self.preroll_seconds
+                while history[0][0] < cutoff:
+                    history.popleft()
             self.condition.notify_all()
+        if self.recorder:
+            self.recorder.submit(buf)
+        if self.frame_bus:
+            self.frame_bus.publish(buf, now)
         return len(buf)
 
-
-class ReversingSound:
-    """Manages the vehicle reversing beep sound."""
+    def recent_frames(self, seconds=None):
+        """Return the (timestamp, frame) pairs from the last seconds (default: all kept)."""
+        with self.condition:
+            frames = list(self.history)
+        if seconds is not None:
+            cutoff = time.time() - seconds
+            frames = [f for f in frames if f[0] >= cutoff]
+        return frames
+
+    def save_clip(self, reason, seconds=None, directory=None, event=False):
+        """
+        Save the frames leading up to now as an MJPEG file.
+
+        The frames are collected immediately and written in a background thread.
+
+        Args:
+            reason (str): Short label for the event, used in the file name.
+            seconds (float, optional): How much history to save. Defaults to all kept.
+            directory (str, optional): Output directory. Defaults to clip_dir.
+            event (bool): Saved automatically rather than on request, so
+                skipped if the last event clip is under clip_min_interval old.
+
+        Returns:
+            str: Path of the clip file, or None if there are no frames or the
+            event clip was skipped.
+        """
+        frames = self.recent_frames(seconds)
+        if not frames:
+            return None
+        directory = directory or self.clip_dir
+        safe_reason = ''.join(c for c in reason if c.isalnum() or c in '-_')[:32] or 'event'
+        taken = frames[-1][0]
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(taken)) + f'-{int(taken % 1 * 1000):03d}'
+
+        with self._clip_lock:
+            now = time.monotonic()
+            if event:
+                if self._last_event_clip is not None and now - self._last_event_clip < self.clip_min_interval:
+                    return None
+                self._last_event_clip = now
+            # Clips of the same last frame get a counter, so no two share a file
+            if stamp == self._last_clip_stamp:
+                self._clip_suffix += 1
+            else:
+                self._last_clip_stamp = stamp
+                self._clip_suffix = 0
+            suffix = self._clip_suffix
+            while True:
+                name = f'clip-{stamp}-{safe_reason}' + (f'-{suffix}' if suffix else '')
+                path = os.path.join(directory, name + '.mjpg')
+                if not os.path.exists(path):
+                    break
+                suffix += 1  # Left by an earlier run
+            self._clip_suffix = suffix
+
+        def _write_clip():
+            try:
+                with self._clip_write_lock:
+                    os.makedirs(directory, exist_ok=True)
+                    with open(path, 'wb') as f:
+                        for _, frame in frames:
+                            f.write(frame)
+                    self._evict_clips(directory, path)
+                print(f"Saved {len(frames)} frame clip to {path}")
+            except OSError as e:
+                print(f"Clip save error: {e}")
+
+        Thread(target=_write_clip, daemon=True).start()
+        return path
+
+    def _evict_clips(self, directory, keep):
+        """Delete the oldest clips until the directory is within quota (never keep itself)."""
+        clips = []
+        for name in os.listdir(directory):
+            if name.startswith('clip-') and name.endswith('.mjpg'):
+                try:
+                    stat = os.stat(os.path.join(directory, name))
+                except FileNotFoundError:
+                    continue
+                clips.append((stat.st_mtime, name, stat.st_size))
+        clips.sort()
+        total = sum(size for _, _, size in clips)
+        count = len(clips)
+        for _, name, size in clips:
+            if total <= self.clip_quota_bytes and count <= self.clip_max_count:
+                break
+            path = os.path.join(directory, name)
+            if path == keep:
+                continue
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            count -= 1
+
+
+class ViewerRateController:
+    """
+    Adapts the frame rate and quality tier of one MJPEG viewer to its link.
+
+    Sending a frame blocks once the socket buffer is full, so the time sends
+    take reflects how fast the viewer is actually receiving. The ratio of the
+    average frame size to the average send time gives the viewer's throughput
+    (most sends return at once while a few block for long, so averaging the
+    two separately is far more accurate than averaging per-send rates). The
+    controller sends only as many frames per second as the link can carry
+    (with some headroom), so a slow viewer gets fewer frames instead of an
+    ever-growing backlog. If even MIN_FPS doesn't fit, it moves to the next
+    lower quality tier, and moves back up once the higher tier would fit at
+    full frame rate.
+
+    Args:
+        tiers (list): StreamingOutputs ordered from highest to lowest quality.
+    """
+
+    # Small socket send buffer for video, so a slow viewer makes sends block
+    # (and is detected) after a frame or two rather than after megabytes of
+    # queued, increasingly stale frames
+    SEND_BUFFER = 64 * 1024
+    HEADROOM = 0.8  # Fraction of measured throughput to use
+    MIN_FPS = 10.0  # Step down a tier rather than go below this
+    UPGRADE_MARGIN = 1.5  # Bandwidth margin needed before stepping up a tier
+
+    def __init__(self, tiers):
+        self.tiers = tiers
+        self.tier = 0
+        self.interval = 0.0  # Minimum seconds between frames sent to this viewer
+        self.throughput = None  # Estimated bytes/s the viewer can receive
+        self._bytes = None  # Average bytes per send
+        self._duration = None  # Average seconds per send
+        self._last_sent = 0.0
+
+    @property
+    def output(self):
+        """The StreamingOutput this viewer should currently read from."""
+        return self.tiers[self.tier]
+
+    def should_send(self, now):
+        """Return True if a frame may be sent to the viewer at time now."""
+        return now - self._last_sent >= self.interval
+
+    def sent(self, nbytes, started, finished):
+        """
+        Update the estimates after sending a frame.
+
+        Args:
+            nbytes (int): Bytes sent.
+            started (float): time.monotonic() before sending.
+            finished (float): time.monotonic() after sending.
+        """
+        self._last_sent = started
+        duration = finished - started
+        if self._bytes is None:
+            self._bytes, self._duration = float(nbytes), duration
+        else:
+            self._bytes += 0.1 * (nbytes - self._bytes)
+            self._duration += 0.1 * (duration - self._duration)
+        self.throughput = self._bytes / max(self._duration, 1e-6)
+
+        budget = self.throughput * self.HEADROOM
+        output = self.output
+        fps = budget / max(output.frame_size, 1.0)
+        source_fps = 1 / max(output.frame_period, 1e-3)
+
+        if fps < self.MIN_FPS and self.tier < len(self.tiers) - 1:
+            self.tier += 1
+            output = self.output
+            fps = budget / max(output.frame_size, 1.0)
+        elif self.tier > 0:
+            better = self.tiers[self.tier - 1]
+            if budget / max(better.frame_size, 1.0) >= source_fps * self.UPGRADE_MARGIN:
+                self.tier -= 1
+                output = better
+                fps = budget / max(output.frame_size, 1.0)
+
+        self.interval = 0.0 if fps >= source_fps else 1 / max(fps, 0.5)
+
+
+class StatusHub:
+    """
+    Latest rover status, pushed to every client of /api/events.
+
+    The status is a set of named fields (motors, pose, subsystems, vision...).
+    Each field keeps the version at which it last changed and its JSON
+    encoding, so a client that has seen version v is sent only the fields
+    changed since v, encoded once however many clients there are. A client
+    that falls behind gets a single delta covering everything it missed, so
+    bursts of changes are coalesced instead of queued.
+    """
+
+    MIN_INTERVAL = 0.05  # Seconds between events to one client
+    KEEPALIVE = 15.0  # Seconds of silence before a keep-alive comment
 
     def __init__(self):
-        # Initialize pygame mixer for audio output
-        # Using hw:2,0 (the 3.5mm jack) - set via environment before init
-        os.environ['SDL_AUDIODRIVER'] = 'alsa'
-        os.environ['AUDIODEV'] = 'hw:2,0'
-        pygame.mixer.init(frequency=44100, size=-16, channels=2, buffer=4096)
-
-        # Generate the reversing beep sound
-        self.beep_sound = self._generate_beep()
-        self.is_playing = False
+        self.condition = threading.Condition()
+        self.version = 0
+        self.clients = 0
+        self._fields = {}  # name -> (version, value, JSON encoding)
+        self._stop = threading.Event()
+
+    def publish(self, name, value):
+        """Set a field. Clients are only woken if the value changed."""
+        with self.condition:
+            current = self._fields.get(name)
+            if current is not None and current[1] == value:
+                return
+            self.version += 1
+            self._fields[name] = (self.version, value, json.dumps(value))
+            self.condition.notify_all()
 
-    def _generate_beep(self):
-        """Generate a classic reversing beep pattern (beep-silence-beep-silence...)"""
-        sample_rate = 44100
-        beep_freq = 1000  # 1kHz tone
-        beep_duration = 0.3  # 300ms beep
-        silence_duration = 0.3  # 300ms silence
+    def _delta(self, since):
+        changed = [f'"{name}": {encoded}' for name, (version, _, encoded) in self._fields.items() if version > since]
+        return self.version, '{' + ', '.join(changed) + '}' if changed else None
 
-        # Generate one beep cycle (beep + silence)
-        beep_samples = int(sample_rate * beep_duration)
-        silence_samples = int(sample_rate * silence_duration)
-        total_samples = beep_samples + silence_samples
+    def delta(self, since):
+        """
+        Fields changed after a version.
 
-        # Create time array for the beep portion
-        t = np.linspace(0, beep_duration, beep_samples, dtype=np.float32)
+        Returns:
+            tuple: (current version, JSON object of the changed fields or None).
+        """
+        with self.condition:
+            return self._delta(since)
 
-        # Generate sine wave for beep
-        beep = np.sin(2 * np.pi * beep_freq * t)
+    def wait(self, since, timeout):
+        """Like delta(), but first wait up to timeout seconds for a change."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.version > since, timeout)
+            return self._delta(since)
+
+    def start(self, sample, interval=0.25):
+        """
+        Publish the fields returned by sample() every interval seconds.
+
+        For state that changes without an event to hook (pose, subsystem
+        health); unchanged fields cost a comparison and nothing is sent.
+        """
+        def _sample_thread():
+            while not self._stop.wait(interval):
+                try:
+                    for name, value in sample().items():
+                        self.publish(name, value)
+                except Exception as e:
+                    print(f"Status sample error: {e}")
+
+        Thread(target=_sample_thread, name='status-sampler', daemon=True).start()
 
-        # Apply fade in/out to avoid clicks (20ms fade)
-        fade_samples = int(sample_rate * 0.02)
-        fade_in = np.linspace(0, 1, fade_samples, dtype=np.float32)
-        fade_out = np.linspace(1, 0, fade_samples, dtype=np.float32)
-        beep[:fade_samples] *= fade_in
-        beep[-fade_samples:] *= fade_out
+    def stop(self):
+        self._stop.set()
 
-        # Create silence
-        silence = np.zeros(silence_samples, dtype=np.float32)
+    def status(self):
+        return {'clients': self.clients, 'version': self.version}
 
-        # Combine beep and silence
-        mono = np.concatenate([beep, silence])
 
-        # Create stereo array: silent left channel, beep on right channel
-        stereo = np.zeros((total_samples, 2), dtype=np.float32)
-        stereo[:, 1] = mono  # Right channel only
+class Subsystems:
+    """Tracks the background initialization of the rover subsystems.
 
-        # Convert to 16-bit integers and scale
-        stereo_int = (stereo * 32767).astype(np.int16)
+    Each subsystem is initialized in its own thread so that slow imports and
+    hardware setup (camera, audio, vision) don't delay driving. The state of
+    each one is 'initializing', 'ready', 'disabled' or 'failed'.
+    """
 
-        # Create pygame sound from the array
-        sound = pygame.sndarray.make_sound(stereo_int)
-        return sound
+    def __init__(self):
+        self._lock = Lock()
+        self._subsystems = {}
+        self._events = {}
+        self._threads = {}
+
+    def _set(self, name, **fields):
+        with self._lock:
+            self._subsystems.setdefault(name, {}).update(fields)
+
+    def start(self, name, init):
+        """
+        Initialize a subsystem in a background thread.
+
+        Args:
+            name (str): Subsystem name reported by /status.
+            init (callable): Initialization function. It may return 'disabled'
+                to report that the subsystem is deliberately unavailable.
+        """
+        self._set(name, state='initializing', error=None, init_time=None)
+
+        def _init_thread():
+            start = time.monotonic()
+            try:
+                state = init() or 'ready'
+                self._set(name, state=state)
+            except Exception as e:
+                print(f"Warning: {name} initialization failed ({e})")
+                self._set(name, state='failed', error=str(e))
+            finally:
+                self._set(name, init_time=round(time.monotonic() - start, 3))
+
+        thread = Thread(target=_init_thread, name=f'init-{name}', daemon=True)
+        thread.start()
+        self._threads[name] = thread
+        return thread
+
+    def wait(self, names=None, timeout=None):
+        """Wait for the named subsystems (default: all) to finish initializing."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for name in names or list(self._threads):
+            thread = self._threads.get(name)
+            if thread and thread is not threading.current_thread():
+                thread.join(None if deadline is None else max(0, deadline - time.monotonic()))
+
+    def mark(self, event):
+        """Record the first time an event happens, in seconds since boot."""
+        with self._lock:
+            if event not in self._events:
+                self._events[event] = round(time.monotonic() - BOOT_TIME, 3)
+                profiler.record(f'milestone: {event}', BOOT_TIME, time.monotonic())
+
+    def is_ready(self, name):
+        """Return True if the named subsystem initialized successfully."""
+        with self._lock:
+            return self._subsystems.get(name, {}).get('state') == 'ready'
+
+    def status(self):
+        """Return a snapshot of subsystem states and startup timings."""
+        with self._lock:
+            return {
+                'subsystems': {name: dict(info) for name, info in self._subsystems.items()},
+                'startup': dict(self._events),
+                'uptime': round(time.monotonic() - BOOT_TIME, 3),
+            }
+
+
+class ReversingSound:
+    """Manages the vehicle reversing beep sound."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        # Generate the reversing beep sound (a few milliseconds, so done here
+        # rather than waiting for a worker process to start)
+        self.beep_sound = beep_waveform()
+        self.is_playing = False
 
     def start(self):
         """Start playing the reversing beep in a loop."""
         if not self.is_playing:
-            self.beep_sound.play(loops=-1)  # -1 = infinite loop
+            self.engine.play('reversing', self.beep_sound, loop=True, priority=PRIORITY_BACKGROUND)
             self.is_playing = True
 
     def stop(self):
         """Stop the reversing beep."""
         if self.is_playing:
-            self.beep_sound.stop()
+            self.engine.stop('reversing')
             self.is_playing = False
 
 
 class HornSound:
     """Manages the horn sound."""
 
-    def __init__(self):
+    def __init__(self, engine):
+        self.engine = engine
         # Generate the horn sound
-        self.horn_sound = self._generate_horn()
+        self.horn_sound = horn_waveform()
         self.is_playing = False
 
-    def _generate_horn(self):
-        """Generate a car horn sound (dual-tone) for looping."""
-        sample_rate = 44100
-        duration = 0.5  # 500ms loop segment
-
-        samples = int(sample_rate * duration)
-        t = np.linspace(0, duration, samples, dtype=np.float32)
-
-        # Dual-tone horn (like a car horn) - F and A notes
-        freq1 = 349  # F4
-        freq2 = 440  # A4
-        tone1 = np.sin(2 * np.pi * freq1 * t)
-        tone2 = np.sin(2 * np.pi * freq2 * t)
-        horn = (tone1 + tone2) / 2  # Mix the two tones
-
-        # Create stereo array: silent left channel, horn on right channel
-        stereo = np.zeros((samples, 2), dtype=np.float32)
-        stereo[:, 1] = horn  # Right channel only
-
-        # Convert to 16-bit integers and scale
-        stereo_int = (stereo * 32767).astype(np.int16)
-
-        # Create pygame sound from the array
-        sound = pygame.sndarray.make_sound(stereo_int)
-        return sound
-
     def start(self):
         """Start playing the horn in a loop."""
         if not self.is_playing:
-            self.horn_sound.play(loops=-1)
+            # Top priority, and ducks everything else so it's clearly heard
+            self.engine.play('horn', self.horn_sound, loop=True, priority=PRIORITY_ALERT, duck=0.3)
             self.is_playing = True
 
     def stop(self):
         """Stop the horn."""
         if self.is_playing:
-            self.horn_sound.stop()
+            self.engine.stop('horn')
             self.is_playing = False
 
 
 class TextToSpeech:
-    """Text-to-speech using Google TTS, output to right channel."""
+    """Text-to-speech through the configured backends (see tts.py), output to right channel."""
 
-    def __init__(self):
-        self.is_speaking = False
-        self._speech_channel = pygame.mixer.Channel(1)  # Dedicated channel for TTS
+    ANNOUNCE_INTERVAL = 5.0  # Seconds before the same announcement is spoken again
 
-    def speak(self, text):
-        """Speak the given text (non-blocking, runs in background thread)."""
-        if self.is_speaking:
+    def __init__(self, engine, synthesizer):
+        self.engine = engine
+        self.synthesizer = synthesizer
+        self.is_speaking = False
+        self._announced = {}  # Announcement text -> monotonic time last spoken
+        self._announce_lock = Lock()
+
+    def announce(self, text):
+        """
+        Speak a safety announcement urgently (see speak()).
+
+        Repeats of the same announcement within ANNOUNCE_INTERVAL are
+        dropped, so a burst of failing commands doesn't restart it each time.
+        """
+        now = time.monotonic()
+        with self._announce_lock:
+            last = self._announced.get(text)
+            if last is not None and now - last < self.ANNOUNCE_INTERVAL:
+                return
+            self._announced[text] = now
+        self.speak(text, urgent=True)
+
+    def speak(self, text, urgent=False):
+        """
+        Speak the given text (non-blocking, runs in background thread).
+
+        Args:
+            text (str): Text to speak.
+            urgent (bool): For safety announcements: use the local-first
+                backends and replace any speech already playing.
+        """
+        if self.is_speaking and not urgent:
             return  # Don't interrupt current speech
 
         def _speak_thread():
             self.is_speaking = True
             try:
-                # Generate speech audio
-                tts = gTTS(text=text, lang='en')
-
-                # Save to temp file
-                with tempfile.NamedTemporaryFile(suffix='.mp3', delete=False) as f:
-                    temp_path = f.name
-                    tts.save(temp_path)
-
-                # Load and play via pygame
-                speech_sound = pygame.mixer.Sound(temp_path)
-
-                # Get the sound data and convert to right-channel only
-                sound_array = pygame.sndarray.array(speech_sound)
-
-                # Handle mono or stereo input
-                if len(sound_array.shape) == 1:
-                    # Mono - create stereo with right channel only
-                    stereo = np.zeros((len(sound_array), 2), dtype=sound_array.dtype)
-                    stereo[:, 1] = sound_array
-                else:
-                    # Stereo - mix to mono, output on right channel
-                    mono = np.mean(sound_array, axis=1).astype(sound_array.dtype)
-                    stereo = np.zeros_like(sound_array)
-                    stereo[:, 1] = mono
-
-                right_channel_sound = pygame.sndarray.make_sound(stereo)
-                self._speech_channel.play(right_channel_sound)
-
-                # Wait for playback to finish
-                while self._speech_channel.get_busy():
-                    pygame.time.wait(100)
-
-                # Cleanup temp file
-                os.unlink(temp_path)
+                samples, _ = self.synthesizer.synthesize(text, urgent)
 
+                # Speech ducks the reversing beep while it plays
+                voice = self.engine.play('speech', samples, priority=PRIORITY_SPEECH, duck=0.3)
+                voice.done.wait()
             except Exception as e:
                 print(f"TTS error: {e}")
             finally:
@@ -229,7 +615,7 @@ class TextToSpeech:
 
     def stop(self):
         """Stop any current speech."""
-        self._speech_channel.stop()
+        self.engine.stop('speech')
         self.is_speaking = False
 
 
@@ -375,6 +761,28 @@ HTML_PAGE = """<!DOCTYPE html>
         }
         .vision-result.visible { display: block; }
 
+        .joystick {
+            position: relative;
+            width: 180px;
+            height: 180px;
+            border-radius: 50%;
+            background: #2d1f3d;
+            border: 2px solid #a855f7;
+            margin-bottom: 30px;
+            touch-action: none;
+        }
+        .joystick-knob {
+            position: absolute;
+            left: 50%;
+            top: 50%;
+            width: 60px;
+            height: 60px;
+            margin: -30px 0 0 -30px;
+            border-radius: 50%;
+            background: #a855f7;
+            pointer-events: none;
+        }
+
         .speed-control {
             background: #2d1f3d;
             padding: 20px;
@@ -432,6 +840,12 @@ HTML_PAGE = """<!DOCTYPE html>
             color: #666;
             text-align: center;
         }
+        .telemetry {
+            margin-top: 8px;
+            font-size: 12px;
+            color: #888;
+            text-align: center;
+        }
 
         /* Landscape layout for mobile */
         @media screen and (max-height: 500px) and (orientation: landscape) {
@@ -558,6 +972,8 @@ HTML_PAGE = """<!DOCTYPE html>
         <div></div>
     </div>
 
+    <div class="joystick" id="joystick"><div class="joystick-knob" id="joystick-knob"></div></div>
+
     <button class="btn horn-btn" id="btn-horn">Horn</button>
 
     <div class="speed-control">
@@ -568,6 +984,7 @@ HTML_PAGE = """<!DOCTYPE html>
     <div class="keyboard-hint">
         Keyboard: Arrow keys or WASD to move, Space to stop
     </div>
+    <div class="telemetry" id="telemetry"></div>
 
     <script>
         const status = document.getElementById('status');
@@ -736,6 +1153,82 @@ HTML_PAGE = """<!DOCTYPE html>
             });
         });
 
+        // Joystick: streams continuous throttle/turn values, scaled by the speed slider.
+        // At most one request is in flight; newer values replace any pending one.
+        const joystick = document.getElementById('joystick');
+        const knob = document.getElementById('joystick-knob');
+        let driveInFlight = false;
+        let pendingDrive = null;
+        let lastDrive = null;
+
+        async function sendDrive(values) {
+            const key = values.throttle + ',' + values.turn;
+            if (driveInFlight) {
+                // Only the newest value is sent next; one equal to the request
+                // in flight cancels whatever was queued (e.g. a release)
+                pendingDrive = key === lastDrive ? null : values;
+                return;
+            }
+            if (key === lastDrive) return;
+            driveInFlight = true;
+            lastDrive = key;
+            try {
+                const response = await fetch('/api/drive', {
+                    method: 'POST',
+                    headers: { 'Content-Type': 'application/json' },
+                    body: JSON.stringify(values)
+                });
+                const data = await response.json();
+                if (data.status === 'ok') {
+                    status.textContent = (data.left === 0 && data.right === 0) ? 'Stopped' : `Driving: L ${data.left} R ${data.right}`;
+                    status.className = 'status connected';
+                } else {
+                    lastDrive = null;  // Not applied: send it again next time
+                    status.textContent = 'Error: ' + data.error;
+                    status.className = 'status error';
+                }
+            } catch (e) {
+                lastDrive = null;
+                status.textContent = 'Connection error';
+                status.className = 'status error';
+            }
+            driveInFlight = false;
+            if (pendingDrive) {
+                const next = pendingDrive;
+                pendingDrive = null;
+                sendDrive(next);
+            }
+        }
+
+        function moveJoystick(e) {
+            const rect = joystick.getBoundingClientRect();
+            const radius = rect.width / 2;
+            let x = (e.clientX - rect.left - radius) / radius;
+            let y = (e.clientY - rect.top - radius) / radius;
+            const length = Math.hypot(x, y);
+            if (length > 1) { x /= length; y /= length; }
+            knob.style.transform = `translate(${x * radius * 0.7}px, ${y * radius * 0.7}px)`;
+            const scale = parseInt(speedSlider.value);
+            sendDrive({ throttle: Math.round(-y * scale), turn: Math.round(x * scale) });
+        }
+
+        function releaseJoystick() {
+            knob.style.transform = '';
+            sendDrive({ throttle: 0, turn: 0 });
+        }
+
+        joystick.addEventListener('pointerdown', (e) => {
+            e.preventDefault();
+            joystick.setPointerCapture(e.pointerId);
+            currentCommand = 'drive';
+            moveJoystick(e);
+        });
+        joystick.addEventListener('pointermove', (e) => {
+            if (joystick.hasPointerCapture(e.pointerId)) moveJoystick(e);
+        });
+        joystick.addEventListener('pointerup', releaseJoystick);
+        joystick.addEventListener('pointercancel', releaseJoystick);
+
         // Horn (press and hold)
         const hornBtn = document.getElementById('btn-horn');
 
@@ -788,6 +1281,49 @@ HTML_PAGE = """<!DOCTYPE html>
             visionBtn.disabled = false;
             visionBtn.textContent = 'Describe Scene';
         });
+
+        // Live status pushed by the server: each event holds only the changed fields
+        const telemetry = document.getElementById('telemetry');
+        const rover = {};
+        let visionSeq = 0;
+        const events = new EventSource('/api/events');
+        events.onmessage = (e) => {
+            const changed = JSON.parse(e.data);
+            Object.assign(rover, changed);
+            const id = Object.keys(rover.motors || {})[0];
+
+            if (changed.motors && id) {
+                const [left, right] = rover.motors[id];
+                status.textContent = (left || right) ? `Moving: L ${left} R ${right}` : 'Stopped';
+                status.className = 'status connected';
+            }
+            if (changed.speed && id && document.activeElement !== speedSlider) {
+                speedSlider.value = rover.speed[id];
+                speedValue.textContent = rover.speed[id];
+            }
+            // Descriptions from other viewers and automatic (motion-triggered) vision
+            if (changed.vision && changed.vision.seq > visionSeq) {
+                visionSeq = changed.vision.seq;
+                visionResult.classList.add('visible');
+                visionResult.textContent = (changed.vision.source === 'auto' ? 'Auto: ' : '') + changed.vision.description;
+            }
+
+            const parts = [];
+            if (rover.pose && id) {
+                const pose = rover.pose[id];
+                parts.push(`x ${pose.x.toFixed(2)} m, y ${pose.y.toFixed(2)} m, ${Math.round(pose.heading)}&deg;`);
+            }
+            if (rover.missions && id && rover.missions[id] === 'running') parts.push('mission running');
+            if (rover.motion) parts.push('motion');
+            for (const [name, state] of Object.entries(rover.subsystems || {})) {
+                if (state !== 'ready' && state !== 'disabled') parts.push(`${name}: ${state}`);
+            }
+            telemetry.innerHTML = parts.join(' &middot; ');
+        };
+        events.onerror = () => {
+            status.textContent = 'Reconnecting...';
+            status.className = 'status error';
+        };
     </script>
 </body>
 </html>
@@ -797,60 +1333,365 @@ HTML_PAGE = """<!DOCTYPE html>
 class RoverHandler(BaseHTTPRequestHandler):
     """HTTP request handler for rover control."""
 
-    rover = None  # Class-level rover instance
+    fleet = None  # Class-level rovers, by id
     stream_output = None  # Class-level streaming output
+    stream_tiers = None  # Class-level list of outputs, highest quality first
     gemini_client = None  # Class-level Gemini client
     reversing_sound = None  # Class-level reversing sound
     horn_sound = None  # Class-level horn sound
     tts = None  # Class-level text-to-speech
+    audio = None  # Class-level audio engine
+    picam2 = None  # Class-level camera
+    subsystems = None  # Class-level subsystem initialization tracker
+    flight_recorder = None  # Class-level command recorder (optional)
+    video_recorder = None  # Class-level video recorder (optional)
+    motion_detector = None  # Class-level motion detector (optional)
+    vision_results = None  # Class-level latest scene description
+    status_hub = None  # Class-level status stream
+    auto_vision = None  # Class-level automatic scene description (optional)
+    debug_tools = None  # Class-level /debug/ endpoints (only with ROVER_DEBUG_TOKEN)
+    process_pool = None  # Class-level worker processes for CPU-heavy work (optional)
+    admission = None  # Class-level per-client rate limits and stream caps (optional)
+    _body = None  # Request body, once read
 
     def log_message(self, format, *args):
         """Custom log format."""
-        print(f"[{self.log_date_time_string()}] {args[0]}")
-
-    def send_json(self, data, status=200):
+        message = args[0]
+        path = getattr(self, 'path', '')
+        if path.startswith('/debug/') and isinstance(message, str):
+            # Keep query strings of debug requests (which may carry secrets) out of the log
+            message = message.replace(path, urlsplit(path).path)
+        print(f"[{self.log_date_time_string()}] {message}")
+
+    def send_json(self, data, status=200, headers=None):
         """Send a JSON response."""
         self.send_response(status)
         self.send_header('Content-Type', 'application/json')
         self.send_header('Access-Control-Allow-Origin', '*')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self.end_headers()
         self.wfile.write(json.dumps(data).encode())
 
+    def read_body(self):
+        """Read the request body (once; admission control may have read it already)."""
+        if self._body is None:
+            self._body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        return self._body
+
+    def is_stop(self):
+        """Return True if the request is a stop command. Only small bodies are read."""
+        if int(self.headers.get('Content-Length', 0)) > 1024:
+            return False
+        try:
+            return json.loads(self.read_body()).get('command') == 'stop'
+        except (ValueError, AttributeError):
+            return False
+
+    def admit(self):
+        """
+        Apply the client's rate limit for this request's route class.
+
+        Runs before the body is read. Over the limit, sends 429 with a
+        Retry-After header and returns False. Stop commands are always let
+        through, however many commands the client has sent.
+        """
+        if not self.admission:
+            return True
+        route = route_class(self.path)
+        delay = self.admission.check(self.client_address[0], route)
+        if not delay:
+            return True
+        if route == 'control' and self.command == 'POST' and self.is_stop():
+            self.admission.exempt(self.client_address[0], route)
+            return True
+        self.close_connection = True
+        self.send_json({'status': 'error', 'error': 'Too many requests'}, 429,
+                       {'Retry-After': retry_after(delay), 'Connection': 'close'})
+        return False
+
+    def open_stream(self, kind):
+        """Take one of the client's stream slots. Sends 429 and returns False if none is free."""
+        if self.admission and not self.admission.open_stream(self.client_address[0], kind):
+            self.close_connection = True
+            self.send_json({'status': 'error', 'error': f'Too many {kind} streams'}, 429,
+                           {'Retry-After': '5', 'Connection': 'close'})
+            return False
+        return True
+
+    def close_stream(self, kind):
+        if self.admission:
+            self.admission.close_stream(self.client_address[0], kind)
+
+    def route(self):
+        """
+        Resolve the fleet member a request is for.
+
+        /api/<rover_id>/control (and the other ROVER_ROUTES) address one rover;
+        the plain routes address the default (first) rover.
+
+        Returns:
+            tuple: (FleetMember, path with any rover id removed).
+        """
+        parts = self.path.split('/', 3)
+        if len(parts) == 4 and parts[1] == 'api':
+            member = self.fleet.get(parts[2])
+            if member and f'/api/{parts[3]}' in ROVER_ROUTES:
+                return member, f'/api/{parts[3]}'
+        return self.fleet.default, self.path
+
+    def announce(self, text):
+        """Speak a safety announcement, if speech is available."""
+        if self.tts:
+            self.tts.announce(text)
+
+    def record_command(self, rover, command, start, ok=True):
+        """Add a command to the flight recorder, if one is configured."""
+        if self.flight_recorder:
+            self.flight_recorder.record('web', command, rover.left_speed, rover.right_speed,
+                                        ok, time.perf_counter() - start)
+
     def do_GET(self):
         """Handle GET requests."""
+        if not self.admit():
+            return
+        member, path = self.route()
         if self.path == '/' or self.path == '/index.html':
             self.send_response(200)
             self.send_header('Content-Type', 'text/html')
             self.end_headers()
             self.wfile.write(HTML_PAGE.encode())
-        elif self.path == '/video_feed':
+        elif self.path == '/status':
+            self.send_json({**self.subsystems.status(), 'pose': member.odometry.pose(),
+                            'events': self.status_hub.status(),
+                            'audio': self.audio.status() if self.audio else None,
+                            'tts': self.tts.synthesizer.status() if self.tts else None,
+                            'workers': self.process_pool.status() if self.process_pool else None,
+                            'admission': self.admission.status() if self.admission else None,
+                            'frame_bus': (self.stream_output.frame_bus.status()
+                                          if self.stream_output and self.stream_output.frame_bus else None)})
+        elif self.path == '/api/events':
+            self.handle_events()
+        elif self.path == '/api/fleet':
+            self.send_json({'status': 'ok', 'rovers': self.fleet.status(), 'i2c': i2c_bus.get_bus().status()})
+        elif path == '/api/pose':
+            self.send_json({'status': 'ok', **member.odometry.pose()})
+        elif path == '/api/mission':
+            self.send_json({'status': 'ok', **member.mission_runner.status()})
+        elif self.path == '/api/motion':
+            if not self.motion_detector:
+                self.send_json({'status': 'error', 'error': 'Motion detection not enabled'}, 503)
+                return
+            self.send_json({'status': 'ok', **self.motion_detector.status()})
+        elif self.path == '/snapshot':
+            frame = self.stream_output.frame if self.stream_output else None
+            if not frame:
+                self.send_json({'status': 'error', 'error': 'No frame available'}, 503)
+                return
             self.send_response(200)
-            self.send_header('Age', '0')
+            self.send_header('Content-Type', 'image/jpeg')
+            self.send_header('Content-Length', len(frame))
             self.send_header('Cache-Control', 'no-cache, private')
-            self.send_header('Pragma', 'no-cache')
-            self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=FRAME')
             self.end_headers()
+            self.wfile.write(frame)
+        elif self.path == '/video_feed':
+            if not self.stream_output:
+                self.send_json({'status': 'error', 'error': 'Camera not ready'}, 503)
+                return
+            if not self.open_stream('video'):
+                return
             try:
+                self.send_response(200)
+                self.send_header('Age', '0')
+                self.send_header('Cache-Control', 'no-cache, private')
+                self.send_header('Pragma', 'no-cache')
+                self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=FRAME')
+                self.end_headers()
+                rate = ViewerRateController(self.stream_tiers or [self.stream_output])
+                self.connection.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, rate.SEND_BUFFER)
                 while True:
-                    with self.stream_output.condition:
-                        self.stream_output.condition.wait()
-                        frame = self.stream_output.frame
-                    self.wfile.write(b'--FRAME\r\n')
+                    output = rate.output
+                    with output.condition:
+                        output.condition.wait()
+                        frame, part_header = output.frame, output.part_header
+                    started = time.monotonic()
+                    if not rate.should_send(started):
+                        continue
+                    # wfile is unbuffered, so writing to the socket directly keeps the order
+                    send_buffers(self.connection, (part_header, frame, b'\r\n'))
+                    rate.sent(len(frame), started, time.monotonic())
+            except Exception:
+                pass
+            finally:
+                self.close_stream('video')
+        elif urlsplit(self.path).path == '/replay':
+            self.handle_replay()
+        elif self.debug_tools and self.path.startswith('/debug/'):
+            self.handle_debug()
+        else:
+            self.send_response(404)
+            self.end_headers()
+
+    def handle_events(self):
+        """
+        Stream status changes as server-sent events.
+
+        The first event holds every field (or, when the browser reconnects
+        with Last-Event-ID, the fields changed since that event); each later
+        event holds only the fields that changed. Event ids are hub versions.
+        """
+        hub = self.status_hub
+        try:
+            since = int(self.headers.get('Last-Event-ID', 0))
+        except ValueError:
+            since = 0
+        if since > hub.version:
+            since = 0  # Id from before a server restart
+        if not self.open_stream('events'):
+            return
+
+        with hub.condition:
+            hub.clients += 1
+        try:
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('Access-Control-Allow-Origin', '*')
+            self.end_headers()
+
+            version, data = hub.delta(since)
+            last_sent = 0.0
+            while True:
+                if data is None:
+                    self.wfile.write(b': keep-alive\n\n')
+                else:
+                    self.wfile.write(f'id: {version}\ndata: {data}\n\n'.encode())
+                    since = version
+                    last_sent = time.monotonic()
+                version, data = hub.wait(since, hub.KEEPALIVE)
+                delay = last_sent + hub.MIN_INTERVAL - time.monotonic()
+                if data is not None and delay > 0:
+                    # Changes right after an event are held briefly and sent together
+                    time.sleep(delay)
+                    version, data = hub.delta(since)
+        except Exception:
+            pass
+        finally:
+            with hub.condition:
+                hub.clients -= 1
+            self.close_stream('events')
+
+    def handle_debug(self):
+        """
+        Serve the debug endpoints (see debug_tools.py).
+
+        GET /debug/profile?seconds=&interval=&thread= samples all threads and
+        returns collapsed stacks. GET /debug/memory reports memory use;
+        POST /debug/memory/start?frames= and /debug/memory/stop turn
+        allocation tracing on and off.
+        """
+        url = urlsplit(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        if not self.debug_tools.authorized(self.headers.get('X-Debug-Token')):
+            self.send_json({'status': 'error', 'error': 'Forbidden'}, 403)
+            return
+
+        try:
+            if self.command == 'GET' and url.path == '/debug/profile':
+                try:
+                    stacks, rounds = self.debug_tools.profile(float(query.get('seconds', 5)),
+                                                              float(query.get('interval', 0.005)),
+                                                              query.get('thread'))
+                except RuntimeError as e:
+                    self.send_json({'status': 'error', 'error': str(e)}, 409)
+                    return
+                body = stacks.encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; charset=utf-8')
+                self.send_header('Content-Length', len(body))
+                self.send_header('X-Profile-Samples', rounds)
+                self.end_headers()
+                self.wfile.write(body)
+            elif self.command == 'GET' and url.path == '/debug/memory':
+                group = query.get('group', 'lineno')
+                if group not in ('lineno', 'filename'):
+                    self.send_json({'status': 'error', 'error': 'group must be lineno or filename'}, 400)
+                    return
+                self.send_json({'status': 'ok', **self.debug_tools.memory.report(int(query.get('limit', 20)), group)})
+            elif self.command == 'POST' and url.path == '/debug/memory/start':
+                self.debug_tools.memory.start(int(query.get('frames', 1)))
+                self.send_json({'status': 'ok', 'tracing': True})
+            elif self.command == 'POST' and url.path == '/debug/memory/stop':
+                self.debug_tools.memory.stop()
+                self.send_json({'status': 'ok', 'tracing': False})
+            else:
+                self.send_json({'status': 'error', 'error': 'Not found'}, 404)
+        except ValueError:
+            self.send_json({'status': 'error', 'error': 'Invalid parameter'}, 400)
+
+    def handle_replay(self):
+        """
+        Serve recorded video.
+
+        /replay lists the recorded segments. /replay?t=<unix time> returns the
+        first frame at or after t as a JPEG. /replay?start=<t>&end=<t> plays
+        the frames in that range as an MJPEG stream, paced at the recorded
+        rate multiplied by the optional speed parameter (0 = no pacing).
+        """
+        if not self.video_recorder:
+            self.send_json({'status': 'error', 'error': 'Recording not enabled'}, 503)
+            return
+
+        query = parse_qs(urlsplit(self.path).query)
+        try:
+            params = {key: float(values[0]) for key, values in query.items()}
+        except ValueError:
+            self.send_json({'status': 'error', 'error': 'Invalid parameter'}, 400)
+            return
+
+        if 't' in params:
+            with self.video_recorder.frames(params['t'], float('inf')) as frames:
+                for timestamp, frame in frames:
+                    self.send_response(200)
                     self.send_header('Content-Type', 'image/jpeg')
                     self.send_header('Content-Length', len(frame))
+                    self.send_header('X-Frame-Timestamp', f'{timestamp:.3f}')
                     self.end_headers()
                     self.wfile.write(frame)
-                    self.wfile.write(b'\r\n')
+                    return
+            self.send_json({'status': 'error', 'error': 'No frame at that time'}, 404)
+        elif 'start' in params:
+            end = params.get('end', float('inf'))
+            speed = params.get('speed', 1.0)
+            if not self.open_stream('video'):
+                return
+            try:
+                self.send_response(200)
+                self.send_header('Cache-Control', 'no-cache, private')
+                self.send_header('Content-Type', 'multipart/x-mixed-replace; boundary=FRAME')
+                self.end_headers()
+                with self.video_recorder.frames(params['start'], end) as frames:
+                    first = None
+                    for timestamp, frame in frames:
+                        if first is None:
+                            first = (timestamp, time.monotonic())
+                        elif speed > 0:
+                            delay = first[1] + (timestamp - first[0]) / speed - time.monotonic()
+                            if delay > 0:
+                                time.sleep(delay)
+                        send_buffers(self.connection, (mjpeg_part_header(len(frame)), frame, b'\r\n'))
             except Exception:
                 pass
+            finally:
+                self.close_stream('video')
         else:
-            self.send_response(404)
-            self.end_headers()
+            self.send_json({'status': 'ok', 'segments': self.video_recorder.segments()})
 
     def do_POST(self):
         """Handle POST requests."""
-        content_length = int(self.headers.get('Content-Length', 0))
-        body = self.rfile.read(content_length)
+        if not self.admit():
+            return
+        body = self.read_body()
 
         try:
             data = json.loads(body) if body else {}
@@ -858,44 +1699,103 @@ class RoverHandler(BaseHTTPRequestHandler):
             self.send_json({'status': 'error', 'error': 'Invalid JSON'}, 400)
             return
 
-        if self.path == '/api/control':
+        member, path = self.route()
+        rover = member.rover
+        if path == '/api/control':
             command = data.get('command')
             speed = data.get('speed')
 
             if command not in ('forward', 'backward', 'left', 'right', 'stop'):
                 self.send_json({'status': 'error', 'error': 'Invalid command'}, 400)
                 return
-
+            if speed is not None:
+                try:
+                    speed = float(speed)
+                    if not math.isfinite(speed):
+                        raise ValueError(speed)
+                except (TypeError, ValueError):
+                    self.send_json({'status': 'error', 'error': 'Invalid speed'}, 400)
+                    return
+
+            # Manual control (including stop) takes over from a running mission
+            if member.mission_runner.running:
+                member.mission_runner.cancel()
+
+            start = time.perf_counter()
             try:
                 if command == 'stop':
-                    self.rover.stop()
-                    if self.reversing_sound:
-                        self.reversing_sound.stop()
-                elif command == 'forward':
-                    self.rover.forward(speed)
-                    if self.reversing_sound:
-                        self.reversing_sound.stop()
-                elif command == 'backward':
-                    self.rover.backward(speed)
-                    if self.reversing_sound:
+                    # Not queued behind other commands: goes straight to the bus
+                    member.stop()
+                else:
+                    member.command(getattr(rover, command), speed)
+                if self.reversing_sound:
+                    if command == 'backward':
                         self.reversing_sound.start()
-                elif command == 'left':
-                    self.rover.left(speed)
-                    if self.reversing_sound:
-                        self.reversing_sound.stop()
-                elif command == 'right':
-                    self.rover.right(speed)
-                    if self.reversing_sound:
+                    else:
                         self.reversing_sound.stop()
 
+                self.record_command(rover, command, start)
+                self.subsystems.mark('first_command')
                 self.send_json({'status': 'ok', 'command': command})
+            except CancelledError:
+                self.send_json({'status': 'error', 'error': 'Superseded by stop'}, 409)
+            except CommandTimeout as e:
+                self.record_command(rover, command, start, ok=False)
+                self.announce('Motor controller not responding')
+                self.send_json({'status': 'error', 'error': str(e)}, 503 if e.dropped else 504)
             except Exception as e:
-                self.send_json({'status': 'error', 'error': str(e)}, 500)
+                self.record_command(rover, command, start, ok=False)
+                if isinstance(e, OSError):  # Bus or hardware failure, not a bad request
+                    self.announce('Warning: stop failed' if command == 'stop' else 'Motor error')
+                self.send_json({'status': 'error', 'error': str(e) or type(e).__name__}, 500)
+
+        elif path == '/api/drive':
+            # Continuous control: {"throttle": t, "turn": r} or {"left": l, "right": r}
+            try:
+                if 'left' in data or 'right' in data:
+                    command = 'tank'
+                    values = (float(data.get('left', 0)), float(data.get('right', 0)))
+                else:
+                    command = 'drive'
+                    values = (float(data.get('throttle', 0)), float(data.get('turn', 0)))
+                if not all(math.isfinite(value) for value in values):
+                    raise ValueError(values)
+            except (TypeError, ValueError):
+                self.send_json({'status': 'error', 'error': 'Invalid drive values'}, 400)
+                return
+
+            if member.mission_runner.running:
+                member.mission_runner.cancel()
+
+            start = time.perf_counter()
+            try:
+                member.command(getattr(rover, command), *values)
+                if self.reversing_sound:
+                    if rover.left_speed < 0 and rover.right_speed < 0:
+                        self.reversing_sound.start()
+                    else:
+                        self.reversing_sound.stop()
+                self.record_command(rover, command, start)
+                self.subsystems.mark('first_command')
+                self.send_json({'status': 'ok', 'left': rover.left_speed, 'right': rover.right_speed})
+            except CancelledError:
+                self.send_json({'status': 'error', 'error': 'Superseded by stop'}, 409)
+            except CommandTimeout as e:
+                self.record_command(rover, command, start, ok=False)
+                self.announce('Motor controller not responding')
+                self.send_json({'status': 'error', 'error': str(e)}, 503 if e.dropped else 504)
+            except Exception as e:
+                self.record_command(rover, command, start, ok=False)
+                if isinstance(e, OSError):
+                    self.announce('Motor error')
+                self.send_json({'status': 'error', 'error': str(e) or type(e).__name__}, 500)
 
-        elif self.path == '/api/speed':
+        elif path == '/api/speed':
             speed = data.get('speed')
             if speed is not None:
-                self.rover.set_speed(speed)
+                start = time.perf_counter()
+                rover.set_speed(speed)
+                self.record_command(rover, 'speed', start)
                 self.send_json({'status': 'ok', 'speed': speed})
             else:
                 self.send_json({'status': 'error', 'error': 'Missing speed'}, 400)
@@ -905,6 +1805,10 @@ class RoverHandler(BaseHTTPRequestHandler):
                 self.send_json({'status': 'error', 'error': 'Gemini not configured'}, 503)
                 return
 
+            if not self.stream_output:
+                self.send_json({'status': 'error', 'error': 'Camera not ready'}, 503)
+                return
+
             # Capture current frame
             with self.stream_output.condition:
                 frame = self.stream_output.frame
@@ -914,16 +1818,9 @@ class RoverHandler(BaseHTTPRequestHandler):
                 return
 
             try:
-                # Send to Gemini
-                response = self.gemini_client.models.generate_content(
-                    model='gemini-2.0-flash',
-                    contents=[
-                        "Describe what you see in this image from a rover's camera. Be concise.",
-                        types.Part.from_bytes(data=frame, mime_type='image/jpeg'),
-                    ],
-                )
-                description = response.text
+                description = describe_frame(self.gemini_client, frame)
                 self.send_json({'status': 'ok', 'description': description})
+                self.vision_results.publish(description, 'manual')
 
                 # Speak the description
                 if self.tts:
@@ -936,12 +1833,58 @@ class RoverHandler(BaseHTTPRequestHandler):
                 action = data.get('action', 'start')
                 if action == 'start':
                     self.horn_sound.start()
+                    if self.stream_output:
+                        self.stream_output.save_clip('horn', event=True)
                 else:
                     self.horn_sound.stop()
                 self.send_json({'status': 'ok'})
             else:
                 self.send_json({'status': 'error', 'error': 'Horn not available'}, 503)
 
+        elif path == '/api/pose':
+            try:
+                pose = (float(data.get('x', 0)), float(data.get('y', 0)), float(data.get('heading', 0)))
+                if not all(math.isfinite(value) for value in pose):
+                    raise ValueError(pose)
+            except (TypeError, ValueError):
+                self.send_json({'status': 'error', 'error': 'Invalid pose'}, 400)
+                return
+            member.odometry.reset(*pose)
+            self.send_json({'status': 'ok', **member.odometry.pose()})
+
+        elif path == '/api/mission':
+            if member.mission_runner.running:
+                self.send_json({'status': 'error', 'error': 'A mission is already running'}, 409)
+                return
+            try:
+                member.mission_runner.start(data.get('steps'))
+            except MissionError as e:
+                self.send_json({'status': 'error', 'error': str(e)}, 400)
+                return
+            self.send_json({'status': 'ok', 'state': 'running'}, 202)
+
+        elif self.path == '/api/clip':
+            if not self.stream_output:
+                self.send_json({'status': 'error', 'error': 'Camera not ready'}, 503)
+                return
+            seconds = data.get('seconds')
+            if seconds is not None:
+                try:
+                    seconds = float(seconds)
+                    if not math.isfinite(seconds) or seconds <= 0:
+                        raise ValueError(seconds)
+                except (TypeError, ValueError):
+                    self.send_json({'status': 'error', 'error': 'Invalid seconds'}, 400)
+                    return
+            path = self.stream_output.save_clip(str(data.get('reason', 'manual')), seconds)
+            if path:
+                self.send_json({'status': 'ok', 'path': path})
+            else:
+                self.send_json({'status': 'error', 'error': 'No frames available'}, 503)
+
+        elif self.debug_tools and self.path.startswith('/debug/'):
+            self.handle_debug()
+
         else:
             self.send_json({'status': 'error', 'error': 'Not found'}, 404)
 
@@ -954,77 +1897,283 @@ class RoverHandler(BaseHTTPRequestHandler):
         self.end_headers()
 
 
-def main():
-    """Start the web server."""
-    port = 8080
-
-    # Initialize rover
-    print("Initializing rover...")
-    rover = Rover()
-    RoverHandler.rover = rover
-
-    # Initialize audio
-    print("Initializing audio...")
-    try:
-        reversing_sound = ReversingSound()
-        RoverHandler.reversing_sound = reversing_sound
-        horn_sound = HornSound()
-        RoverHandler.horn_sound = horn_sound
-        tts = TextToSpeech()
-        RoverHandler.tts = tts
-        print("Audio enabled (reversing beep, horn, TTS)")
-    except Exception as e:
-        print(f"Warning: Audio initialization failed ({e}), sounds disabled")
-        RoverHandler.reversing_sound = None
-        RoverHandler.horn_sound = None
-        RoverHandler.tts = None
-
-    # Initialize camera
-    print("Initializing camera...")
-    picam2 = Picamera2()
-    video_config = picam2.create_video_configuration(main={"size": (640, 480)}, transform=libcamera.Transform(hflip=True, vflip=True))
-    picam2.configure(video_config)
-    stream_output = StreamingOutput()
-    picam2.start_recording(MJPEGEncoder(), FileOutput(stream_output))
+def describe_frame(client, frame):
+    """Ask Gemini to describe a JPEG frame from the rover's camera."""
+    from google.genai import types
+
+    response = client.models.generate_content(
+        model='gemini-2.0-flash',
+        contents=[
+            "Describe what you see in this image from a rover's camera. Be concise.",
+            types.Part.from_bytes(data=frame, mime_type='image/jpeg'),
+        ],
+    )
+    return response.text
+
+
+def init_audio():
+    """Initialize the reversing beep, horn and text-to-speech."""
+    with profiler.phase('import numpy'):
+        import numpy  # noqa: F401
+    with profiler.phase('import pygame'):
+        import pygame  # noqa: F401
+    with profiler.phase('audio: open device'):
+        engine = AudioEngine.from_environment()
+    with profiler.phase('audio: reversing beep'):
+        reversing_sound = ReversingSound(engine)
+    with profiler.phase('audio: horn'):
+        horn_sound = HornSound(engine)
+    with profiler.phase('audio: tts'):
+        # Also imports gtts if it is configured
+        synthesizer = SpeechSynthesizer.from_environment(RoverHandler.process_pool)
+        tts = TextToSpeech(engine, synthesizer)
+    RoverHandler.audio = engine
+    RoverHandler.reversing_sound = reversing_sound
+    RoverHandler.horn_sound = horn_sound
+    RoverHandler.tts = tts
+    print(f"Audio enabled (reversing beep, horn, TTS) on {engine.device_name}, "
+          f"{engine.frames}-frame buffer ({engine.period * 1000:.1f} ms)")
+    print(f"TTS backends: {', '.join(b.name for b in synthesizer.backends) or 'none'} "
+          f"(urgent: {', '.join(b.name for b in synthesizer.urgent_backends) or 'none'})")
+
+
+def init_camera():
+    """Start the camera and MJPEG stream."""
+    with profiler.phase('import picamera2'):
+        from picamera2 import Picamera2
+        from picamera2.encoders import MJPEGEncoder
+        from picamera2.outputs import FileOutput
+        import libcamera
+
+    with profiler.phase('camera: open'):
+        picam2 = Picamera2()
+    # ROVER_STREAM_TIERS=2 adds a low-resolution stream, encoded from the
+    # lores output, for viewers on slow links
+    tiers = int(os.environ.get('ROVER_STREAM_TIERS', 1))
+    with profiler.phase('camera: configure'):
+        # The lores stream also feeds motion detection (ROVER_MOTION)
+        use_lores = tiers > 1 or os.environ.get('ROVER_MOTION')
+        lores = {"size": (320, 240), "format": "YUV420"} if use_lores else None
+        video_config = picam2.create_video_configuration(main={"size": (640, 480)}, lores=lores, transform=libcamera.Transform(hflip=True, vflip=True))
+        picam2.configure(video_config)
+    video_recorder = VideoRecorder.from_environment()
+    if video_recorder:
+        print(f"Recording video to {video_recorder.directory}")
+    frame_bus = FrameBus.from_environment()
+    if frame_bus:
+        print(f"Publishing frames to shared memory {frame_bus.name!r}")
+    with profiler.phase('camera: start recording'):
+        stream_output = StreamingOutput(
+            recorder=video_recorder,
+            preroll_seconds=float(os.environ.get('ROVER_PREROLL_SECONDS', 5)),
+            frame_bus=frame_bus,
+            clip_dir=os.environ.get('ROVER_CLIP_DIR', 'clips'),
+            clip_quota_bytes=int(float(os.environ.get('ROVER_CLIP_QUOTA_MB', 256)) * 1024 * 1024),
+            clip_max_count=int(os.environ.get('ROVER_CLIP_MAX_COUNT', 100)),
+            clip_min_interval=float(os.environ.get('ROVER_CLIP_MIN_INTERVAL', 10)),
+        )
+        stream_tiers = [stream_output]
+        if tiers > 1:
+            low_output = StreamingOutput(preroll_seconds=0)
+            picam2.start_encoder(MJPEGEncoder(), FileOutput(stream_output), name="main")
+            picam2.start_encoder(MJPEGEncoder(), FileOutput(low_output), name="lores")
+            picam2.start()
+            stream_tiers.append(low_output)
+        else:
+            picam2.start_recording(MJPEGEncoder(), FileOutput(stream_output))
+    RoverHandler.motion_detector = MotionDetector.from_environment(picam2)
+    if RoverHandler.motion_detector:
+        print("Motion detection enabled")
+    RoverHandler.video_recorder = video_recorder
+    RoverHandler.picam2 = picam2
+    RoverHandler.stream_tiers = stream_tiers
     RoverHandler.stream_output = stream_output
-    print("Camera streaming started")
+    print(f"Camera streaming started ({len(stream_tiers)} quality tier{'s' if len(stream_tiers) > 1 else ''})")
 
-    # Load .env file and initialize Gemini
-    load_dotenv()
+
+def init_vision():
+    """Create the Gemini client if an API key is configured."""
     api_key = os.environ.get('GEMINI_API_KEY')
-    if api_key:
-        RoverHandler.gemini_client = genai.Client(api_key=api_key)
-        print("Gemini vision enabled")
-    else:
-        RoverHandler.gemini_client = None
+    if not api_key:
         print("Warning: GEMINI_API_KEY not set, vision disabled")
+        return 'disabled'
+
+    with profiler.phase('import google.genai'):
+        from google import genai
+
+    with profiler.phase('vision: client'):
+        RoverHandler.gemini_client = genai.Client(api_key=api_key)
+    print("Gemini vision enabled")
+
+
+def init_auto_vision():
+    """Describe the scene automatically when motion starts, if enabled."""
+    if not os.environ.get('ROVER_AUTO_VISION'):
+        return 'disabled'
+    RoverHandler.subsystems.wait(['camera', 'vision', 'audio'])
+    if not RoverHandler.motion_detector:
+        raise RuntimeError('requires motion detection (ROVER_MOTION=1)')
+    if not RoverHandler.gemini_client:
+        raise RuntimeError('requires Gemini vision (GEMINI_API_KEY)')
+
+    client = RoverHandler.gemini_client
+    stream_output = RoverHandler.stream_output
+    auto_vision = AutoVision(
+        describe=lambda frame: describe_frame(client, frame),
+        get_frame=lambda: stream_output.frame,
+        results=RoverHandler.vision_results,
+        speak=RoverHandler.tts.speak if RoverHandler.tts else None,
+        per_minute=float(os.environ.get('ROVER_AUTO_VISION_PER_MINUTE', 2)),
+        burst=int(os.environ.get('ROVER_AUTO_VISION_BURST', 1)),
+    )
+    RoverHandler.motion_detector.subscribe(auto_vision.on_motion)
+    RoverHandler.auto_vision = auto_vision
+    print("Automatic scene description enabled")
+
+
+def sample_status():
+    """Fields for the status stream that are sampled rather than pushed."""
+    fleet = RoverHandler.fleet
+    fields = {
+        'speed': {rover_id: member.rover.speed for rover_id, member in fleet.members.items()},
+        'pose': {rover_id: member.odometry.pose() for rover_id, member in fleet.members.items()},
+        'missions': {rover_id: member.mission_runner.state for rover_id, member in fleet.members.items()},
+        'subsystems': {name: info['state'] for name, info in RoverHandler.subsystems.status()['subsystems'].items()},
+    }
+    if RoverHandler.motion_detector:
+        fields['motion'] = RoverHandler.motion_detector.motion
+    return fields
+
+
+def publish_motors(fleet, hub):
+    """Push every rover's motor speeds to the status stream."""
+    hub.publish('motors', {rover_id: [member.rover.left_speed, member.rover.right_speed]
+                           for rover_id, member in fleet.members.items()})
+
+
+def start(port=8080):
+    """
+    Initialize the rover and start listening for requests.
+
+    Only the motor driver is initialized before the server starts listening.
+    Audio, camera and vision are initialized concurrently in the background,
+    and their progress is reported by the /status endpoint.
+
+    Args:
+        port (int): TCP port to listen on.
+
+    Returns:
+        ThreadingHTTPServer: The listening (but not yet serving) server.
+    """
+    # Load .env file before anything reads its settings
+    load_dotenv()
+
+    subsystems = Subsystems()
+    RoverHandler.subsystems = subsystems
+    RoverHandler.vision_results = VisionResults()
+
+    RoverHandler.flight_recorder = FlightRecorder.from_environment()
+    if RoverHandler.flight_recorder:
+        print(f"Flight recorder writing to {RoverHandler.flight_recorder.path}")
+
+    # Initialize rovers
+    print("Initializing rover...")
+    with profiler.phase('rover: init'):
+        RoverHandler.fleet = Fleet.from_environment(RoverHandler.flight_recorder)
+    if len(RoverHandler.fleet.members) > 1:
+        print(f"Fleet: {', '.join(RoverHandler.fleet.members)}")
+    subsystems.mark('rover_ready')
+
+    # Motor changes are pushed as they happen; everything else is sampled
+    hub = StatusHub()
+    RoverHandler.status_hub = hub
+    RoverHandler.debug_tools = DebugTools.from_environment()
+    if RoverHandler.debug_tools:
+        print("Debug endpoints enabled under /debug/")
+    fleet = RoverHandler.fleet
+    for member in fleet.members.values():
+        member.rover.subscribe(lambda left, right: publish_motors(fleet, hub))
+    publish_motors(fleet, hub)
+    RoverHandler.vision_results.subscribe(lambda result: hub.publish('vision', result))
+    hub.start(sample_status)
+
+    RoverHandler.process_pool = ProcessPool.from_environment()
+
+    print("Initializing audio, camera and vision in the background...")
+    subsystems.start('audio', init_audio)
+    subsystems.start('camera', init_camera)
+    subsystems.start('vision', init_vision)
+    subsystems.start('auto_vision', init_auto_vision)
+    pool = RoverHandler.process_pool
+    if pool:
+        # Workers are only started once startup is over, so spawning them (and
+        # their NumPy imports) doesn't compete with the first commands for CPU
+        def _warm_pool():
+            subsystems.wait()
+            pool.warm()
+        Thread(target=_warm_pool, name='warm-pool', daemon=True).start()
+    if profiler.enabled:
+        def _write_profile():
+            subsystems.wait()
+            profiler.write_report()
+        Thread(target=_write_profile, name='startup-profile', daemon=True).start()
+
+    RoverHandler.admission = AdmissionControl.from_environment()
+    server = ThreadingHTTPServer(('0.0.0.0', port), RoverHandler)
+    server.admission = RoverHandler.admission
+    subsystems.mark('server_listening')
+    return server
+
+
+# Held for good once shutdown starts: the signal handler and main()'s
+# finally both call shutdown_subsystems()
+_shutdown_started = Lock()
+
+
+def shutdown_subsystems():
+    """Stop the motors, camera and audio. Calls after the first do nothing."""
+    if not _shutdown_started.acquire(blocking=False):
+        return
+    if RoverHandler.motion_detector:
+        RoverHandler.motion_detector.stop()
+        RoverHandler.motion_detector = None
+    if RoverHandler.picam2:
+        RoverHandler.picam2.stop_recording()
+    if RoverHandler.stream_output and RoverHandler.stream_output.frame_bus:
+        RoverHandler.stream_output.frame_bus.close()
+    if RoverHandler.video_recorder:
+        RoverHandler.video_recorder.close()
+    RoverHandler.fleet.close()
+    RoverHandler.status_hub.stop()
+    if RoverHandler.flight_recorder:
+        RoverHandler.flight_recorder.flush()
+    if RoverHandler.audio:
+        RoverHandler.audio.close()
+    if RoverHandler.process_pool:
+        RoverHandler.process_pool.close()
+
+
+def main():
+    """Start the web server."""
+    port = int(os.environ.get('ROVER_PORT', 8080))
+    server = start(port)
 
     # Setup signal handlers for clean shutdown
     def shutdown(signum, frame):
         print("\nShutting down...")
-        picam2.stop_recording()
-        rover.stop()
-        if RoverHandler.reversing_sound:
-            RoverHandler.reversing_sound.stop()
-        pygame.mixer.quit()
+        shutdown_subsystems()
         sys.exit(0)
 
     signal.signal(signal.SIGINT, shutdown)
     signal.signal(signal.SIGTERM, shutdown)
 
-    # Start server
-    server = ThreadingHTTPServer(('0.0.0.0', port), RoverHandler)
     print(f"Rover web control running at http://0.0.0.0:{port}")
     print("Press Ctrl+C to stop")
 
     try:
         server.serve_forever()
     finally:
-        picam2.stop_recording()
-        rover.stop()
-        if RoverHandler.reversing_sound:
-            RoverHandler.reversing_sound.stop()
-        pygame.mixer.quit()
+        shutdown_subsystems()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,107 @@
+"""
+Startup profiler for the rover entry points.
+
+Records the wall time of each import and initialization phase so we can see
+where startup time goes. Profiling is off unless the ROVER_PROFILE_STARTUP
+environment variable is set (to anything but 0, false or no) or
+--profile-startup is passed on the command line.
+
+    ROVER_PROFILE_STARTUP=1 python rover_web.py
+    ROVER_PROFILE_STARTUP=/tmp/startup.json python rover_keyboard.py
+
+The report is written to startup_profile.txt, or to the path given in the
+environment variable (JSON if the path ends in .json).
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+START_TIME = time.monotonic()  # Phases are reported relative to this
+ENV_VAR = 'ROVER_PROFILE_STARTUP'
+DEFAULT_REPORT = 'startup_profile.txt'
+
+
+class StartupProfiler:
+    """
+    Thread-safe recorder of named startup phases.
+
+    When disabled, phase() does nothing, so it can be left in place around
+    imports and initialization code at no cost.
+
+    Example:
+        >>> with profiler.phase('import picamera2'):
+        ...     from picamera2 import Picamera2
+    """
+
+    def __init__(self, enabled=False, report_path=DEFAULT_REPORT):
+        self.enabled = enabled
+        self.report_path = report_path
+        self._lock = threading.Lock()
+        self._phases = []
+        self._written = False
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as a named phase."""
+        if not self.enabled:
+            yield
+            return
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.monotonic())
+
+    def record(self, name, start, end):
+        """Record a phase from monotonic start and end times."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._phases.append({
+                'name': name,
+                'thread': threading.current_thread().name,
+                'start': round(start - START_TIME, 4),
+                'duration': round(end - start, 4),
+            })
+
+    def phases(self):
+        """Return the recorded phases ordered by start time."""
+        with self._lock:
+            return sorted(self._phases, key=lambda p: p['start'])
+
+    def format_report(self):
+        """Format the recorded phases as a text table."""
+        lines = [f"{'start (s)':>10} {'time (s)':>10}  {'thread':<24} phase"]
+        for p in self.phases():
+            lines.append(f"{p['start']:>10.4f} {p['duration']:>10.4f}  {p['thread'][:24]:<24} {p['name']}")
+        lines.append(f"Total: {time.monotonic() - START_TIME:.4f} s since profiler import")
+        return '\n'.join(lines)
+
+    def write_report(self, path=None):
+        """Write the report once. Later calls are ignored."""
+        if not self.enabled or self._written:
+            return
+        self._written = True
+        path = path or self.report_path
+        with open(path, 'w') as f:
+            if path.endswith('.json'):
+                json.dump({'phases': self.phases(), 'total': time.monotonic() - START_TIME}, f, indent=2)
+            else:
+                f.write(self.format_report() + '\n')
+        print(f"Startup profile written to {path}")
+
+
+def _from_environment():
+    value = os.environ.get(ENV_VAR, '').strip()
+    disabled = value.lower() in ('', '0', 'false', 'no')
+    enabled = not disabled or '--profile-startup' in sys.argv
+    report_path = value if not disabled and value.lower() not in ('1', 'true', 'yes') else DEFAULT_REPORT
+    return StartupProfiler(enabled=enabled, report_path=report_path)
+
+
+# Shared profiler used by rover.py, rover_web.py and rover_keyboard.py
+profiler = _from_environment()
@@ -0,0 +1,385 @@
+"""
+Text-to-speech backends with deadline-based fallback.
+
+Backends turn text into mono float32 samples at the audio engine's sample
+rate:
+
+- gtts: Google TTS. Best voice, but needs the network and usually takes
+  hundreds of milliseconds to seconds per phrase.
+- piper: Piper neural TTS, run locally. Needs the piper binary and a voice
+  model (ROVER_PIPER_MODEL, the path of the .onnx file).
+- espeak: espeak-ng (or espeak), run locally. Robotic, but ready in tens of
+  milliseconds and needs nothing but the package.
+
+ROVER_TTS lists the backends to use in order of preference (default
+"gtts,piper,espeak"). Backends that aren't installed are left out. A network
+backend gets ROVER_TTS_DEADLINE seconds (default 1.0) to produce audio; if
+it fails or runs late, the next backend is started, and the network backend
+is skipped for RETRY_AFTER seconds so later phrases don't pay the deadline
+again. Should every backend fail, the late result is still used if it
+arrives.
+
+Urgent speech (safety announcements) uses ROVER_TTS_URGENT instead (default
+"espeak,piper,gtts"), so it normally never waits on the network and its
+time to first audio is predictable. Recently spoken phrases are cached.
+"""
+
+import io
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from audio_engine import decode_audio, resample
+from process_pool import offload
+
+DEFAULT_ORDER = 'gtts,piper,espeak'
+DEFAULT_URGENT_ORDER = 'espeak,piper,gtts'
+DEFAULT_DEADLINE = 1.0
+COMMAND_TIMEOUT = 10.0  # Seconds before a local synthesizer process is killed
+
+
+class Backend:
+    """
+    A way of turning text into samples.
+
+    Subclasses set name and local (False if it needs the network) and
+    implement fetch(), which produces encoded audio, and if needed decode(),
+    which turns it into samples. Decoding WAV or raw PCM is NumPy work, so
+    it is run in a worker process (backends must be picklable for that);
+    set decode_in_worker to False if decoding already happens in a child
+    process, where the pool would only add pickling.
+    """
+
+    name = None
+    local = True
+    decode_in_worker = True
+
+    def available(self):
+        """Return True if the backend is installed and configured."""
+        return True
+
+    def fetch(self, text):
+        """
+        Args:
+            text (str): Text to speak.
+
+        Returns:
+            bytes: Encoded audio, as accepted by decode().
+        """
+        raise NotImplementedError
+
+    def decode(self, data):
+        """
+        Returns:
+            numpy.ndarray: Mono float32 samples at audio_engine.SAMPLE_RATE.
+        """
+        return decode_audio(data)
+
+    def synthesize(self, text):
+        """Fetch and decode in the calling process."""
+        return self.decode(self.fetch(text))
+
+
+class GTTSBackend(Backend):
+    """Google TTS over the network (MP3, decoded with ffmpeg)."""
+
+    name = 'gtts'
+    local = False
+    decode_in_worker = False  # ffmpeg decodes the MP3
+
+    def __init__(self, lang='en'):
+        self.lang = lang
+
+    def available(self):
+        try:
+            import gtts  # noqa: F401
+        except ImportError:
+            return False
+        return True
+
+    def fetch(self, text):
+        from gtts import gTTS
+
+        mp3 = io.BytesIO()
+        gTTS(text=text, lang=self.lang).write_to_fp(mp3)
+        return mp3.getvalue()
+
+
+class EspeakBackend(Backend):
+    """
+    espeak-ng (or espeak) run locally, writing WAV to stdout.
+
+    Args:
+        voice (str): espeak voice name.
+        words_per_minute (int): Speaking rate.
+    """
+
+    name = 'espeak'
+
+    def __init__(self, voice='en', words_per_minute=165):
+        self.voice = voice
+        self.words_per_minute = words_per_minute
+        self.command = shutil.which('espeak-ng') or shutil.which('espeak')
+
+    def available(self):
+        return self.command is not None
+
+    def fetch(self, text):
+        result = subprocess.run(
+            [self.command, '--stdout', '-v', self.voice, '-s', str(self.words_per_minute)],
+            input=text.encode(), capture_output=True, timeout=COMMAND_TIMEOUT, check=False,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"espeak failed: {result.stderr.decode(errors='replace').strip()}")
+        return result.stdout
+
+
+class PiperBackend(Backend):
+    """
+    Piper run locally, writing raw 16-bit PCM to stdout.
+
+    Args:
+        model (str, optional): Path of the voice's .onnx file. Defaults to
+            ROVER_PIPER_MODEL. Its sample rate is read from the .onnx.json
+            file next to it.
+    """
+
+    name = 'piper'
+
+    def __init__(self, model=None):
+        self.model = model or os.environ.get('ROVER_PIPER_MODEL')
+        self.command = shutil.which('piper')
+        self.sample_rate = 22050
+        if self.model and os.path.exists(self.model + '.json'):
+            with open(self.model + '.json') as f:
+                self.sample_rate = json.load(f).get('audio', {}).get('sample_rate', self.sample_rate)
+
+    def available(self):
+        return bool(self.command and self.model and os.path.exists(self.model))
+
+    def fetch(self, text):
+        result = subprocess.run(
+            [self.command, '--model', self.model, '--output-raw'],
+            input=text.encode(), capture_output=True, timeout=COMMAND_TIMEOUT, check=False,
+        )
+        if result.returncode != 0:
+            raise RuntimeError(f"piper failed: {result.stderr.decode(errors='replace').strip()}")
+        return result.stdout
+
+    def decode(self, data):
+        import numpy as np
+
+        pcm = np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768
+        return resample(pcm, self.sample_rate)
+
+
+BACKENDS = {backend.name: backend for backend in (GTTSBackend, PiperBackend, EspeakBackend)}
+
+
+def parse_order(spec):
+    """
+    Parse a ROVER_TTS value into backend names.
+
+    Raises:
+        ValueError: If a name isn't a known backend.
+    """
+    names = [name.strip() for name in spec.split(',') if name.strip()]
+    for name in names:
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown TTS backend {name!r} (have: {', '.join(BACKENDS)})")
+    return names
+
+
+class BackendStats:
+    """Outcome counts and synthesis times for one backend."""
+
+    def __init__(self):
+        self.ok = 0
+        self.failed = 0
+        self.late = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_error = None
+
+    def status(self):
+        return {
+            'ok': self.ok,
+            'failed': self.failed,
+            'late': self.late,
+            'avg_ms': round(self.total_time / self.ok * 1000, 1) if self.ok else None,
+            'max_ms': round(self.max_time * 1000, 1),
+            'last_error': self.last_error,
+        }
+
+
+class SpeechSynthesizer:
+    """
+    Synthesizes text with the first backend that answers in time.
+
+    Args:
+        backends (list): Backend instances in order of preference.
+        urgent_backends (list, optional): Order for urgent speech. Defaults to backends.
+        deadline (float): Seconds a network backend has before the next one is tried.
+        cache_size (int): Phrases kept.
+        pool (ProcessPool, optional): Worker processes to decode audio in.
+    """
+
+    RETRY_AFTER = 30.0  # Seconds a failed or late network backend is skipped for
+    LATE_TIMEOUT = 10.0  # Seconds to still wait for a late backend if all others failed
+
+    def __init__(self, backends, urgent_backends=None, deadline=DEFAULT_DEADLINE, cache_size=16, pool=None):
+        self.backends = backends
+        self.pool = pool
+        self.urgent_backends = urgent_backends if urgent_backends is not None else backends
+        self.deadline = deadline
+        self.cache_size = cache_size
+        self.stats = {backend.name: BackendStats() for backend in backends + self.urgent_backends}
+        self.fallbacks = 0
+        self.cache_hits = 0
+        self._cache = OrderedDict()  # text -> (samples, backend name)
+        self._skip_until = {}  # backend name -> monotonic time
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_environment(cls, pool=None):
+        """Build the backends listed in ROVER_TTS and ROVER_TTS_URGENT that are available."""
+        instances = {}
+
+        def build(spec):
+            backends = []
+            for name in parse_order(spec):
+                if name not in instances:
+                    backend = BACKENDS[name]()
+                    instances[name] = backend if backend.available() else None
+                if instances[name]:
+                    backends.append(instances[name])
+            return backends
+
+        return cls(
+            build(os.environ.get('ROVER_TTS', DEFAULT_ORDER)),
+            build(os.environ.get('ROVER_TTS_URGENT', DEFAULT_URGENT_ORDER)),
+            deadline=float(os.environ.get('ROVER_TTS_DEADLINE', DEFAULT_DEADLINE)),
+            pool=pool,
+        )
+
+    def _run(self, backend, text):
+        """Start backend.synthesize(text) on a thread. Returns a Future of (samples, seconds)."""
+        future = Future()
+
+        def _synthesize():
+            started = time.monotonic()
+            try:
+                data = backend.fetch(text)
+                if backend.decode_in_worker:
+                    samples = offload(self.pool, f'tts: {backend.name}', backend.decode, data)
+                else:
+                    samples = backend.decode(data)
+            except Exception as e:
+                future.set_exception(e)
+            else:
+                future.set_result((samples, time.monotonic() - started))
+
+        threading.Thread(target=_synthesize, name=f'tts-{backend.name}', daemon=True).start()
+        return future
+
+    def _succeeded(self, backend, text, samples, seconds):
+        with self._lock:
+            stats = self.stats[backend.name]
+            stats.ok += 1
+            stats.total_time += seconds
+            stats.max_time = max(stats.max_time, seconds)
+            self._skip_until.pop(backend.name, None)
+            self._cache[text] = (samples, backend.name)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def _failed(self, backend, error=None):
+        with self._lock:
+            stats = self.stats[backend.name]
+            if error is None:
+                stats.late += 1
+            else:
+                stats.failed += 1
+                stats.last_error = str(error) or type(error).__name__
+            if not backend.local:
+                self._skip_until[backend.name] = time.monotonic() + self.RETRY_AFTER
+
+    def synthesize(self, text, urgent=False):
+        """
+        Turn text into samples.
+
+        Args:
+            text (str): Text to speak.
+            urgent (bool): Use the urgent (local-first) backend order.
+
+        Returns:
+            tuple: (samples, name of the backend that produced them).
+
+        Raises:
+            RuntimeError: If no backend produced audio.
+        """
+        with self._lock:
+            cached = self._cache.get(text)
+            if cached is not None:
+                self._cache.move_to_end(text)
+                self.cache_hits += 1
+                return cached
+            skip_until = dict(self._skip_until)
+
+        now = time.monotonic()
+        order = self.urgent_backends if urgent else self.backends
+        # If every backend is being skipped, try them anyway
+        backends = [b for b in order if skip_until.get(b.name, 0) <= now] or order
+        late = []
+        errors = []
+        for i, backend in enumerate(backends):
+            future = self._run(backend, text)
+            # Only network backends are cut short; local ones are bounded by COMMAND_TIMEOUT
+            last = i == len(backends) - 1
+            timeout = None if backend.local else self.LATE_TIMEOUT if last else self.deadline
+            try:
+                samples, seconds = future.result(timeout)
+            except FutureTimeout:
+                self._failed(backend)
+                if last:
+                    errors.append(f'{backend.name}: timed out')
+                else:
+                    late.append((backend, future))
+                continue
+            except Exception as e:
+                self._failed(backend, e)
+                errors.append(f'{backend.name}: {e}')
+                continue
+            if i:
+                with self._lock:
+                    self.fallbacks += 1
+            self._succeeded(backend, text, samples, seconds)
+            return samples, backend.name
+
+        for backend, future in late:
+            try:
+                samples, seconds = future.result(self.LATE_TIMEOUT)
+            except Exception as e:
+                errors.append(f'{backend.name}: {e}')
+                continue
+            self._succeeded(backend, text, samples, seconds)
+            return samples, backend.name
+        raise RuntimeError('; '.join(errors) or 'No TTS backend available')
+
+    def status(self):
+        now = time.monotonic()
+        with self._lock:
+            return {
+                'order': [b.name for b in self.backends],
+                'urgent_order': [b.name for b in self.urgent_backends],
+                'deadline': self.deadline,
+                'skipped': [name for name, until in self._skip_until.items() if until > now],
+                'fallbacks': self.fallbacks,
+                'cache_hits': self.cache_hits,
+                'backends': {name: stats.status() for name, stats in self.stats.items()},
+            }
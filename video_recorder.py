@@ -0,0 +1,227 @@
+"""
+Segmented on-disk recording of the MJPEG camera stream.
+
+Frames handed to VideoRecorder.submit() (from the encoder callback) are queued
+and written by a background thread, so the encoder is never delayed by disk
+I/O; if the disk can't keep up, frames are dropped and counted instead.
+
+Each segment is a pair of files:
+
+    segment-<start ms>.mjpg  JPEG frames back to back
+    segment-<start ms>.idx   one (timestamp, offset, length) record per frame
+
+A new segment starts when the current one reaches segment_bytes, and the
+oldest segments are deleted when the directory exceeds quota_bytes.
+Segments are read back with memory-mapped reads.
+
+Enable recording by setting ROVER_RECORD_DIR. ROVER_RECORD_QUOTA_MB (default
+1024) and ROVER_RECORD_SEGMENT_MB (default 64) set the limits.
+"""
+
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+from contextlib import contextmanager
+
+# Frame timestamp (unix seconds), byte offset in the .mjpg file, frame length
+INDEX_RECORD = struct.Struct('<dQI')
+
+WRITE_BUFFER = 1024 * 1024  # Large buffered writes keep syscalls per frame low
+FLUSH_INTERVAL = 1.0  # Seconds between flushes, so replay sees recent frames
+
+
+class VideoRecorder:
+    """
+    Records JPEG frames to rotating segment files with a disk quota.
+
+    Args:
+        directory (str): Where to keep segment files. Created if missing.
+        segment_bytes (int): Start a new segment once the current one is this big.
+        quota_bytes (int): Delete the oldest segments when the total exceeds this.
+        max_queue (int): Frames that can wait for the writer before new ones are dropped.
+    """
+
+    def __init__(self, directory, segment_bytes=64 * 1024 * 1024,
+                 quota_bytes=1024 * 1024 * 1024, max_queue=120):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.quota_bytes = quota_bytes
+        self.frames_written = 0
+        self.frames_dropped = 0
+        os.makedirs(directory, exist_ok=True)
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._current = None  # Base path of the segment being written
+        self._thread = threading.Thread(target=self._run, name='video-recorder', daemon=True)
+        self._thread.start()
+
+    @classmethod
+    def from_environment(cls):
+        """Return a recorder configured by ROVER_RECORD_DIR, or None."""
+        directory = os.environ.get('ROVER_RECORD_DIR')
+        if not directory:
+            return None
+        mib = 1024 * 1024
+        return cls(
+            directory,
+            segment_bytes=int(os.environ.get('ROVER_RECORD_SEGMENT_MB', 64)) * mib,
+            quota_bytes=int(os.environ.get('ROVER_RECORD_QUOTA_MB', 1024)) * mib,
+        )
+
+    def submit(self, frame):
+        """Queue a frame for writing. Never blocks; drops the frame if the queue is full."""
+        try:
+            self._queue.put_nowait((time.time(), frame))
+        except queue.Full:
+            self.frames_dropped += 1
+
+    def close(self):
+        """Write out queued frames and stop the writer thread."""
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        data = index = None
+        size = 0
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                item = False
+            if item is None:
+                break
+
+            if item:
+                timestamp, frame = item
+                if data is None or size >= self.segment_bytes:
+                    if data is not None:
+                        data.close()
+                        index.close()
+                    self._current = os.path.join(self.directory, f'segment-{int(timestamp * 1000)}')
+                    data = open(self._current + '.mjpg', 'wb', buffering=WRITE_BUFFER)
+                    index = open(self._current + '.idx', 'wb', buffering=WRITE_BUFFER)
+                    size = 0
+                    self._evict()
+                data.write(frame)
+                index.write(INDEX_RECORD.pack(timestamp, size, len(frame)))
+                size += len(frame)
+                self.frames_written += 1
+
+            # Flush data before index so the index never points past the data
+            if data is not None and time.monotonic() - last_flush >= FLUSH_INTERVAL:
+                data.flush()
+                index.flush()
+                last_flush = time.monotonic()
+
+        if data is not None:
+            data.close()
+            index.close()
+
+    def _evict(self):
+        """Delete the oldest segments until the directory is within quota."""
+        segments = self._segment_paths()
+        total = sum(self._segment_size(path) for path in segments)
+        for path in segments:
+            if total <= self.quota_bytes or path == self._current:
+                break
+            total -= self._segment_size(path)
+            for ext in ('.mjpg', '.idx'):
+                try:
+                    os.unlink(path + ext)
+                except FileNotFoundError:
+                    pass
+
+    @staticmethod
+    def _segment_size(path):
+        size = 0
+        for ext in ('.mjpg', '.idx'):
+            try:
+                size += os.path.getsize(path + ext)
+            except FileNotFoundError:
+                pass
+        return size
+
+    def _segment_paths(self):
+        """Base paths of all segments, oldest first."""
+        names = [n[:-4] for n in os.listdir(self.directory)
+                 if n.startswith('segment-') and n.endswith('.idx')]
+        names.sort(key=lambda n: int(n.split('-', 1)[1]))
+        return [os.path.join(self.directory, n) for n in names]
+
+    def _read_index(self, path):
+        """Return the usable index entries of a segment."""
+        try:
+            with open(path + '.idx', 'rb') as f:
+                raw = f.read()
+            data_size = os.path.getsize(path + '.mjpg')
+        except FileNotFoundError:
+            return []
+        usable = len(raw) - len(raw) % INDEX_RECORD.size
+        entries = list(INDEX_RECORD.iter_unpack(raw[:usable]))
+        return [e for e in entries if e[1] + e[2] <= data_size]
+
+    def segments(self):
+        """
+        List the recorded segments.
+
+        Returns:
+            list: Dicts with name, start, end (unix seconds), frames and bytes.
+        """
+        result = []
+        for path in self._segment_paths():
+            entries = self._read_index(path)
+            if entries:
+                result.append({
+                    'name': os.path.basename(path),
+                    'start': entries[0][0],
+                    'end': entries[-1][0],
+                    'frames': len(entries),
+                    'bytes': self._segment_size(path),
+                })
+        return result
+
+    @contextmanager
+    def frames(self, start, end):
+        """
+        Iterate over recorded frames with start <= timestamp <= end.
+
+        Frames are memoryviews into memory-mapped segment files and are only
+        valid inside the with block.
+
+        Yields:
+            iterator: (timestamp, memoryview) pairs in time order.
+        """
+        maps = []
+
+        def _generate():
+            for path in self._segment_paths():
+                entries = [e for e in self._read_index(path) if start <= e[0] <= end]
+                if not entries:
+                    continue
+                try:
+                    with open(path + '.mjpg', 'rb') as f:
+                        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except (FileNotFoundError, ValueError):
+                    continue
+                maps.append(mm)
+                view = memoryview(mm)
+                try:
+                    for timestamp, offset, length in entries:
+                        yield timestamp, view[offset:offset + length]
+                finally:
+                    view.release()
+
+        generator = _generate()
+        try:
+            yield generator
+        finally:
+            generator.close()
+            for mm in maps:
+                try:
+                    mm.close()
+                except BufferError:
+                    pass  # A caller still holds a frame view; the map is freed with it